@@ -1,62 +1,74 @@
-import aiohttp
 import asyncio
 from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
 from email.utils import parsedate_tz, mktime_tz
-from config import KEYWORDS, EXCLUDED_KEYWORDS
+from keyword_filter import is_relevant
+from news_item import NewsItem, cutoff
+from http_cache import fetch_parsed
+from budget import run_with_budget
+from http_client import get_session, close_session
 
-async def fetch_bloknot_news():
+SOURCE_ID = "bloknot"
+
+
+def parse_bloknot_feed(content):
+    """
+    Разбирает RSS-ленту bloknot-volgograd.ru.
+    Возвращает список новостей с заголовком, ссылкой, описанием и временем
+    публикации (Unix-время) в порядке ленты.
+    """
+    # Парсим RSS с помощью BeautifulSoup
+    soup = BeautifulSoup(content, "xml")
+    entries = []
+
+    for item in soup.find_all("item"):
+        title = item.title.text if item.title else "Заголовок не найден"
+        link = item.link.text if item.link else "Ссылка не найдена"
+        description = item.description.text if item.description else ""
+        pub_date = item.pubDate.text if item.pubDate else None
+
+        if not pub_date:
+            print(f"❗️ Ошибка: отсутствует дата публикации для новости '{title}'.")
+            continue
+
+        pub_date = pub_date.replace(",", "")
+        parsed_date = parsedate_tz(pub_date)
+
+        if not parsed_date:
+            print(f"❗️ Ошибка преобразования даты: {pub_date}")
+            continue
+
+        entries.append({
+            "title": title,
+            "link": link,
+            "description": description,
+            "published": mktime_tz(parsed_date),
+        })
+
+    return entries
+
+
+async def fetch_bloknot_news(session=None):
     """Асинхронно парсит новости с bloknot-volgograd.ru и возвращает список подходящих новостей."""
     rss_url = 'https://bloknot-volgograd.ru/rss_news.php'
     news_list = []
+    session = session or get_session()
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(rss_url) as response:
-                response.raise_for_status()
-                content = await response.text()
-
-                # Парсим RSS с помощью BeautifulSoup
-                soup = BeautifulSoup(content, "xml")
-                items = soup.find_all("item")
-
-                if not items:
-                    print("❗️ Не удалось найти новости.")
-                    return []
-
-                now = datetime.now()
-
-                for item in items:
-                    title = item.title.text if item.title else "Заголовок не найден"
-                    link = item.link.text if item.link else "Ссылка не найдена"
-                    description = item.description.text if item.description else ""
-                    pub_date = item.pubDate.text if item.pubDate else None
-
-                    if not pub_date:
-                        print(f"❗️ Ошибка: отсутствует дата публикации для новости '{title}'.")
-                        continue
-
-                    pub_date = pub_date.replace(",", "")
-                    parsed_date = parsedate_tz(pub_date)
-
-                    if parsed_date:
-                        pub_date_obj = datetime.fromtimestamp(mktime_tz(parsed_date))
-                        if now - pub_date_obj > timedelta(days=1):
-                            continue  # Пропускаем новости старше 24 часов
-
-                        formatted_date = pub_date_obj.strftime("%d.%m.%y %H:%M")
-
-                        if (
-                            any(keyword.lower() in title.lower() or keyword.lower() in description.lower() for keyword in KEYWORDS)
-                            and not any(excluded.lower() in title.lower() or excluded.lower() in description.lower() for excluded in EXCLUDED_KEYWORDS)
-                        ):
-                            news_list.append({
-                                "title": title,
-                                "link": link,
-                                "date": formatted_date
-                            })
-                    else:
-                        print(f"❗️ Ошибка преобразования даты: {pub_date}")
+        # Лента разбирается заново, только если она изменилась с прошлого запроса
+        entries = await fetch_parsed(session, rss_url, parse_bloknot_feed)
+
+        if not entries:
+            print("❗️ Не удалось найти новости.")
+            return []
+
+        threshold = cutoff()
+
+        for entry in entries:
+            if entry["published"] < threshold:
+                continue  # Пропускаем новости старше 24 часов
+
+            if is_relevant(entry["title"], entry["description"]):
+                news_list.append(NewsItem.create(SOURCE_ID, entry["title"], entry["link"], entry["published"]))
 
     except Exception as e:
         print(f"❗️ Ошибка при запросе или парсинге: {e}")
@@ -71,13 +83,16 @@ async def fetch_bloknot_news():
 # Асинхронная основная функция
 async def main():
     # Получаем новости
-    news = await fetch_bloknot_news()
+    news, cut = await run_with_budget(SOURCE_ID, fetch_bloknot_news)
+    await close_session()
+    if cut:
+        print("⏱ Сбор прерван по сроку, результат неполный")
 
     # Выводим новости, если они есть
     for item in news:
-        print(f"📢 Заголовок: {item['title']}\n"
-              f"🔗 Ссылка: {item['link']}\n"
-              f"📅 Дата публикации: {item['date']}\n"
+        print(f"📢 Заголовок: {item.title}\n"
+              f"🔗 Ссылка: {item.link}\n"
+              f"📅 Дата публикации: {item.format_date()}\n"
               f"{'-' * 50}")
 
 # Запуск асинхронной программы
@@ -1,77 +1,90 @@
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
 from dateutil.parser import parse
-from config import KEYWORDS, EXCLUDED_KEYWORDS
+from config import KEYWORDS
+from keyword_filter import is_relevant
+from news_item import NewsItem, cutoff, to_timestamp
+from html_parse import parse_html
+from http_cache import fetch_parsed
+from budget import run_with_budget
+from http_client import get_session, close_session
 import sys
 
 BASE_URL = "https://gorvesti.ru"
 FEED_URL = "https://gorvesti.ru/feed/"
+SOURCE_ID = "gorvesti"
 
-async def fetch_gorvesti_news():
+def parse_gorvesti_page(content, backend=None):
+    """
+    Разбирает ленту https://gorvesti.ru/feed/.
+    Возвращает список новостей с заголовком, ссылкой и датой публикации (datetime).
+    """
+    # Парсим только блоки новостей
+    entries = []
+
+    for item in parse_html(content, scope="div.itm", backend=backend):
+        # Извлекаем заголовок
+        title_tag = item.select_one("h2")
+        title = title_tag.text if title_tag else None
+
+        # Пропускаем, если заголовок не найден
+        if not title:
+            continue
+
+        # Извлекаем ссылку
+        link_tag = title_tag.find_parent("a[href]")
+        link = BASE_URL + link_tag.get("href") if link_tag else None
+        if not link:
+            continue
+
+        # Извлекаем дату
+        date_tag = item.select_one("span.dt")
+        date_str = date_tag.text if date_tag else None
+
+        # Преобразуем дату в объект datetime
+        try:
+            date = parse(date_str, dayfirst=True)
+        except Exception:
+            continue  # Пропускаем, если дата не парсится
+
+        entries.append({"title": title, "link": link, "date": date})
+
+    return entries
+
+
+async def fetch_gorvesti_news(session=None):
     """
     Асинхронно парсит новости с https://gorvesti.ru/feed/ за последние сутки.
-    Возвращает список словарей с заголовком, ссылкой и датой публикации.
+    Возвращает список NewsItem.
     """
-    try:
-        # Отправляем асинхронный GET-запрос
-        async with aiohttp.ClientSession() as session:
-            async with session.get(FEED_URL, timeout=10, ssl=False) as response:
-                response.raise_for_status()
-                content = await response.text()
+    session = session or get_session()
 
-        # Парсим HTML-код
-        soup = BeautifulSoup(content, "html.parser")
+    try:
+        # Страница разбирается заново, только если она изменилась с прошлого запроса
+        entries = await fetch_parsed(
+            session, FEED_URL, parse_gorvesti_page, timeout=aiohttp.ClientTimeout(total=10), ssl=False
+        )
 
         # Проверяем доступность новостей
-        news_blocks = soup.find_all("div", class_="itm")
-        if not news_blocks:
+        if not entries:
             print(f"❗️ Для сайта {BASE_URL} не удалось найти новости на странице.")
             return []
 
         # Определяем временной порог (последние сутки)
-        cutoff_time = datetime.now() - timedelta(days=1)
+        threshold = cutoff()
 
         # Список для хранения новостей
         news_items = []
 
-        for item in news_blocks:
-            # Извлекаем заголовок
-            title_tag = item.find("h2")
-            title = title_tag.get_text(strip=True) if title_tag else None
-
-            # Пропускаем, если заголовок не найден
-            if not title:
-                continue
-
-            # Извлекаем ссылку
-            link = BASE_URL + title_tag.find_parent("a")["href"] if title_tag and title_tag.find_parent("a") else None
-            if not link:
-                continue
-
-            # Извлекаем дату
-            date_tag = item.find("span", class_="dt")
-            date_str = date_tag.get_text(strip=True) if date_tag else None
-
-            # Преобразуем дату в объект datetime
-            try:
-                date = parse(date_str, dayfirst=True)
-            except Exception:
-                continue  # Пропускаем, если дата не парсится
-
+        for entry in entries:
             # Фильтрация по дате
-            if date < cutoff_time:
+            published = to_timestamp(entry["date"])
+            if published < threshold:
                 continue  # Пропускаем старые новости
 
             # Фильтрация по ключевым словам
-            if any(kw.lower() in title.lower() for kw in KEYWORDS):
-                if not any(ex_kw.lower() in title.lower() for ex_kw in EXCLUDED_KEYWORDS):
-                    news_items.append({
-                        "title": title,
-                        "link": link,
-                        "date": date.strftime("%d.%m.%y %H:%M")  # Форматируем дату в требуемом виде
-                    })
+            if is_relevant(entry["title"]):
+                news_items.append(NewsItem.create(SOURCE_ID, entry["title"], entry["link"], published))
 
         return news_items
 
@@ -97,13 +110,13 @@ def display_news(news_items):
     seen_titles = set()  # Множество для хранения уникальных заголовков
 
     for item in news_items:
-        if item['link'] not in seen_links and item['title'] not in seen_titles:
-            seen_links.add(item['link'])
-            seen_titles.add(item['title'])
+        if item.link not in seen_links and item.title not in seen_titles:
+            seen_links.add(item.link)
+            seen_titles.add(item.title)
             print(
-                f"📢 Заголовок: {item['title']}\n"
-                f"🔗 Ссылка: {item['link']}\n"
-                f"📅 Дата публикации: {item['date']}\n"
+                f"📢 Заголовок: {item.title}\n"
+                f"🔗 Ссылка: {item.link}\n"
+                f"📅 Дата публикации: {item.format_date()}\n"
                 f"{'-' * 50}"
             )
 
@@ -118,7 +131,10 @@ async def main():
         sys.exit(1)
 
     # Получаем новости
-    news = await fetch_gorvesti_news()
+    news, cut = await run_with_budget(SOURCE_ID, fetch_gorvesti_news)
+    await close_session()
+    if cut:
+        print("⏱ Сбор прерван по сроку, результат неполный")
 
     # Выводим новости
     display_news(news)
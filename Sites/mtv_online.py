@@ -1,12 +1,16 @@
-import aiohttp
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlsplit
-from config import KEYWORDS, EXCLUDED_KEYWORDS  # Импортируем ключевые слова из config.py
+from keyword_filter import is_relevant
+from news_item import NewsItem, now
+from html_parse import parse_html
+from http_cache import fetch_parsed
+from budget import run_with_budget
+from http_client import get_session, close_session
 import asyncio
 from datetime import datetime
 
 # Базовый URL сайта
 base_url = 'https://мтв.онлайн/feed'
+SOURCE_ID = "mtv"
 
 def make_clickable_url(url):
     """Преобразует URL в кликабельный формат (Punycode)"""
@@ -19,19 +23,15 @@ def make_clickable_url(url):
     except Exception:
         return url
 
-def contains_keywords(text, keywords):
-    """Проверяет, содержит ли текст хотя бы одно ключевое слово"""
-    return any(word.lower() in text.lower() for word in keywords)
-
 MONTHS_RU = {
     "января": 1, "февраля": 2, "марта": 3, "апреля": 4,
     "мая": 5, "июня": 6, "июля": 7, "августа": 8,
     "сентября": 9, "октября": 10, "ноября": 11, "декабря": 12
 }
 
-def format_date(date_str):
+def parse_date(date_str, year):
     """
-    Преобразует дату из формата '6 Апреля, 14:55' в формат '06.04.25 14:55'.
+    Преобразует дату из формата '6 Апреля, 14:55' в datetime года year.
     """
     try:
         if not date_str:
@@ -47,53 +47,71 @@ def format_date(date_str):
         if not month:
             return None
 
-        year = datetime.now().year % 100
-        formatted_date = f"{int(day):02}.{month:02}.{year:02} {time_part}"
-        return formatted_date
+        hour, minute = time_part.split(":")
+        return datetime(year, month, int(day), int(hour), int(minute))
     except Exception as e:
-        print(f"Ошибка при форматировании даты '{date_str}': {e}")
+        print(f"Ошибка при разборе даты '{date_str}': {e}")
         return None
 
-async def fetch_mtv_news():
+def parse_mtv_feed(content, backend=None):
+    """
+    Разбирает ленту мтв.онлайн: заголовок, ссылка, краткое описание и дата
+    каждой новости. Дата в ленте без года, поэтому возвращается текстом —
+    год подставляет fetch_mtv_news по текущим часам event loop.
+    """
+    # Описание и дата лежат в соседних блоках, поэтому страница разбирается целиком
+    roots = parse_html(content, backend=backend)
+    entries = []
+
+    for item in roots[0].select('div.item-title') if roots else []:
+        title_tag = item.select_one('h2')
+        title = title_tag.text if title_tag else ""
+
+        link_tag = item.select_one('a[href]')
+        if not link_tag:
+            continue
+        relative_link = link_tag.get('href')
+        absolute_link = urljoin(base_url, relative_link)
+        clickable_link = make_clickable_url(absolute_link)
+
+        description = ""
+        summary_block = item.find_next_sibling('p.short')
+        if summary_block:
+            description = summary_block.text
+
+        date = None
+        summary_block = item.find_next_sibling('div.summary')
+        if summary_block:
+            date_tag = summary_block.select_one('span.dt')
+            if date_tag:
+                date = date_tag.text.split('|')[0].strip()
+
+        entries.append({
+            "title": title,
+            "link": clickable_link,
+            "description": description,
+            "date": date
+        })
+
+    return entries
+
+async def fetch_mtv_news(session=None):
     """Асинхронно парсит новости с сайта и фильтрует их по ключевым словам"""
     news_list = []
+    session = session or get_session()
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get('https://xn--b1ats.xn--80asehdb/feed', ssl=False) as response:
-                response.raise_for_status()
-                soup = BeautifulSoup(await response.text(), 'html.parser')
-
-                for item in soup.find_all('div', class_='item-title'):
-                    title_tag = item.find('h2')
-                    title = title_tag.text.strip() if title_tag else ""
-
-                    link_tag = item.find('a', href=True)
-                    if not link_tag:
-                        continue
-                    relative_link = link_tag['href']
-                    absolute_link = urljoin(base_url, relative_link)
-                    clickable_link = make_clickable_url(absolute_link)
-
-                    description = ""
-                    summary_block = item.find_next_sibling('p', class_='short')
-                    if summary_block:
-                        description = summary_block.text.strip()
-
-                    date = None
-                    summary_block = item.find_next_sibling('div', class_='summary')
-                    if summary_block:
-                        date_tag = summary_block.find('span', class_='dt')
-                        if date_tag:
-                            raw_date = date_tag.text.strip().split('|')[0].strip()
-                            date = format_date(raw_date)
-
-                    full_text = f"{title} {description}"
-                    if contains_keywords(full_text, KEYWORDS) and not contains_keywords(full_text, EXCLUDED_KEYWORDS):
-                        news_list.append({
-                            "title": title,
-                            "link": clickable_link,
-                            "date": date
-                        })
+        # Лента разбирается заново, только если она изменилась с прошлого запроса
+        entries = await fetch_parsed(session, 'https://xn--b1ats.xn--80asehdb/feed', parse_mtv_feed, ssl=False)
+        year = now().year
+
+        for entry in entries:
+            date = parse_date(entry["date"], year)
+            if date is None:
+                print(f"❗️ Не удалось определить дату для: {entry['title']}")
+                continue
+
+            if is_relevant(entry["title"], entry["description"]):
+                news_list.append(NewsItem.create(SOURCE_ID, entry["title"], entry["link"], date))
 
     except Exception as e:
         print(f"❗️ Ошибка при парсинге: {e}")
@@ -109,18 +127,21 @@ def display_news(news_list):
 
     seen_links = set()
     for news in news_list:
-        if news['link'] not in seen_links:
-            seen_links.add(news['link'])
+        if news.link not in seen_links:
+            seen_links.add(news.link)
             print(
-                f"📢 Заголовок: {news['title']}\n"
-                f"🔗 Ссылка: {news['link']}\n"
-                f"📅 Дата публикации: {news['date']}\n"
+                f"📢 Заголовок: {news.title}\n"
+                f"🔗 Ссылка: {news.link}\n"
+                f"📅 Дата публикации: {news.format_date()}\n"
                 f"{'-' * 50}"
             )
 
 async def main():
     """Основная функция для получения и вывода новостей"""
-    news = await fetch_mtv_news()
+    news, cut = await run_with_budget(SOURCE_ID, fetch_mtv_news)
+    await close_session()
+    if cut:
+        print("⏱ Сбор прерван по сроку, результат неполный")
     display_news(news)
 
 if __name__ == "__main__":
@@ -1,62 +1,74 @@
-import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
 from email.utils import parsedate_tz, mktime_tz
 import feedparser  # Импортируем feedparser
-from config import KEYWORDS, EXCLUDED_KEYWORDS
+from keyword_filter import is_relevant
+from news_item import NewsItem, cutoff
+from http_cache import fetch_parsed
+from budget import run_with_budget
+from http_client import get_session, close_session
 
-async def fetch_riac34_news():
+SOURCE_ID = "riac34"
+
+
+def parse_riac34_feed(feed_content):
+    """
+    Разбирает RSS-ленту riac34.ru.
+    Возвращает список новостей с заголовком, ссылкой, описанием и временем
+    публикации (Unix-время) в порядке ленты.
+    """
+    # Парсим RSS-ленту с помощью feedparser
+    feed = feedparser.parse(feed_content)
+    entries = []
+
+    for entry in feed.entries:
+        title = entry.title
+        link = entry.link
+        description = entry.description if hasattr(entry, 'description') else ""
+        pub_date = entry.published if hasattr(entry, 'published') else None
+
+        if not pub_date:
+            print(f"❗️ Ошибка: отсутствует дата публикации для новости '{title}'.")
+            continue
+
+        pub_date = pub_date.replace(",", "")
+        parsed_date = parsedate_tz(pub_date)
+
+        if not parsed_date:
+            print(f"❗️ Ошибка преобразования даты: {pub_date}")
+            continue
+
+        entries.append({
+            "title": title,
+            "link": link,
+            "description": description,
+            "published": mktime_tz(parsed_date),
+        })
+
+    return entries
+
+
+async def fetch_riac34_news(session=None):
     """Асинхронно парсит новости с riac34.ru и возвращает список подходящих новостей."""
     rss_url = 'https://riac34.ru/rss/'
     news_list = []
+    session = session or get_session()
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(rss_url, ssl=False) as response:
-                response.raise_for_status()
-                feed_content = await response.text()
-
-                # Парсим RSS-ленту с помощью feedparser
-                feed = feedparser.parse(feed_content)
-
-                if len(feed.entries) == 0:
-                    print("❗️ Не удалось найти новости.")
-                    return []
-
-                now = datetime.now()
-
-                for entry in feed.entries:
-                    title = entry.title
-                    link = entry.link
-                    description = entry.description if hasattr(entry, 'description') else ""
-                    pub_date = entry.published if hasattr(entry, 'published') else None
-
-                    if not pub_date:
-                        print(f"❗️ Ошибка: отсутствует дата публикации для новости '{title}'.")
-                        continue
-
-                    pub_date = pub_date.replace(",", "")
-                    parsed_date = parsedate_tz(pub_date)
-
-                    if parsed_date:
-                        pub_date_obj = datetime.fromtimestamp(mktime_tz(parsed_date))
-                        if now - pub_date_obj > timedelta(days=1):
-                            continue  # Пропускаем новости старше 24 часов
-
-                        formatted_date = pub_date_obj.strftime("%d.%m.%y %H:%M")
-
-                        if (
-                            any(keyword.lower() in title.lower() or keyword.lower() in description.lower() for keyword in KEYWORDS)
-                            and not any(excluded.lower() in title.lower() or excluded.lower() in description.lower() for excluded in EXCLUDED_KEYWORDS)
-                        ):
-                            news_list.append({
-                                "title": title,
-                                "link": link,
-                                "date": formatted_date
-                            })
-                    else:
-                        print(f"❗️ Ошибка преобразования даты: {pub_date}")
+        # Лента разбирается заново, только если она изменилась с прошлого запроса
+        entries = await fetch_parsed(session, rss_url, parse_riac34_feed, ssl=False)
+
+        if len(entries) == 0:
+            print("❗️ Не удалось найти новости.")
+            return []
+
+        threshold = cutoff()
+
+        for entry in entries:
+            if entry["published"] < threshold:
+                continue  # Пропускаем новости старше 24 часов
+
+            if is_relevant(entry["title"], entry["description"]):
+                news_list.append(NewsItem.create(SOURCE_ID, entry["title"], entry["link"], entry["published"]))
 
     except Exception as e:
         print(f"❗️ Ошибка при парсинге: {e}")
@@ -70,13 +82,16 @@ async def fetch_riac34_news():
 
 async def main():
     """Основная функция для получения и вывода новостей."""
-    news = await fetch_riac34_news()
+    news, cut = await run_with_budget(SOURCE_ID, fetch_riac34_news)
+    await close_session()
+    if cut:
+        print("⏱ Сбор прерван по сроку, результат неполный")
 
     # Выводим новости, если они есть
     for item in news:
-        print(f"📢 Заголовок: {item['title']}\n"
-              f"🔗 Ссылка: {item['link']}\n"
-              f"📅 Дата публикации: {item['date']}\n"
+        print(f"📢 Заголовок: {item.title}\n"
+              f"🔗 Ссылка: {item.link}\n"
+              f"📅 Дата публикации: {item.format_date()}\n"
               f"{'-' * 50}")
 
 if __name__ == "__main__":
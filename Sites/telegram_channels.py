@@ -0,0 +1,225 @@
+"""
+Каналы Telegram из config.TELEGRAM_CHANNELS через Telethon.
+
+Все каналы читаются одновременно одним клиентом. Для каждого канала
+cursor_store хранит курсор — id последнего увиденного сообщения — и уже
+отобранные новости, поэтому каждый сбор запрашивает только сообщения новее
+курсора (min_id), а результат по-прежнему охватывает сутки. Сообщения
+читаются страницами по FETCH_LIMIT от новых к старым (offset_id) до курсора
+или границы суток. Если и MAX_PAGES страниц не хватило, курсор не
+сдвигается, а в состоянии канала сохраняется, где чтение остановилось
+(resume) и докуда сообщения уже прочитаны (top). Следующий сбор сначала
+дочитывает пропуск от resume к курсору, затем читает сообщения новее top;
+курсор сдвигается, когда пропуск закрыт.
+
+Клиент подключается при первом сборе и переиспользуется следующими. Сессия
+Telethon хранится в DATA_DIR; войти в аккаунт (код из Telegram) нужно один
+раз, запустив модуль из корня репозитория:
+
+    python -m Sites.telegram_channels
+
+Для проверок вместо настоящего клиента подставляется объект с методом
+iter_messages(channel, min_id=0, offset_id=0, limit=None) — см. set_client
+и benchmarks/fake_telegram.py.
+"""
+import asyncio
+import logging
+
+import metrics
+from budget import run_with_budget
+from config import API_HASH, API_ID, DATA_DIR, PHONE, TELEGRAM_CHANNELS
+from cursor_store import cursor_store
+from keyword_filter import is_relevant
+from news_item import NewsItem, cutoff, to_timestamp
+
+SOURCE_ID = "telegram"
+SESSION_PATH = DATA_DIR / "telegram"
+FETCH_LIMIT = 100       # Сообщений канала в одном запросе
+MAX_PAGES = 10          # Не больше стольких запросов на канал за один сбор
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_loop = None
+
+
+def set_client(client):
+    """Подменяет клиент Telegram (например, фейковым для проверок); None — настоящий клиент."""
+    global _client, _client_loop
+    _client = client
+    _client_loop = None
+
+
+def _create_client():
+    from telethon import TelegramClient
+
+    SESSION_PATH.parent.mkdir(parents=True, exist_ok=True)
+    return TelegramClient(str(SESSION_PATH), int(API_ID), API_HASH)
+
+
+async def get_client():
+    """
+    Общий клиент Telegram: подключается при первом вызове, затем
+    переиспользуется. Возвращает None, если ключи API не заданы, Telegram
+    недоступен или вход в аккаунт ещё не выполнен.
+    """
+    global _client, _client_loop
+    if _client is not None and _client_loop is None:
+        return _client  # Подставленный клиент
+
+    loop = asyncio.get_running_loop()
+    if _client is not None and _client_loop is loop and _client.is_connected():
+        return _client
+
+    if not (API_ID and API_HASH):
+        logger.warning("TELEGRAM_API_ID и TELEGRAM_API_HASH не заданы, каналы Telegram не читаются")
+        return None
+
+    # Клиент привязан к event loop, в котором подключился
+    client = _client if _client is not None and _client_loop is loop else _create_client()
+    try:
+        await client.connect()
+    except OSError as e:
+        logger.error(f"Не удалось подключиться к Telegram: {e}")
+        metrics.record_error("connection")
+        return None
+    if not await client.is_user_authorized():
+        await client.disconnect()
+        logger.error("Нет входа в Telegram: выполните python -m Sites.telegram_channels")
+        return None
+
+    _client, _client_loop = client, loop
+    return client
+
+
+async def close_client():
+    """Отключает общий клиент Telegram."""
+    global _client, _client_loop
+    if _client is not None and _client_loop is not None:
+        await _client.disconnect()
+        _client = _client_loop = None
+
+
+def first_line_title(text):
+    """Заголовок сообщения — его первая строка."""
+    return text.split("\n")[0] if "\n" in text else text
+
+
+async def read_messages(client, channel, min_id, threshold, offset_id=0):
+    """
+    Сообщения канала новее min_id, старее offset_id (0 — начиная с самого
+    нового) и не старше threshold, от новых к старым, страницами по
+    FETCH_LIMIT. Возвращает (сообщения, id самого нового и самого старого
+    прочитанного сообщения, прочитано ли всё до min_id или границы суток).
+    """
+    messages = []
+    newest = min_id
+    for _ in range(MAX_PAGES):
+        page = 0
+        async for message in client.iter_messages(channel, min_id=min_id, offset_id=offset_id, limit=FETCH_LIMIT):
+            page += 1
+            newest = max(newest, message.id)
+            offset_id = message.id
+            if to_timestamp(message.date) < threshold:
+                return messages, newest, offset_id, True
+            messages.append(message)
+        if page < FETCH_LIMIT:
+            return messages, newest, offset_id, True
+    return messages, newest, offset_id, False
+
+
+async def fetch_channel(client, channel, threshold, store=None):
+    """
+    Новости канала за сутки: сохранённые с прошлых сборов и подходящие
+    сообщения новее курсора. Курсор сдвигается только после чтения всех
+    сообщений до него; пропуск, не дочитанный за сбор, дочитывают следующие.
+    """
+    store = store or cursor_store
+    key = f"{SOURCE_ID}:{channel}"
+    cursor, kept, state = store.get(key)
+    if cursor is None:
+        state = {}  # Курсора нет или сменились ключевые слова: канал читается заново
+    kept = [item for item in kept if item.timestamp >= threshold]
+
+    base = cursor or 0
+    top = state.get("top", base)
+    messages, resume, gap_complete = [], None, True
+    if "resume" in state:
+        # Пропуск с прошлого сбора: между курсором и местом, где чтение остановилось
+        messages, _, resume, gap_complete = await read_messages(client, channel, base, threshold, state["resume"])
+    new, newest, oldest, complete = await read_messages(client, channel, top, threshold)
+    messages = new + messages
+
+    if complete and gap_complete:
+        next_cursor, next_state = newest, {}
+    elif complete:
+        next_cursor, next_state = base, {"resume": resume, "top": newest}
+    elif gap_complete:
+        next_cursor, next_state = top, {"resume": oldest, "top": newest}
+    else:
+        # Сообщения новее top прочитает заново следующий сбор, сначала закрывается старый пропуск
+        next_cursor, next_state = base, {"resume": resume, "top": top}
+    if next_state:
+        logger.warning(
+            f"Канал {channel}: за сбор прочитано {len(messages)} сообщений, "
+            f"сообщения с id {next_cursor + 1}–{next_state['resume'] - 1} будут дочитаны следующим сбором"
+        )
+
+    fresh = []
+    for message in messages:
+        text = (getattr(message, "message", None) or "").strip()
+        if text and is_relevant(text):
+            link = f"https://t.me/{channel}/{message.id}"
+            fresh.append(NewsItem.create(SOURCE_ID, first_line_title(text), link, message.date))
+
+    metrics.count_candidates(len(messages))
+    links = {item.link for item in fresh}
+    news = fresh + [item for item in kept if item.link not in links]
+    if next_cursor != cursor or next_state != state or fresh:
+        store.set(key, next_cursor, news, next_state)
+    return news
+
+
+async def fetch_telegram_news(session=None, client=None, channels=None):
+    """Новости каналов config.TELEGRAM_CHANNELS за сутки; session не используется."""
+    client = client or await get_client()
+    if client is None:
+        return []
+
+    channels = TELEGRAM_CHANNELS if channels is None else channels
+    threshold = cutoff()
+
+    async def fetch(channel):
+        try:
+            return await fetch_channel(client, channel, threshold)
+        except Exception as e:
+            logger.error(f"Ошибка чтения канала {channel}: {e}")
+            metrics.record_error("api")
+            return []
+
+    results = await asyncio.gather(*(fetch(channel) for channel in channels))
+    return [item for news in results for item in news]
+
+
+async def main():
+    """Вход в аккаунт (при первом запуске) и вывод новостей каналов."""
+    client = _create_client()
+    await client.start(phone=PHONE)
+    set_client(client)
+
+    try:
+        news, cut = await run_with_budget(SOURCE_ID, fetch_telegram_news)
+    finally:
+        await client.disconnect()
+    if cut:
+        print("⏱ Сбор прерван по сроку, результат неполный")
+
+    for item in news:
+        print(f"📢 Заголовок: {item.title}\n"
+              f"🔗 Ссылка: {item.link}\n"
+              f"📅 Дата публикации: {item.format_date()}\n"
+              f"{'-' * 50}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,115 +1,114 @@
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-from urllib.parse import urljoin
-from config import KEYWORDS, EXCLUDED_KEYWORDS
+import re
+from datetime import timedelta
+from keyword_filter import is_relevant
+from news_item import NewsItem, day_start, now
+from candidates import collect_candidates
+from html_parse import parse_html
+from article_date import fetch_published, meta_published, time_datetime
+from date_cache import cached
+from http_cache import fetch_parsed
+from budget import run_with_budget
+from http_client import get_session, close_session, gather_by_host
+from seen_store import dedupe
+
+BASE_URL = "https://v1.ru/"  # Сайт V1.ru
+SOURCE_ID = "v1"
+
+# Ссылки на статьи вида https://v1.ru/text/incidents/2025/04/06/75312345/
+ARTICLE_URL = re.compile(
+    r"^https://(?:www\.)?v1\.ru/text/[\w-]+/(?P<year>\d{4})/(?P<month>\d{2})/(?P<day>\d{2})/\d+/?$"
+)
 
 
 def is_valid_news(title):
     """Проверяет новость: содержит ли ключевые слова и не содержит запрещённые слова"""
-    title_lower = title.lower()
-    return (
-            any(keyword.lower() in title_lower for keyword in KEYWORDS) and
-            not any(excluded.lower() in title_lower for excluded in EXCLUDED_KEYWORDS)
-    )
+    return is_relevant(title)
 
 
-async def fetch_news_datetime(session, news_url):
-    """Получает точное время публикации новости"""
-    try:
-        async with session.get(news_url, ssl=False) as response:
-            response.raise_for_status()
-            soup = BeautifulSoup(await response.text(), "lxml")
+def parse_listing(content, backend=None):
+    """Отбирает ссылки на подходящие статьи с главной страницы V1.ru."""
+    # Дата публикации ищется в родителях ссылки, поэтому страница разбирается целиком
+    roots = parse_html(content, backend=backend)
+    anchors = roots[0].select("a[href]") if roots else []
+    return collect_candidates(anchors, BASE_URL, ARTICLE_URL, is_valid_news)
 
-            # Ищем мета-тег с временем публикации
-            meta_time = soup.find("meta", {"property": "article:published_time"})
-            if meta_time and meta_time.get("content"):
-                return datetime.fromisoformat(meta_time["content"][:19])
 
-            # Если мета-тег отсутствует, ищем тег <time>
-            date_tag = soup.find("time")
-            if date_tag and date_tag.get("datetime"):
-                return datetime.fromisoformat(date_tag["datetime"][:19])
-    except Exception as e:
-        print(f"Ошибка при получении даты публикации: {e}")
-
-    return None
+async def fetch_news_datetime(session, news_url):
+    """
+    Получает точное время публикации новости. Ошибки загрузки не
+    перехватываются: их обрабатывает date_cache.cached, не кэшируя.
+    """
+    # Мета-тег с временем публикации в <head>, иначе тег <time>;
+    # страница читается только до первого найденного
+    return await fetch_published(session, news_url, [meta_published, time_datetime], ssl=False)
 
 
-async def fetch_v1_news():
+async def fetch_v1_news(session=None):
     """Парсит новости с сайта V1.ru за последние сутки."""
-    base_url = "https://v1.ru/"  # Сайт V1.ru
     news_list = []
-    yesterday = datetime.now().date() - timedelta(days=1)
-    headers = {"User-Agent": "Mozilla/5.0"}
-    timeout = aiohttp.ClientTimeout(total=60)
-
-    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
-        try:
-            # Формируем URL для запроса новостей за вчерашний день
-            url = f"{base_url}?dateFrom={yesterday.strftime('%d.%m.%Y')}"
-            async with session.get(url, ssl=False) as response:
-                response.raise_for_status()
-                soup = BeautifulSoup(await response.text(), "lxml")
-
-                # Находим все ссылки на новости
-                articles = soup.find_all("a", href=True)
-                for article in articles:
-                    title = article.text.strip()
-                    link = urljoin(base_url, article["href"])
-
-                    # Пропускаем недопустимые ссылки
-                    if not link.startswith(base_url):
-                        continue
-
-                    # Получаем точное время публикации новости
-                    news_date = await fetch_news_datetime(session, link)
-                    if (
-                            news_date and
-                            news_date.date() >= yesterday and
-                            is_valid_news(title)
-                    ):
-                        # Проверяем уникальность заголовка
-                        if not any(news['title'] == title for news in news_list):
-                            news_list.append({
-                                "title": title,
-                                "link": link,
-                                "date": news_date
-                            })
-        except aiohttp.ClientError as e:
-            print(f"Ошибка при запросе к сайту: {e}")
+    yesterday = now().date() - timedelta(days=1)
 
-    # Сортируем новости по времени публикации (от новых к старым)
-    news_list.sort(key=lambda x: x["date"], reverse=True)
+    session = session or get_session()
+
+    try:
+        # Формируем URL для запроса новостей за вчерашний день
+        url = f"{BASE_URL}?dateFrom={yesterday.strftime('%d.%m.%Y')}"
+
+        # Отбираем ссылки на статьи до загрузки страниц; если страница не
+        # изменилась с прошлого запроса, берём прежний результат разбора
+        candidates = await fetch_parsed(session, url, parse_listing, ssl=False)
+
+        # Дата есть в URL: старые статьи отбрасываем без запроса
+        candidates = [c for c in candidates if c["day"] is None or c["day"] >= yesterday]
+
+        # Точное время публикации загружаем только там, где его нет в разметке списка
+        links_to_fetch = [c["link"] for c in candidates if c["date"] is None]
+        fetched_dates = await gather_by_host(
+            links_to_fetch,
+            cached(lambda link: fetch_news_datetime(session, link)),
+        )
+        fetched_dates = dict(zip(links_to_fetch, fetched_dates))
+
+        threshold = day_start(days_ago=1)
+        for candidate in candidates:
+            news_date = candidate["date"] or fetched_dates.get(candidate["link"])
+            if not news_date:
+                continue
+            news = NewsItem.create(SOURCE_ID, candidate["title"], candidate["link"], news_date)
+            if news.timestamp >= threshold:
+                news_list.append(news)
+    except aiohttp.ClientError as e:
+        print(f"Ошибка при запросе к сайту: {e}")
+
+    # Проверяем уникальность заголовка и ссылки
+    news_list = dedupe(news_list)
 
-    # Форматируем дату для вывода
-    for news in news_list:
-        news["date"] = news["date"].strftime("%d.%m.%y %H:%M")
+    # Сортируем новости по времени публикации (от новых к старым)
+    news_list.sort(key=lambda news: news.timestamp, reverse=True)
 
     return news_list
 
 
 async def main():
     """Основная функция для вывода новостей."""
-    v1_news = await fetch_v1_news()
+    v1_news, cut = await run_with_budget(SOURCE_ID, fetch_v1_news)
+    await close_session()
+    if cut:
+        print("⏱ Сбор прерван по сроку, результат неполный")
     if not v1_news:
         print(f"❗️ Для сайта https://v1.ru нет новых новостей, соответствующих заданным критериям!")
         print(f"{'-' * 50}")
         return
 
-    seen_links = set()  # Множество для хранения уникальных ссылок
-    seen_titles = set()  # Множество для хранения уникальных заголовков
     for news in v1_news:
-        if news['link'] not in seen_links and news['title'] not in seen_titles:
-            seen_links.add(news['link'])
-            seen_titles.add(news['title'])
-            print(
-                f"📢 Заголовок: {news['title']}\n"
-                f"🔗 Ссылка: {news['link']}\n"
-                f"📅 Дата публикации: {news['date']}\n"
-                f"{'-' * 50}"
-            )
+        print(
+            f"📢 Заголовок: {news.title}\n"
+            f"🔗 Ссылка: {news.link}\n"
+            f"📅 Дата публикации: {news.format_date()}\n"
+            f"{'-' * 50}"
+        )
 
 
 if __name__ == "__main__":
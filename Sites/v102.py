@@ -1,71 +1,83 @@
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+from datetime import datetime
 from urllib.parse import urljoin
-from config import KEYWORDS, EXCLUDED_KEYWORDS
+from keyword_filter import is_relevant
+from news_item import NewsItem, cutoff
+from article_date import fetch_published
+from date_cache import cached
+from html_parse import parse_html
+from http_cache import fetch_parsed
+from budget import run_with_budget
+from http_client import get_session, close_session, gather_by_host
 
 BASE_URL = "https://v102.ru/"
+SOURCE_ID = "v102"
 
 def is_valid_news(title):
     """Проверяет новость: содержит ли ключевые слова и не содержит запрещённые слова"""
-    title_lower = title.lower()
-    return any(keyword.lower() in title_lower for keyword in KEYWORDS) and not any(
-        excluded.lower() in title_lower for excluded in EXCLUDED_KEYWORDS
-    )
+    return is_relevant(title)
 
-async def fetch_news_datetime(session, news_url):
-    """Получает точное время публикации новости с V102.ru"""
-    try:
-        async with session.get(news_url, ssl=False) as response:
-            response.raise_for_status()
-            soup = BeautifulSoup(await response.text(), "lxml")
-
-            # Ищем дату в <span class="mobile-date">
-            date_span = soup.find("span", class_="mobile-date")
-            if date_span:
-                raw_date = date_span.text.strip()  # Например, "25.03.2025 20:29"
-                news_time = datetime.strptime(raw_date, "%d.%m.%Y %H:%M")  # Преобразуем в datetime
-                return news_time
-    except Exception as e:
-        print(f"Ошибка при получении даты: {e}")
+def parse_listing(content, backend=None):
+    """Возвращает пары (заголовок, ссылка) подходящих новостей со страницы V102.ru"""
+    # Поиск ссылок на новости: разбираются только теги <a href>
+    candidates = []
+    for article in parse_html(content, scope="a[href]", backend=backend):
+        link = urljoin(BASE_URL, article.get("href"))
+        title = article.text
+
+        if title and is_valid_news(title):
+            candidates.append((title, link))
+    return candidates
+
+def mobile_date(element):
+    """Дата в <span class="mobile-date">"""
+    if element.tag == "span" and "mobile-date" in (element.get("class") or "").split():
+        raw_date = "".join(element.itertext()).strip()  # Например, "25.03.2025 20:29"
+        return datetime.strptime(raw_date, "%d.%m.%Y %H:%M")  # Преобразуем в datetime
     return None
 
-async def fetch_v102_news():
+async def fetch_news_datetime(session, news_url):
+    """
+    Получает точное время публикации новости с V102.ru. Ошибки загрузки не
+    перехватываются: их обрабатывает date_cache.cached, не кэшируя.
+    """
+    # Страница читается только до блока с датой
+    return await fetch_published(session, news_url, [mobile_date], ssl=False)
+
+async def fetch_v102_news(session=None):
     """Парсинг новостей с V102.ru"""
     news_list = []
-    yesterday = datetime.now() - timedelta(days=1)
-    headers = {"User-Agent": "Mozilla/5.0"}
-    timeout = aiohttp.ClientTimeout(total=60)
-
-    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
-        try:
-            async with session.get(BASE_URL, ssl=False) as response:
-                response.raise_for_status()
-                soup = BeautifulSoup(await response.text(), "lxml")
-
-                # Поиск ссылок на новости
-                articles = soup.find_all("a", href=True)
-
-                for article in articles:
-                    link = urljoin(BASE_URL, article["href"])
-                    title = article.get_text(strip=True)
-
-                    if title and is_valid_news(title):
-                        news_date = await fetch_news_datetime(session, link)
-                        if news_date and news_date >= yesterday:
-                            news_list.append({
-                                "title": title,
-                                "link": link,
-                                "date": news_date.strftime("%d.%m.%y %H:%M")
-                            })
-        except aiohttp.ClientError as e:
-            print(f"Ошибка при запросе: {e}")
+    threshold = cutoff()
+
+    session = session or get_session()
+
+    try:
+        # Страница разбирается заново, только если она изменилась с прошлого запроса
+        candidates = await fetch_parsed(session, BASE_URL, parse_listing, ssl=False)
+
+        # Получаем время публикации всех подходящих новостей параллельно
+        news_dates = await gather_by_host(
+            [link for _, link in candidates],
+            cached(lambda link: fetch_news_datetime(session, link)),
+        )
+
+        for (title, link), news_date in zip(candidates, news_dates):
+            if not news_date:
+                continue
+            news = NewsItem.create(SOURCE_ID, title, link, news_date)
+            if news.timestamp >= threshold:
+                news_list.append(news)
+    except aiohttp.ClientError as e:
+        print(f"Ошибка при запросе: {e}")
     return news_list
 
 async def main():
     """Основная функция"""
-    v102_news = await fetch_v102_news()
+    v102_news, cut = await run_with_budget(SOURCE_ID, fetch_v102_news)
+    await close_session()
+    if cut:
+        print("⏱ Сбор прерван по сроку, результат неполный")
 
     if not v102_news:
         print(f"❗️ Для сайта {BASE_URL} нет новых новостей, соответствующих заданным критериям!")
@@ -76,13 +88,13 @@ async def main():
     seen_titles = set()  # Множество для хранения уникальных заголовков
 
     for news in v102_news:
-        if news['link'] not in seen_links and news['title'] not in seen_titles:
-            seen_links.add(news['link'])  # Добавляем ссылку в множество
-            seen_titles.add(news['title'])  # Добавляем заголовок в множество
+        if news.link not in seen_links and news.title not in seen_titles:
+            seen_links.add(news.link)  # Добавляем ссылку в множество
+            seen_titles.add(news.title)  # Добавляем заголовок в множество
             print(
-                f"📢 Заголовок: {news['title']}\n"
-                f"🔗 Ссылка: {news['link']}\n"
-                f"📅 Дата публикации: {news['date']}\n"
+                f"📢 Заголовок: {news.title}\n"
+                f"🔗 Ссылка: {news.link}\n"
+                f"📅 Дата публикации: {news.format_date()}\n"
                 f"{'-' * 50}"
             )
 
@@ -1,74 +1,82 @@
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
 from urllib.parse import urljoin
-from config import KEYWORDS, EXCLUDED_KEYWORDS
+from keyword_filter import is_relevant
+from news_item import NewsItem, day_start
+from article_date import fetch_published, meta_published
+from date_cache import cached
+from html_parse import parse_html
+from http_cache import fetch_parsed
+from budget import run_with_budget
+from http_client import get_session, close_session, gather_by_host
 import pytz
 
 async def fetch_news_datetime(session, news_url):
-    """Получает точное время публикации новости в часовом поясе Волгограда"""
-    try:
-        async with session.get(news_url, ssl=False) as response:
-            response.raise_for_status()
-            soup = BeautifulSoup(await response.text(), "lxml")
-            meta_time = soup.find("meta", {"property": "article:published_time"})
-            if meta_time and meta_time.get("content"):
-                news_time = datetime.fromisoformat(meta_time["content"][:19])  # Создаем объект datetime без учета часового пояса
-                utc_time = news_time.replace(tzinfo=pytz.utc)  # Присваиваем UTC
-                volgograd_time = utc_time.astimezone(pytz.timezone("Europe/Volgograd"))  # Конвертируем в Волгоградское время
-                return volgograd_time
-    except Exception as e:
-        print(f"Ошибка при получении даты: {e}")
+    """
+    Получает точное время публикации новости в часовом поясе Волгограда.
+    Ошибки загрузки не перехватываются: их обрабатывает date_cache.cached, не кэшируя.
+    """
+    # Страница читается только до мета-тега в <head>
+    news_time = await fetch_published(session, news_url, [meta_published], ssl=False)  # datetime без учета часового пояса
+    if news_time:
+        utc_time = news_time.replace(tzinfo=pytz.utc)  # Присваиваем UTC
+        volgograd_time = utc_time.astimezone(pytz.timezone("Europe/Volgograd"))  # Конвертируем в Волгоградское время
+        return volgograd_time
     return None
 
 
 BASE_URL = "https://www.volgograd.kp.ru/online/"  # Раздел с новостями
+SOURCE_ID = "kp"
 
 def is_valid_news(title):
     """Проверяет новость: содержит ли ключевые слова и не содержит запрещённые слова"""
-    title_lower = title.lower()
-    return any(keyword.lower() in title_lower for keyword in KEYWORDS) and not any(
-        excluded.lower() in title_lower for excluded in EXCLUDED_KEYWORDS)
+    return is_relevant(title)
+
+def parse_listing(content, backend=None):
+    """Возвращает пары (заголовок, ссылка) подходящих новостей со страницы КП-Волгоград"""
+    # Универсальный поиск ссылок на новости: разбираются только теги <a href>
+    candidates = []
+    for article in parse_html(content, scope="a[href]", backend=backend):
+        link = urljoin(BASE_URL, article.get("href"))
+        title = article.text
 
-async def fetch_kp_news():
+        if title and is_valid_news(title):
+            candidates.append((title, link))
+    return candidates
+
+async def fetch_kp_news(session=None):
     """Парсинг новостей с сайта КП-Волгоград"""
     news_list = []
-    yesterday = datetime.now().date() - timedelta(days=1)
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept-Language": "ru-RU,ru;q=0.9",
-    }
-    timeout = aiohttp.ClientTimeout(total=60)
-
-    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
-        try:
-            async with session.get(BASE_URL, ssl=False) as response:
-                response.raise_for_status()
-                soup = BeautifulSoup(await response.text(), "lxml")
-
-                # Универсальный поиск ссылок на новости
-                articles = soup.find_all("a", href=True)
-
-                for article in articles:
-                    link = urljoin(BASE_URL, article["href"])
-                    title = article.get_text(strip=True)
-
-                    if title and is_valid_news(title):
-                        news_date = await fetch_news_datetime(session, link)
-                        if news_date and news_date.date() >= yesterday:
-                            news_list.append({
-                                "title": title,
-                                "link": link,
-                                "date": news_date.strftime("%d.%m.%y %H:%M")
-                            })
-        except aiohttp.ClientError as e:
-            print(f"Ошибка при запросе: {e}")
+    threshold = day_start(days_ago=1)
+
+    session = session or get_session()
+
+    try:
+        # Страница разбирается заново, только если она изменилась с прошлого запроса
+        candidates = await fetch_parsed(session, BASE_URL, parse_listing, ssl=False)
+
+        # Получаем время публикации всех подходящих новостей параллельно
+        news_dates = await gather_by_host(
+            [link for _, link in candidates],
+            cached(lambda link: fetch_news_datetime(session, link)),
+        )
+
+        for (title, link), news_date in zip(candidates, news_dates):
+            if not news_date:
+                continue
+            news = NewsItem.create(SOURCE_ID, title, link, news_date)
+            if news.timestamp >= threshold:
+                news_list.append(news)
+    except aiohttp.ClientError as e:
+        print(f"Ошибка при запросе: {e}")
     return news_list
 
 async def main():
     """Основная функция"""
-    kp_news = await fetch_kp_news()
+    kp_news, cut = await run_with_budget(SOURCE_ID, fetch_kp_news)
+    await close_session()
+    if cut:
+        print("⏱ Сбор прерван по сроку, результат неполный")
 
     if not kp_news:
         print(f"❗️ Для сайта {BASE_URL} нет новых новостей, соответствующих заданным критериям!")
@@ -79,13 +87,13 @@ async def main():
     seen_titles = set()  # Множество для хранения уникальных заголовков
 
     for news in kp_news:
-        if news['link'] not in seen_links and news['title'] not in seen_titles:
-            seen_links.add(news['link'])  # Добавляем ссылку в множество
-            seen_titles.add(news['title'])  # Добавляем заголовок в множество
+        if news.link not in seen_links and news.title not in seen_titles:
+            seen_links.add(news.link)  # Добавляем ссылку в множество
+            seen_titles.add(news.title)  # Добавляем заголовок в множество
             print(
-                f"📢 Заголовок: {news['title']}\n"
-                f"🔗 Ссылка: {news['link']}\n"
-                f"📅 Дата публикации: {news['date']}\n"
+                f"📢 Заголовок: {news.title}\n"
+                f"🔗 Ссылка: {news.link}\n"
+                f"📅 Дата публикации: {news.format_date()}\n"
                 f"{'-' * 50}"
             )
 
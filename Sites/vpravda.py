@@ -1,108 +1,90 @@
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-from urllib.parse import urljoin
-from config import KEYWORDS, EXCLUDED_KEYWORDS
+import re
+from datetime import timedelta
+from keyword_filter import is_relevant
+from news_item import NewsItem, day_start, now
+from candidates import collect_candidates
+from html_parse import parse_html
+from article_date import fetch_published, meta_published, time_datetime
+from date_cache import cached
+from http_cache import fetch_parsed
+from budget import run_with_budget
+from http_client import get_session, close_session, gather_by_host
+
+BASE_URL = "https://vpravda.ru/"
+SOURCE_ID = "vpravda"
+
+# Ссылки на статьи: раздел и «человекочитаемый» адрес или числовой id.
+# Служебные разделы (теги, авторы, поиск, пагинация) и сторонние сайты отсекаются.
+ARTICLE_URL = re.compile(
+    r"^https://(?:www\.)?vpravda\.ru/(?!(?:tags?|authors?|search|page|rubrics?)/)"
+    r"(?:[\w-]+/)+(?:[\w-]+-[\w-]+|\d+)/?$"
+)
 
 
 def is_valid_news(title):
     """
     Проверяет новость: содержит ли она ключевые слова и не содержит запрещённые слова.
     """
-    title_lower = title.lower()
-    return (
-            any(keyword.lower() in title_lower for keyword in KEYWORDS) and
-            not any(excluded.lower() in title_lower for excluded in EXCLUDED_KEYWORDS)
-    )
+    return is_relevant(title)
 
 
-def is_valid_link(link):
-    """
-    Проверяет, является ли ссылка допустимой для парсинга.
-    Исключает ссылки на сторонние ресурсы и мессенджеры.
-    """
-    invalid_protocols = ["tel:", "whatsapp:", "viber:", "tg:", "mailto:"]
-    invalid_domains = ["youtube.com", "youtu.be"]  # Добавьте другие домены, если нужно
-
-    if any(link.startswith(protocol) for protocol in invalid_protocols):
-        return False
-
-    if any(domain in link for domain in invalid_domains):
-        return False
-
-    return True
+def parse_listing(content, backend=None):
+    """Отбирает ссылки на подходящие статьи с главной страницы vpravda.ru."""
+    # Дата публикации ищется в родителях ссылки, поэтому страница разбирается целиком
+    roots = parse_html(content, backend=backend)
+    anchors = roots[0].select("a[href]") if roots else []
+    return collect_candidates(anchors, BASE_URL, ARTICLE_URL, is_valid_news)
 
 
 async def fetch_news_datetime(session, news_url):
     """
     Получает точное время публикации новости с помощью мета-тегов или тега <time>.
+    Ошибки загрузки не перехватываются: их обрабатывает date_cache.cached, не кэшируя.
     """
-    try:
-        async with session.get(news_url, ssl=False) as response:
-            response.raise_for_status()
-            soup = BeautifulSoup(await response.text(), "lxml")
+    # Мета-тег с временем публикации в <head>, иначе тег <time>;
+    # страница читается только до первого найденного
+    return await fetch_published(session, news_url, [meta_published, time_datetime], ssl=False)
 
-            # Ищем мета-тег с временем публикации
-            meta_time = soup.find("meta", {"property": "article:published_time"})
-            if meta_time and meta_time.get("content"):
-                return datetime.fromisoformat(meta_time["content"][:19])
-
-            # Если мета-тег отсутствует, ищем тег <time>
-            date_tag = soup.find("time")
-            if date_tag and date_tag.get("datetime"):
-                return datetime.fromisoformat(date_tag["datetime"][:19])
-    except Exception as e:
-        print(f"Ошибка при получении даты публикации: {e}")
-
-    return None
-
-async def fetch_vpravda_news():
+async def fetch_vpravda_news(session=None):
     """
     Парсит новости с сайта https://vpravda.ru/ за последние сутки.
     """
-    base_url = "https://vpravda.ru/"
     news_list = []
-    yesterday = datetime.now().date() - timedelta(days=1)
-    headers = {"User-Agent": "Mozilla/5.0"}
-    timeout = aiohttp.ClientTimeout(total=60)
-
-    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
-        try:
-            # Формируем URL для запроса новостей за вчерашний день
-            url = f"{base_url}?dateFrom={yesterday.strftime('%d.%m.%Y')}"
-            async with session.get(url, ssl=False) as response:
-                response.raise_for_status()
-                soup = BeautifulSoup(await response.text(), "lxml")
-
-                # Находим все ссылки на новости
-                articles = soup.find_all("a", href=True)
-                for article in articles:
-                    title = article.text.strip()
-                    link = urljoin(base_url, article["href"])
-
-                    # Пропускаем недопустимые ссылки
-                    if not is_valid_link(link):
-                        continue
-
-                    # Получаем точное время публикации новости
-                    news_date = await fetch_news_datetime(session, link)
-                    if (
-                            news_date and
-                            news_date.date() >= yesterday and
-                            is_valid_news(title)
-                    ):
-                        news_list.append({
-                            "title": title,
-                            "link": link,
-                            "date": news_date.strftime("%d.%m.%y %H:%M"),
-                            "datetime": news_date  # Сохраняем объект datetime для сортировки
-                        })
-        except aiohttp.ClientError as e:
-            print(f"Ошибка при запросе к сайту: {e}")
+    yesterday = now().date() - timedelta(days=1)
+
+    session = session or get_session()
+
+    try:
+        # Формируем URL для запроса новостей за вчерашний день
+        url = f"{BASE_URL}?dateFrom={yesterday.strftime('%d.%m.%Y')}"
+
+        # Отбираем ссылки на статьи до загрузки страниц; если страница не
+        # изменилась с прошлого запроса, берём прежний результат разбора
+        candidates = await fetch_parsed(session, url, parse_listing, ssl=False)
+
+        # Точное время публикации загружаем только там, где его нет в разметке списка
+        links_to_fetch = [c["link"] for c in candidates if c["date"] is None]
+        fetched_dates = await gather_by_host(
+            links_to_fetch,
+            cached(lambda link: fetch_news_datetime(session, link)),
+        )
+        fetched_dates = dict(zip(links_to_fetch, fetched_dates))
+
+        threshold = day_start(days_ago=1)
+        for candidate in candidates:
+            news_date = candidate["date"] or fetched_dates.get(candidate["link"])
+            if not news_date:
+                continue
+            news = NewsItem.create(SOURCE_ID, candidate["title"], candidate["link"], news_date)
+            if news.timestamp >= threshold:
+                news_list.append(news)
+    except aiohttp.ClientError as e:
+        print(f"Ошибка при запросе к сайту: {e}")
 
     # Сортируем новости по времени публикации (от новых к старым)
-    news_list.sort(key=lambda x: x["datetime"], reverse=True)
+    news_list.sort(key=lambda news: news.timestamp, reverse=True)
 
     return news_list
 
@@ -111,7 +93,10 @@ async def main():
     """
     Основная функция для вывода новостей.
     """
-    vpravda_news = await fetch_vpravda_news()
+    vpravda_news, cut = await run_with_budget(SOURCE_ID, fetch_vpravda_news)
+    await close_session()
+    if cut:
+        print("⏱ Сбор прерван по сроку, результат неполный")
 
     if not vpravda_news:
         print(f"❗️ Для сайта https://vpravda.ru/ нет новых новостей, соответствующих заданным критериям!")
@@ -122,13 +107,13 @@ async def main():
     seen_titles = set()  # Множество для хранения уникальных заголовков
 
     for news in vpravda_news:
-        if news['link'] not in seen_links and news['title'] not in seen_titles:
-            seen_links.add(news['link'])
-            seen_titles.add(news['title'])
+        if news.link not in seen_links and news.title not in seen_titles:
+            seen_links.add(news.link)
+            seen_titles.add(news.title)
             print(
-                f"📢 Заголовок: {news['title']}\n"
-                f"🔗 Ссылка: {news['link']}\n"
-                f"📅 Дата публикации: {news['date']}\n"
+                f"📢 Заголовок: {news.title}\n"
+                f"🔗 Ссылка: {news.link}\n"
+                f"📅 Дата публикации: {news.format_date()}\n"
                 f"{'-' * 50}"
             )
 
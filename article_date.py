@@ -0,0 +1,147 @@
+"""
+Потоковое извлечение даты публикации со страницы статьи.
+
+Дата публикации почти всегда лежит в <head> (мета-тег
+article:published_time) или в начале страницы (тег <time>), а статья
+целиком — это сотни килобайт HTML со встроенными скриптами. Поэтому
+страница читается порциями и сразу разбирается событийным парсером lxml
+(HTMLPullParser): как только один из признаков даты найден, чтение
+прекращается и соединение закрывается, а дерево всей страницы не строится.
+
+Признаки проверяются в порядке появления элементов на странице; если ни
+один не найден, вызывается запасной разбор полного HTML (fallback) в пуле
+разбора (parse_pool). Потоковый разбор остаётся в event loop: он занимает
+доли миллисекунды на страницу.
+"""
+import logging
+import time
+from datetime import datetime
+
+from lxml import etree
+
+import metrics
+import resilience
+import tracing
+from parse_pool import run_parse
+
+CHUNK_SIZE = 16 * 1024      # Размер порции чтения ответа, байт
+
+# Значения property мета-тегов с временем публикации
+PUBLISHED_PROPERTIES = ("article:published_time", "pubdate")
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractorStats:
+    """Счётчики загруженных байт и времени разбора с момента запуска."""
+
+    def __init__(self):
+        self.pages = 0
+        self.early_stops = 0    # Дата найдена до конца страницы
+        self.fallbacks = 0      # Понадобился разбор полного HTML
+        self.bytes_read = 0
+        self.parse_time = 0.0
+
+    def as_dict(self):
+        return {
+            "pages": self.pages,
+            "early_stops": self.early_stops,
+            "fallbacks": self.fallbacks,
+            "bytes_read": self.bytes_read,
+            "parse_time": round(self.parse_time, 3),
+        }
+
+
+_stats = ExtractorStats()
+
+
+def meta_published(element):
+    """<meta property="article:published_time" content="..."> (или pubdate)."""
+    if element.tag == "meta" and element.get("property") in PUBLISHED_PROPERTIES and element.get("content"):
+        return datetime.fromisoformat(element.get("content")[:19])
+    return None
+
+
+def time_datetime(element):
+    """<time datetime="...">."""
+    if element.tag == "time" and element.get("datetime"):
+        return datetime.fromisoformat(element.get("datetime")[:19])
+    return None
+
+
+def _match(events, matchers):
+    for _, element in events:
+        if not isinstance(element.tag, str):
+            continue    # Комментарии и инструкции обработки
+        for matcher in matchers:
+            try:
+                published = matcher(element)
+            except ValueError:
+                continue
+            if published:
+                return published
+    return None
+
+
+async def fetch_published(session, url, matchers, fallback=None, stats=None, **kwargs):
+    """
+    Загружает страницу url порциями и возвращает дату публикации — первый
+    результат matchers, функций «элемент lxml -> datetime | None», которые
+    вызываются для каждого закрытого элемента. Если ни одна не сработала,
+    возвращает fallback(html) по всему тексту страницы (или None).
+    Запрос идёт через resilience.request; дополнительные аргументы
+    передаются в session.get.
+    """
+    with tracing.span(url, "fetch"):
+        return await _fetch_published(session, url, matchers, fallback, stats or _stats, **kwargs)
+
+
+async def _fetch_published(session, url, matchers, fallback, stats, **kwargs):
+    stats.pages += 1
+    chunks = []
+
+    async with resilience.request(session, "GET", url, **kwargs) as response:
+        response.raise_for_status()
+        encoding = response.charset or "utf-8"
+        parser = etree.HTMLPullParser(events=("end",), encoding=encoding)
+
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            stats.bytes_read += len(chunk)
+            metrics.record_bytes(len(chunk))
+            if fallback:
+                chunks.append(chunk)
+
+            started = time.perf_counter()
+            parser.feed(chunk)
+            published = _match(parser.read_events(), matchers)
+            elapsed = time.perf_counter() - started
+            stats.parse_time += elapsed
+            metrics.record_parse(elapsed)
+
+            if published:
+                # Остаток страницы не нужен: закрываем соединение, не дочитывая его
+                stats.early_stops += 1
+                response.close()
+                return published
+
+    started = time.perf_counter()
+    try:
+        parser.close()
+        published = _match(parser.read_events(), matchers)
+    except etree.LxmlError:
+        published = None
+
+    if published is None and fallback:
+        stats.fallbacks += 1
+        # Полный разбор страницы тяжёлый, он выполняется в пуле разбора
+        published = await run_parse(fallback, b"".join(chunks).decode(encoding, errors="replace"))
+    stats.parse_time += time.perf_counter() - started
+
+    if published is None:
+        logger.debug(f"Не удалось определить дату для {url}")
+    return published
+
+
+def stats():
+    """Счётчики общего извлекателя дат."""
+    return _stats.as_dict()
@@ -0,0 +1,127 @@
+"""
+Сравнение извлечения даты публикации: прежний способ (вся страница
+загружается и разбирается BeautifulSoup) против потокового
+article_date.fetch_published, который останавливается на первом
+найденном признаке даты.
+
+Страницы отдаются локальным aiohttp-сервером: либо сохранённые HTML-файлы
+из каталога --pages, либо сгенерированные статьи с мета-тегом в <head> и
+сотнями килобайт скриптов и текста в <body>. Для каждого способа
+выводятся загруженные байты, время разбора и общее время.
+
+Запуск из корня репозитория:
+    python -m benchmarks.article_date_bench --pages saved_articles/ --repeat 3
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from aiohttp import web
+from bs4 import BeautifulSoup
+
+from article_date import ExtractorStats, fetch_published, meta_published, time_datetime
+from http_client import get_session, close_session
+
+PORT = 8779
+
+
+def synthetic_page(index, body_size=300_000):
+    script = "<script>window.__STATE__ = {%s};</script>\n" % ("'x': 1, " * 2000)
+    paragraph = "<p>Текст статьи о происшествии в Волгограде. </p>\n"
+    body = (script + paragraph * 20) * (body_size // (len(script) + len(paragraph) * 20) + 1)
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>Статья {index}</title>"
+        f"<meta property='article:published_time' content='2025-04-0{index % 9 + 1}T10:{index % 60:02d}:00+03:00'>"
+        f"</head><body>{body}</body></html>"
+    )
+
+
+def load_pages(directory, count):
+    if directory:
+        return [path.read_text(encoding="utf-8", errors="replace") for path in sorted(Path(directory).glob("*.html"))]
+    return [synthetic_page(index) for index in range(count)]
+
+
+async def start_server(pages):
+    async def handle(request):
+        return web.Response(text=pages[int(request.match_info["index"])], content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{index}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", PORT).start()
+    return runner
+
+
+async def legacy(session, url, stats):
+    """Прежняя реализация из Sites/v1.py."""
+    async with session.get(url) as response:
+        body = await response.read()
+    stats.bytes_read += len(body)
+
+    started = time.perf_counter()
+    soup = BeautifulSoup(body.decode("utf-8", errors="replace"), "lxml")
+    published = None
+    meta_time = soup.find("meta", {"property": "article:published_time"})
+    if meta_time and meta_time.get("content"):
+        published = meta_time["content"][:19]
+    else:
+        date_tag = soup.find("time")
+        if date_tag and date_tag.get("datetime"):
+            published = date_tag["datetime"][:19]
+    stats.parse_time += time.perf_counter() - started
+    return published
+
+
+async def streaming(session, url, stats):
+    return await fetch_published(session, url, [meta_published, time_datetime], stats=stats)
+
+
+async def measure(extract, urls, repeat):
+    session = get_session()
+    stats = ExtractorStats()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for url in urls:
+            await extract(session, url, stats)
+    elapsed = time.perf_counter() - started
+    return stats, elapsed
+
+
+def report(label, stats, elapsed, pages):
+    print(
+        f"{label}: {stats.bytes_read / pages / 1024:.1f} КБ на страницу, "
+        f"разбор {stats.parse_time / pages * 1000:.2f} мс на страницу, "
+        f"всего {elapsed:.2f} с"
+    )
+
+
+async def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--pages", help="Каталог с сохранёнными страницами статей (*.html)")
+    arg_parser.add_argument("--count", type=int, default=20, help="Сколько страниц генерировать без --pages")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Количество проходов по страницам")
+    args = arg_parser.parse_args()
+
+    pages = load_pages(args.pages, args.count)
+    runner = await start_server(pages)
+    urls = [f"http://127.0.0.1:{PORT}/{index}" for index in range(len(pages))]
+    total = len(urls) * args.repeat
+
+    try:
+        before, before_elapsed = await measure(legacy, urls, args.repeat)
+        after, after_elapsed = await measure(streaming, urls, args.repeat)
+    finally:
+        await close_session()
+        await runner.cleanup()
+
+    report("BeautifulSoup, вся страница", before, before_elapsed, total)
+    report("Потоковый разбор           ", after, after_elapsed, total)
+    print(f"Остановок до конца страницы: {after.early_stops} из {total}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
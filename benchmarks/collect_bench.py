@@ -0,0 +1,413 @@
+"""
+Офлайн-бенчмарк сбора новостей: parser.collect_all_news на записанных
+ответах сайтов и VK API, которые отдаёт локальный сервер (fake_server) в
+отдельном процессе.
+
+Запись фикстур (нужен доступ к сайтам и ключ VK в .env):
+    python -m benchmarks.collect_bench record --fixtures fixtures/
+
+Воспроизведение с задержками и отказами; для отдельных хостов профиль
+задаётся ключом --host:
+    python -m benchmarks.collect_bench replay --fixtures fixtures/ --rounds 5 \\
+        --latency 0.15 --jitter 0.05 --failure-rate 0.02 \\
+        --host v1.ru=latency=0.8,failure=0.1 --output before.json
+
+Каналы Telegram не записываются: вместо клиента Telethon подставляется
+фейковый клиент без сообщений (fake_telegram).
+
+Сравнение двух результатов:
+    python -m benchmarks.collect_bench compare before.json after.json
+
+Часы источников (news_item.set_clock) идут от момента записи, поэтому
+отбор новостей за сутки работает так же, как при записи. Каждый раунд
+начинается с пустых кэшей (кэш результатов источников, HTTP-кэш и кэш дат
+во временном каталоге); с --warm кэши на диске сохраняются между раундами.
+Разбор по умолчанию выполняется в event loop (--parse-pool inline), чтобы
+его время процессора учитывалось по источникам.
+
+Для каждого источника измеряются время работы, число HTTP-запросов,
+прочитанные байты тел ответов, время процессора и число новостей. --output
+сохраняет медианы по раундам и все раунды в JSON.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import aiohttp
+
+import budget
+import cursor_store
+import date_cache
+import http_cache
+import http_client
+import news_cache
+import news_item
+import parse_pool
+import parser
+import vk_api
+from Sites import telegram_channels
+from benchmarks.fake_server import FakeNewsServer, FixtureStore, HostProfile, frozen_clock, install
+from benchmarks.fake_telegram import FakeTelegramClient
+
+OTHER = "-"     # Время и запросы вне источников: event loop, слияние результатов
+
+
+class Accounting:
+    """Запросы, байты и время процессора по источникам (budget.current_source)."""
+
+    def __init__(self):
+        self.sources = defaultdict(lambda: {"requests": 0, "bytes": 0, "cpu_time": 0.0})
+
+    def current(self):
+        return self.sources[budget.current_source() or OTHER]
+
+    async def on_request_start(self, session, context, params):
+        self.current()["requests"] += 1
+
+    def trace_config(self):
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self.on_request_start)
+        return trace_config
+
+
+class _TimedSteps:
+    """Выполняет корутину по шагам и отдаёт время процессора каждого шага в account."""
+
+    def __init__(self, coro, account):
+        self._coro = coro
+        self._account = account
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+    def _step(self, method, *args):
+        source = budget.current_source()
+        started = time.thread_time()
+        try:
+            return method(*args)
+        finally:
+            # Шаг мог войти в срок источника или выйти из него
+            self._account(budget.current_source() or source, time.thread_time() - started)
+
+    def send(self, value):
+        return self._step(self._coro.send, value)
+
+    def throw(self, *args):
+        return self._step(self._coro.throw, *args)
+
+    def close(self):
+        self._coro.close()
+
+
+def install_accounting(loop, accounting):
+    """
+    Учитывает время процессора каждой задачи event loop и прочитанные байты
+    ответов по источникам. Байты считаются при чтении из потока ответа:
+    потоковый разбор (article_date), закрывающий соединение раньше, учитывает
+    только прочитанное.
+    """
+    def account(source_id, seconds):
+        accounting.sources[source_id or OTHER]["cpu_time"] += seconds
+
+    async def timed(coro):
+        return await _TimedSteps(coro, account)
+
+    loop.set_task_factory(lambda loop, coro, **kwargs: asyncio.Task(timed(coro), loop=loop, **kwargs))
+
+    read_chunk = aiohttp.StreamReader._read_nowait_chunk
+
+    def counting_read_chunk(self, n):
+        chunk = read_chunk(self, n)
+        accounting.current()["bytes"] += len(chunk)
+        return chunk
+
+    aiohttp.StreamReader._read_nowait_chunk = counting_read_chunk
+
+
+def _serve(fixtures, profile, host_profiles, record, seed, connection):
+    async def main():
+        store = FixtureStore(fixtures)
+        if (store.directory / "index.json").exists():
+            store.load()
+        store.recorded_at = store.recorded_at or time.time()
+        server = await FakeNewsServer(store, profile, host_profiles, record, seed).start()
+        connection.send((str(server.url), store.recorded_at))
+        # Сервер работает до команды остановки от бенчмарка
+        await asyncio.get_running_loop().run_in_executor(None, connection.recv)
+        if record:
+            store.save()
+        connection.send(server.stats)
+        await server.stop()
+
+    asyncio.run(main())
+
+
+class ServerProcess:
+    """
+    FakeNewsServer в отдельном процессе: работа сервера не попадает в
+    замеры времени процессора и не задерживает event loop бота.
+    """
+
+    def __init__(self, fixtures, profile=None, host_profiles=None, record=False, seed=None):
+        self.args = (str(fixtures), profile, host_profiles, record, seed)
+        self.url = None
+        self.recorded_at = None
+        self._process = None
+        self._connection = None
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")
+        self._connection, child = context.Pipe()
+        self._process = context.Process(target=_serve, args=(*self.args, child), daemon=True)
+        self._process.start()
+        self.url, self.recorded_at = self._connection.recv()
+        return self
+
+    def stop(self):
+        """Останавливает сервер и возвращает его счётчики по хостам."""
+        self._connection.send(None)
+        stats = self._connection.recv()
+        self._process.join()
+        return stats
+
+
+def isolate_caches(directory):
+    """Переносит постоянные кэши во временный каталог, чтобы не трогать данные бота."""
+    for cache in (date_cache.date_cache, http_cache.http_cache, cursor_store.cursor_store):
+        cache.close()
+        cache.path = Path(directory) / cache.path.name
+
+
+def reset_caches(cold):
+    news_cache._caches.clear()
+    if cold:
+        for cache in (date_cache.date_cache, http_cache.http_cache, cursor_store.cursor_store):
+            cache.close()
+            cache.path.unlink(missing_ok=True)
+
+
+def timed_sources(sources, wall_times):
+    def wrap(source_id, fetch):
+        async def run(*args):
+            started = time.perf_counter()
+            try:
+                return await fetch(*args)
+            finally:
+                wall_times[source_id] = time.perf_counter() - started
+        return run
+
+    return {source_id: wrap(source_id, fetch) for source_id, fetch in sources.items()}
+
+
+async def run_round(sources, accounting, cold):
+    reset_caches(cold)
+    accounting.sources.clear()
+    wall_times = {}
+
+    parser.SOURCES = timed_sources(sources, wall_times)
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    news, cut = await parser.collect_all_news()
+    wall_time = time.perf_counter() - started
+    cpu_time = time.process_time() - cpu_started
+    parser.SOURCES = sources
+
+    news_counts = defaultdict(int)
+    for item in news:
+        news_counts[item.source] += 1
+
+    per_source = {}
+    for source_id in [*sources, OTHER]:
+        counters = accounting.sources.get(source_id, {"requests": 0, "bytes": 0, "cpu_time": 0.0})
+        per_source[source_id] = {
+            "wall_time": round(wall_times.get(source_id, wall_time if source_id != OTHER else 0.0), 4),
+            "cpu_time": round(counters["cpu_time"], 4),
+            "requests": counters["requests"],
+            "bytes": counters["bytes"],
+            "news": news_counts.get(source_id, 0),
+            "cut": source_id in cut,
+        }
+
+    return {
+        "wall_time": round(wall_time, 4),
+        "cpu_time": round(cpu_time, 4),
+        "requests": sum(source["requests"] for source in per_source.values()),
+        "bytes": sum(source["bytes"] for source in per_source.values()),
+        "news": len(news),
+        "sources": per_source,
+    }
+
+
+def median_summary(rounds):
+    def median(values):
+        return round(statistics.median(values), 4)
+
+    summary = {key: median([round_[key] for round_ in rounds]) for key in ("wall_time", "cpu_time", "requests", "bytes", "news")}
+    summary["sources"] = {
+        source_id: {
+            key: median([round_["sources"][source_id][key] for round_ in rounds])
+            for key in ("wall_time", "cpu_time", "requests", "bytes", "news")
+        }
+        for source_id in rounds[0]["sources"]
+    }
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'источник':<20}{'время, с':>10}{'CPU, с':>10}{'запросов':>10}{'КБ':>10}{'новостей':>10}")
+    rows = [*summary["sources"].items(), ("всего", summary)]
+    for source_id, row in rows:
+        print(
+            f"{source_id:<20}{row['wall_time']:>10.2f}{row['cpu_time']:>10.3f}"
+            f"{row['requests']:>10g}{row['bytes'] / 1024:>10.1f}{row['news']:>10g}"
+        )
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def host_profiles(specs, default):
+    profiles = {}
+    for spec in specs:
+        host, _, profile = spec.partition("=")
+        profiles[host] = HostProfile.parse(profile, default)
+    return profiles
+
+
+async def record(args):
+    server = ServerProcess(args.fixtures, record=True).start()
+    install(server.url)
+    telegram_channels.set_client(FakeTelegramClient())
+    try:
+        news, cut = await parser.collect_all_news()
+    finally:
+        await http_client.close_session()
+        stats = server.stop()
+    print(f"Записано: {sum(host['requests'] - host['misses'] for host in stats.values())} ответов, новостей: {len(news)}")
+    if cut:
+        print(f"⏱ Не уложились в срок: {', '.join(cut)}")
+
+
+async def replay(args):
+    profile = HostProfile(args.latency, args.jitter, args.failure_rate)
+    profiles = host_profiles(args.host, profile)
+    server = ServerProcess(args.fixtures, profile, profiles, seed=args.seed).start()
+    install(server.url)
+    news_item.set_clock(frozen_clock(server.recorded_at))
+    parse_pool.PARSE_POOL = args.parse_pool
+    # Ключ доступа в фикстурах не хранится, но VK API без него не вызывается
+    vk_api.VK_ACCESS_TOKEN = vk_api.VK_ACCESS_TOKEN or "replay"
+    # Каналы Telegram не записываются: фейковый клиент без сообщений
+    telegram_channels.set_client(FakeTelegramClient())
+
+    accounting = Accounting()
+    install_accounting(asyncio.get_running_loop(), accounting)
+    http_client.trace_configs.append(accounting.trace_config())
+
+    rounds = []
+    with tempfile.TemporaryDirectory() as directory:
+        isolate_caches(directory)
+        sources = parser.SOURCES
+        try:
+            for number in range(args.rounds):
+                rounds.append(await run_round(sources, accounting, cold=not args.warm))
+                print(f"Раунд {number + 1}: {rounds[-1]['wall_time']:.2f} с, новостей: {rounds[-1]['news']}")
+        finally:
+            await http_client.close_session()
+            server_stats = server.stop()
+            parse_pool.shutdown()
+            isolate_caches(directory)
+
+    result = {
+        "revision": git_revision(),
+        "created_at": time.time(),
+        "fixtures_recorded_at": server.recorded_at,
+        "mode": "warm" if args.warm else "cold",
+        "parse_pool": args.parse_pool,
+        "profile": profile.as_dict(),
+        "host_profiles": {host: host_profile.as_dict() for host, host_profile in profiles.items()},
+        "summary": median_summary(rounds),
+        "server": server_stats,
+        "rounds": rounds,
+    }
+    print_summary(result["summary"])
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+def compare(args):
+    before = json.loads(Path(args.before).read_text(encoding="utf-8"))["summary"]
+    after = json.loads(Path(args.after).read_text(encoding="utf-8"))["summary"]
+
+    def change(old, new):
+        return f"{(new - old) / old * 100:+.0f}%" if old else "—"
+
+    print(f"{'источник':<20}{'время':>16}{'CPU':>16}{'запросов':>16}{'байт':>16}")
+    rows = [(source_id, before["sources"][source_id], after["sources"].get(source_id)) for source_id in before["sources"]]
+    for source_id, old, new in [*rows, ("всего", before, after)]:
+        if new is None:
+            print(f"{source_id:<20}нет в {args.after}")
+            continue
+        print(f"{source_id:<20}" + "".join(
+            f"{change(old[key], new[key]):>16}" for key in ("wall_time", "cpu_time", "requests", "bytes")
+        ))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Записать ответы сайтов в фикстуры")
+    record_parser.add_argument("--fixtures", required=True, help="Каталог фикстур")
+
+    replay_parser = commands.add_parser("replay", help="Измерить сбор на записанных ответах")
+    replay_parser.add_argument("--fixtures", required=True, help="Каталог фикстур")
+    replay_parser.add_argument("--rounds", type=int, default=3, help="Количество раундов сбора")
+    replay_parser.add_argument("--latency", type=float, default=0.1, help="Задержка ответа, секунд")
+    replay_parser.add_argument("--jitter", type=float, default=0.05, help="Разброс задержки, секунд")
+    replay_parser.add_argument("--failure-rate", type=float, default=0.0, help="Доля ответов 503")
+    replay_parser.add_argument("--host", action="append", default=[], help="Профиль хоста: host=latency=..,jitter=..,failure=..")
+    replay_parser.add_argument("--seed", type=int, default=1, help="Зерно генератора задержек и отказов")
+    replay_parser.add_argument("--warm", action="store_true", help="Сохранять кэши на диске между раундами")
+    replay_parser.add_argument("--parse-pool", default="inline", choices=("inline", "thread", "process"))
+    replay_parser.add_argument("--output", help="Файл для результата в JSON")
+
+    compare_parser = commands.add_parser("compare", help="Сравнить два результата replay")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+
+    args = arg_parser.parse_args()
+    # Журнал бота в замерах не нужен
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.command == "compare":
+        compare(args)
+    elif args.command == "record":
+        asyncio.run(record(args))
+    else:
+        asyncio.run(replay(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
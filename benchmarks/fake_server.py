@@ -0,0 +1,243 @@
+"""
+Локальный сервер новостей для офлайн-бенчмарков.
+
+Все запросы общей сессии http_client перенаправляются на локальный
+aiohttp-сервер (install): исходный URL передаётся в заголовке
+X-Original-URL, а сервер отвечает записанным ответом из каталога фикстур.
+Для каждого хоста задаются задержка, разброс задержки и доля отказов
+(ответ 503), поэтому можно воспроизводить и медленные, и ненадёжные сайты.
+
+В режиме записи сервер работает прокси: ответ, которого ещё нет среди
+фикстур, загружается с настоящего сайта и сохраняется. Ключ фикстуры —
+метод, URL и поля формы (для VK API) без ключа доступа; ключи доступа в
+фикстуры не попадают. Если точного совпадения нет, подходит запись с тем же
+адресом без учёта параметров запроса: ссылки вида ?dateFrom=<вчера>
+меняются каждый день.
+
+Формат каталога фикстур: index.json (время записи и описание ответов) и
+по одному файлу тела ответа на запрос.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+from yarl import URL
+
+import http_client
+
+ORIGINAL_URL_HEADER = "X-Original-URL"
+
+# Поля формы, которые не входят в ключ и не сохраняются
+SECRET_FIELDS = ("access_token", "v")
+
+# Заголовки ответа, которые сохраняются и воспроизводятся
+KEPT_HEADERS = ("Content-Type",)
+
+
+def _fields(form):
+    return sorted((key, value) for key, value in (form or {}).items() if key not in SECRET_FIELDS)
+
+
+class FixtureStore:
+    """Записанные ответы сайтов в каталоге directory."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.recorded_at = None
+        self.entries = {}
+        self._loose = {}
+
+    @staticmethod
+    def key(method, url, form=None, loose=False):
+        if loose:
+            url = str(URL(url).with_query(None))
+        fields = _fields(form)
+        return f"{method} {url}" + (" " + json.dumps(fields, ensure_ascii=False) if fields else "")
+
+    def load(self):
+        index = json.loads((self.directory / "index.json").read_text(encoding="utf-8"))
+        self.recorded_at = index["recorded_at"]
+        self.entries = index["entries"]
+        for key, entry in self.entries.items():
+            self._loose.setdefault(self.key(entry["method"], entry["url"], dict(entry["form"]), loose=True), key)
+        return self
+
+    def save(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index = {"recorded_at": self.recorded_at, "entries": self.entries}
+        (self.directory / "index.json").write_text(json.dumps(index, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    def get(self, method, url, form=None):
+        """Запись ответа и его тело; (None, None), если ответа нет."""
+        key = self.key(method, url, form)
+        if key not in self.entries:
+            key = self._loose.get(self.key(method, url, form, loose=True))
+        if key is None:
+            return None, None
+        entry = self.entries[key]
+        return entry, (self.directory / entry["body"]).read_bytes()
+
+    def put(self, method, url, form, status, headers, body):
+        key = self.key(method, url, form)
+        name = hashlib.blake2b(key.encode("utf-8"), digest_size=10).hexdigest() + ".bin"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / name).write_bytes(body)
+        entry = {
+            "method": method,
+            "url": url,
+            "form": _fields(form),
+            "status": status,
+            "headers": {header: headers[header] for header in KEPT_HEADERS if header in headers},
+            "body": name,
+        }
+        self.entries[key] = entry
+        self._loose.setdefault(self.key(method, url, form, loose=True), key)
+        return entry
+
+
+class HostProfile:
+    """Поведение хоста: задержка ответа, её разброс (секунд) и доля отказов."""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+
+    @classmethod
+    def parse(cls, spec, default=None):
+        """
+        Профиль из строки "latency=0.5,jitter=0.1,failure=0.05"; не
+        указанные значения берутся из default.
+        """
+        default = default or cls()
+        values = {"latency": default.latency, "jitter": default.jitter, "failure": default.failure_rate}
+        for part in filter(None, spec.split(",")):
+            name, value = part.split("=")
+            if name not in values:
+                raise ValueError(f"Неизвестный параметр профиля хоста: {name!r}")
+            values[name] = float(value)
+        return cls(values["latency"], values["jitter"], values["failure"])
+
+    def as_dict(self):
+        return {"latency": self.latency, "jitter": self.jitter, "failure_rate": self.failure_rate}
+
+
+class FakeNewsServer:
+    """
+    Сервер, отвечающий записанными ответами с задержками и отказами по
+    профилю хоста. С record=True недостающие ответы загружаются с сайтов.
+    """
+
+    def __init__(self, store, profile=None, host_profiles=None, record=False, seed=None):
+        self.store = store
+        self.profile = profile or HostProfile()
+        self.host_profiles = host_profiles or {}
+        self.record = record
+        self.random = random.Random(seed)
+        self.url = None
+        self.stats = {}
+        self._runner = None
+        self._upstream = None
+
+    def _host_stats(self, host):
+        return self.stats.setdefault(host, {"requests": 0, "failures": 0, "misses": 0, "bytes": 0})
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = URL(f"http://{host}:{port}/")
+        return self
+
+    async def stop(self):
+        if self._upstream is not None:
+            await self._upstream.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def handle(self, request):
+        url = request.headers[ORIGINAL_URL_HEADER]
+        form = dict(await request.post()) if request.method == "POST" else None
+        host = URL(url).host
+        stats = self._host_stats(host)
+        stats["requests"] += 1
+
+        profile = self.host_profiles.get(host, self.profile)
+        delay = profile.latency + self.random.uniform(-profile.jitter, profile.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.random.random() < profile.failure_rate:
+            stats["failures"] += 1
+            return web.Response(status=503, text="Service Unavailable (fake server)")
+
+        entry, body = self.store.get(request.method, url, form)
+        if entry is None and self.record:
+            entry, body = await self._fetch_upstream(request.method, url, form)
+        if entry is None:
+            stats["misses"] += 1
+            return web.Response(status=404, text=f"Нет записанного ответа для {url}")
+
+        stats["bytes"] += len(body)
+        return web.Response(status=entry["status"], headers=entry["headers"], body=body)
+
+    async def _fetch_upstream(self, method, url, form):
+        if self._upstream is None:
+            self._upstream = aiohttp.ClientSession(headers=http_client.DEFAULT_HEADERS, timeout=http_client.DEFAULT_TIMEOUT)
+        try:
+            async with self._upstream.request(method, URL(url, encoded=True), data=form, ssl=False) as response:
+                body = await response.read()
+                entry = self.store.put(method, url, form, response.status, response.headers, body)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"❗️ Не удалось записать {url}: {e}")
+            return None, None
+        return entry, body
+
+
+class ReplaySession:
+    """
+    Обёртка aiohttp.ClientSession: запросы уходят на сервер server_url,
+    исходный URL передаётся в заголовке X-Original-URL.
+    """
+
+    def __init__(self, session, server_url):
+        self._session = session
+        self._server_url = server_url
+
+    def request(self, method, url, **kwargs):
+        original = URL(str(url))
+        params = kwargs.pop("params", None)
+        if params:
+            original = original.update_query(params)
+        headers = dict(kwargs.pop("headers", None) or {})
+        headers[ORIGINAL_URL_HEADER] = str(original)
+        return self._session.request(method, self._server_url, headers=headers, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def install(server_url):
+    """Направляет общую сессию http_client (и все созданные после вызова) на server_url."""
+    create_session = http_client._create_session
+    http_client._create_session = lambda: ReplaySession(create_session(), server_url)
+
+
+def frozen_clock(recorded_at):
+    """Часы, идущие от момента записи фикстур: возраст новостей считается как при записи."""
+    offset = time.time() - recorded_at
+    return lambda: time.time() - offset
@@ -0,0 +1,69 @@
+"""
+Фейковый клиент Telegram для проверки источника Sites.telegram_channels
+без сети и аккаунта.
+
+Клиент хранит сообщения каналов в памяти и отдаёт их так же, как
+TelegramClient.iter_messages: от новых к старым, только с id больше min_id
+и (если задан offset_id) меньше offset_id, не больше limit; неизвестный
+канал пуст. Запросы записываются в
+requests, поэтому видно, с каким курсором читался каждый канал:
+
+    client = FakeTelegramClient()
+    client.post("volgograd1", "Пожар на Университетском проспекте")
+    news = await fetch_telegram_news(client=client)
+    client.requests  # [("volgograd1", 0), ...]
+"""
+from datetime import datetime, timezone
+
+import news_item
+
+
+class FakeMessage:
+    """Сообщение канала: id, время публикации (datetime в UTC) и текст."""
+
+    def __init__(self, message_id, date, message):
+        self.id = message_id
+        self.date = date
+        self.message = message
+
+    def __repr__(self):
+        return f"FakeMessage({self.id!r}, {self.date.isoformat()!r}, {self.message!r})"
+
+
+class FakeTelegramClient:
+    """Каналы {имя: [FakeMessage]} в памяти с интерфейсом iter_messages клиента Telethon."""
+
+    def __init__(self, channels=None):
+        self.channels = {channel: list(messages) for channel, messages in (channels or {}).items()}
+        self.requests = []
+
+    def post(self, channel, text, published=None):
+        """Добавляет в канал сообщение со следующим id; published — Unix-время, по умолчанию сейчас."""
+        messages = self.channels.setdefault(channel, [])
+        published = news_item.now().timestamp() if published is None else published
+        message = FakeMessage(
+            max((message.id for message in messages), default=0) + 1,
+            datetime.fromtimestamp(published, timezone.utc),
+            text,
+        )
+        messages.append(message)
+        return message
+
+    async def iter_messages(self, channel, min_id=0, offset_id=0, limit=None):
+        self.requests.append((channel, min_id))
+        messages = sorted(
+            (
+                message for message in self.channels.get(channel, ())
+                if message.id > min_id and (not offset_id or message.id < offset_id)
+            ),
+            key=lambda message: message.id,
+            reverse=True,
+        )
+        for message in messages[:limit]:
+            yield message
+
+    def is_connected(self):
+        return True
+
+    async def disconnect(self):
+        pass
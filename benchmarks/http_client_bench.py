@@ -0,0 +1,92 @@
+"""
+Сравнение задержки сбора новостей с «холодным» и «тёплым» HTTP-клиентом.
+
+Холодный прогон: перед каждым раундом общая сессия закрывается, поэтому
+заново выполняются DNS-запросы, TCP- и TLS-рукопожатия.
+Тёплый прогон: сессия создаётся один раз и переиспользуется между раундами,
+как между вызовами /start в работающем боте.
+
+Постоянные кэши (даты статей, HTTP-кэш, курсоры каналов) на время замера
+переносятся во временный каталог и очищаются перед каждым раундом, включая
+прогревочный: оба режима загружают одно и то же, и разница между ними —
+только переиспользование соединений.
+
+Запуск из корня репозитория:
+    python -m benchmarks.http_client_bench --rounds 3
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import cursor_store
+import date_cache
+import http_cache
+from http_client import get_session, close_session
+from parser import SOURCES
+
+CACHES = (date_cache.date_cache, http_cache.http_cache, cursor_store.cursor_store)
+
+
+def empty_caches(directory):
+    """Переносит постоянные кэши в пустой каталог directory."""
+    for cache in CACHES:
+        cache.close()
+        cache.path = Path(directory) / cache.path.name
+
+
+async def collect_sites():
+    session = get_session()
+    results = await asyncio.gather(*(fetch(session) for fetch in SOURCES.values()), return_exceptions=True)
+    return sum(len(result) for result in results if not isinstance(result, Exception))
+
+
+async def run_rounds(rounds, warm, directory):
+    timings = []
+
+    if warm:
+        # Прогревочный раунд: открывает соединения и заполняет DNS-кэш
+        empty_caches(tempfile.mkdtemp(dir=directory))
+        await collect_sites()
+
+    for _ in range(rounds):
+        if not warm:
+            await close_session()
+        empty_caches(tempfile.mkdtemp(dir=directory))
+        started = time.perf_counter()
+        await collect_sites()
+        timings.append(time.perf_counter() - started)
+
+    await close_session()
+    return timings
+
+
+def report(label, timings):
+    print(
+        f"{label}: среднее {statistics.mean(timings):.2f} с, "
+        f"медиана {statistics.median(timings):.2f} с, "
+        f"мин {min(timings):.2f} с, макс {max(timings):.2f} с"
+    )
+
+
+async def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rounds", type=int, default=3, help="Количество замеров для каждого режима")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            cold = await run_rounds(args.rounds, warm=False, directory=directory)
+            warm = await run_rounds(args.rounds, warm=True, directory=directory)
+        finally:
+            empty_caches(directory)
+
+    report("Холодный клиент", cold)
+    report("Тёплый клиент  ", warm)
+    print(f"Выигрыш тёплого клиента: {statistics.mean(cold) - statistics.mean(warm):.2f} с на сбор")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""
+Время импорта при запуске бота и при запуске отдельных источников.
+
+Каждый замер выполняется в отдельном интерпретаторе с -X importtime, как
+при холодном старте. Выводятся общее время импорта и модули с наибольшим
+собственным временем импорта:
+
+    parser          запуск бота: парсеры сайтов не должны загружаться;
+    <id источника>  sources.REGISTRY[id].load() — только модуль источника
+                    и его зависимости.
+
+Запуск из корня репозитория:
+    python -m benchmarks.import_time_bench
+    python -m benchmarks.import_time_bench --sources v1 kp --top 5
+"""
+import argparse
+import subprocess
+import sys
+
+from sources import REGISTRY
+
+# Модули, которые не должны загружаться при запуске бота
+SOURCE_DEPENDENCIES = ("Sites", "bs4", "feedparser", "dateutil", "html_parse")
+
+
+def import_times(code):
+    """Запускает code с -X importtime; возвращает {модуль: (собственное, общее время, мкс)} в порядке импорта."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative), len(name) - len(name.lstrip()))
+    return times
+
+
+def report(label, times, top):
+    # Общее время — сумма по модулям верхнего уровня, в них входят вложенные импорты
+    total = sum(cumulative for _, cumulative, depth in times.values() if depth == 1)
+    heaviest = sorted(((name, own) for name, (own, _, _) in times.items()), key=lambda item: item[1], reverse=True)[:top]
+    print(f"{label:<20}{total / 1000:>10.1f} мс   " + ", ".join(f"{name} {us / 1000:.1f}" for name, us in heaviest))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sources", nargs="*", default=list(REGISTRY), help="id источников для замера")
+    arg_parser.add_argument("--top", type=int, default=3, help="Сколько самых дорогих модулей показывать")
+    args = arg_parser.parse_args()
+
+    times = import_times("import parser")
+    report("parser", times, args.top)
+    loaded = sorted(name for name in times if name.split(".")[0] in SOURCE_DEPENDENCIES)
+    if loaded:
+        print(f"❗️ При запуске бота загружены модули источников: {', '.join(loaded)}")
+
+    # Реестр уже загружен ботом, поэтому из замера источника он исключается
+    baseline = import_times("import sources")
+    for source_id in args.sources:
+        times = import_times(f"import sources; sources.REGISTRY[{source_id!r}].load()")
+        report(source_id, {name: value for name, value in times.items() if name not in baseline}, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Микробенчмарк фильтра по ключевым словам: прежняя проверка
+any(keyword.lower() in text_lower ...) против скомпилированного
+keyword_filter.is_relevant.
+
+Заголовки берутся из файла (по одному на строку), а без него — из живых
+RSS-лент bloknot-volgograd.ru и riac34.ru. Если ленты недоступны, набор
+заголовков генерируется из словаря ключевых слов.
+
+Запуск из корня репозитория:
+    python -m benchmarks.keyword_filter_bench --titles titles.txt --count 5000
+"""
+import argparse
+import asyncio
+import random
+import timeit
+
+import feedparser
+
+from config import KEYWORDS, EXCLUDED_KEYWORDS
+from http_client import get_session, close_session
+from keyword_filter import is_relevant
+
+FEEDS = [
+    "https://bloknot-volgograd.ru/rss_news.php",
+    "https://riac34.ru/rss/",
+]
+
+FILLER = [
+    "в Волгограде", "на улице", "жители", "сообщили", "администрация", "района",
+    "в Красноармейском районе", "утром", "вечером", "на трассе", "в центре города",
+]
+
+
+def legacy_is_relevant(text):
+    """Прежняя реализация из Sites/* и parser.py."""
+    text_lower = text.lower()
+    return (
+        any(keyword.lower() in text_lower for keyword in KEYWORDS)
+        and not any(excluded.lower() in text_lower for excluded in EXCLUDED_KEYWORDS)
+    )
+
+
+async def fetch_feed_titles():
+    session = get_session()
+    titles = []
+    for url in FEEDS:
+        try:
+            async with session.get(url, ssl=False) as response:
+                response.raise_for_status()
+                feed = feedparser.parse(await response.text())
+                titles.extend(entry.title for entry in feed.entries if entry.get("title"))
+        except Exception as e:
+            print(f"❗️ Не удалось загрузить {url}: {e}")
+    await close_session()
+    return titles
+
+
+def synthetic_titles(count):
+    rng = random.Random(42)
+    words = list(KEYWORDS) + list(EXCLUDED_KEYWORDS)
+    titles = []
+    for _ in range(count):
+        parts = rng.sample(FILLER, 3)
+        if rng.random() < 0.3:
+            parts.insert(rng.randrange(len(parts)), rng.choice(words))
+        titles.append(" ".join(parts).capitalize())
+    return titles
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--titles", help="Файл с заголовками, по одному на строку")
+    arg_parser.add_argument("--count", type=int, default=5000, help="Сколько заголовков проверять")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="Количество повторов замера")
+    args = arg_parser.parse_args()
+
+    if args.titles:
+        with open(args.titles, encoding="utf-8") as file:
+            titles = [line.strip() for line in file if line.strip()]
+    else:
+        titles = asyncio.run(fetch_feed_titles()) or synthetic_titles(args.count)
+
+    # Дополняем набор до нужного размера повторением
+    titles = (titles * (args.count // len(titles) + 1))[:args.count]
+
+    legacy = min(timeit.repeat(lambda: [legacy_is_relevant(t) for t in titles], number=1, repeat=args.repeat))
+    compiled = min(timeit.repeat(lambda: [is_relevant(t) for t in titles], number=1, repeat=args.repeat))
+
+    differences = [t for t in titles if legacy_is_relevant(t) != is_relevant(t)]
+
+    print(f"Заголовков: {len(titles)}")
+    print(f"Прежняя проверка:   {legacy * 1000:.1f} мс ({legacy / len(titles) * 1e6:.1f} мкс на заголовок)")
+    print(f"Скомпилированная:   {compiled * 1000:.1f} мс ({compiled / len(titles) * 1e6:.1f} мкс на заголовок)")
+    print(f"Ускорение: x{legacy / compiled:.1f}")
+    print(f"Расхождений (нормализация «ё»): {len(set(differences))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Стоимость разбора страниц каждого источника на разных движках html_parse
+(soup, lxml, selectolax, если установлен). RSS-ленты bloknot и riac34
+разбираются своим XML-парсером и измеряются как есть.
+
+Страницы берутся из каталога --pages (файлы <id источника>.html, например
+v1.html, kp.html, bloknot.html). С ключом --save страницы сначала
+загружаются с сайтов и сохраняются в этот каталог, чтобы последующие
+замеры шли на одних и тех же данных.
+
+Для каждого источника и движка выводится время одного разбора и число
+найденных записей; расхождение числа записей между движками отмечается.
+
+Запуск из корня репозитория:
+    python -m benchmarks.parse_backend_bench --pages saved_pages/ --save
+    python -m benchmarks.parse_backend_bench --pages saved_pages/ --repeat 20
+"""
+import argparse
+import asyncio
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from html_parse import available_backends
+from http_client import get_session, close_session
+from Sites import bloknot_volgograd, gorvesti, mtv_online, novostivolgograda, riac34, v1, v102, volgograd_kp, vpravda
+
+
+def source_pages():
+    """id источника -> (URL страницы, функция разбора, поддерживает ли выбор движка)."""
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%d.%m.%Y")
+    return {
+        "bloknot": ("https://bloknot-volgograd.ru/rss_news.php", bloknot_volgograd.parse_bloknot_feed, False),
+        "riac34": ("https://riac34.ru/rss/", riac34.parse_riac34_feed, False),
+        "gorvesti": (gorvesti.FEED_URL, gorvesti.parse_gorvesti_page, True),
+        "mtv": ("https://xn--b1ats.xn--80asehdb/feed", mtv_online.parse_mtv_feed, True),
+        "novostivolgograda": (novostivolgograda.BASE_URL, novostivolgograda.parse_listing, True),
+        "v1": (f"{v1.BASE_URL}?dateFrom={yesterday}", v1.parse_listing, True),
+        "v102": (v102.BASE_URL, v102.parse_listing, True),
+        "kp": (volgograd_kp.BASE_URL, volgograd_kp.parse_listing, True),
+        "vpravda": (f"{vpravda.BASE_URL}?dateFrom={yesterday}", vpravda.parse_listing, True),
+    }
+
+
+async def save_pages(directory, pages):
+    directory.mkdir(parents=True, exist_ok=True)
+    session = get_session()
+    for source_id, (url, _, _) in pages.items():
+        try:
+            async with session.get(url, ssl=False) as response:
+                response.raise_for_status()
+                (directory / f"{source_id}.html").write_text(await response.text(), encoding="utf-8")
+            print(f"Сохранено: {source_id}")
+        except Exception as e:
+            print(f"❗️ Не удалось загрузить {source_id}: {e}")
+    await close_session()
+
+
+def measure(parse, content, repeat):
+    timer = timeit.Timer(lambda: parse(content))
+    return min(timer.repeat(repeat=repeat, number=1)), len(parse(content))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--pages", required=True, help="Каталог с сохранёнными страницами")
+    arg_parser.add_argument("--save", action="store_true", help="Сначала загрузить страницы с сайтов")
+    arg_parser.add_argument("--repeat", type=int, default=10, help="Количество замеров, берётся лучший")
+    args = arg_parser.parse_args()
+
+    directory = Path(args.pages)
+    pages = source_pages()
+    if args.save:
+        asyncio.run(save_pages(directory, pages))
+
+    backends = available_backends()
+    print(f"{'источник':<20}" + "".join(f"{backend:>22}" for backend in backends))
+
+    for source_id, (_, parse, pluggable) in pages.items():
+        path = directory / f"{source_id}.html"
+        if not path.exists():
+            print(f"{source_id:<20}нет сохранённой страницы")
+            continue
+        content = path.read_text(encoding="utf-8")
+
+        if not pluggable:
+            elapsed, count = measure(parse, content, args.repeat)
+            print(f"{source_id:<20}{f'{elapsed * 1000:.2f} мс / {count}':>22}  (RSS, свой парсер)")
+            continue
+
+        cells, counts = [], set()
+        for backend in backends:
+            elapsed, count = measure(lambda text: parse(text, backend=backend), content, args.repeat)
+            cells.append(f"{elapsed * 1000:.2f} мс / {count}")
+            counts.add(count)
+        note = "" if len(counts) == 1 else "  ❗️ движки нашли разное число записей"
+        print(f"{source_id:<20}" + "".join(f"{cell:>22}" for cell in cells) + note)
+
+
+if __name__ == "__main__":
+    main()
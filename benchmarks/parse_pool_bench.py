@@ -0,0 +1,73 @@
+"""
+Задержка event loop при разборе страниц в разных режимах parse_pool:
+inline (прямо в event loop), thread (пул потоков) и process (пул процессов).
+
+Сохранённые страницы из каталога --pages (как у parse_backend_bench:
+<id источника>.html) разбираются одновременно, --copies копий каждой,
+пока LoopLagMonitor замеряет, насколько опаздывает event loop. Для каждого
+режима выводятся общее время разбора и задержка loop (средняя, p99,
+максимальная).
+
+Запуск из корня репозитория:
+    python -m benchmarks.parse_pool_bench --pages saved_pages/ --copies 4
+"""
+import argparse
+import asyncio
+import functools
+import time
+from pathlib import Path
+
+from config import PARSE_WORKERS
+from parse_pool import LoopLagMonitor, make_executor
+from benchmarks.parse_backend_bench import source_pages
+
+MODES = ("inline", "thread", "process")
+
+
+async def measure(mode, jobs, workers):
+    executor = make_executor(mode, workers)
+    loop = asyncio.get_running_loop()
+
+    async def run(parse, content):
+        if executor is None:
+            return parse(content)
+        return await loop.run_in_executor(executor, functools.partial(parse, content))
+
+    try:
+        if executor is not None:
+            # Запуск процессов не относится к разбору: прогреваем пул заранее
+            await asyncio.gather(*[run(parse, content) for parse, content in jobs[:workers]])
+        async with LoopLagMonitor(interval=0.01) as lag:
+            started = time.perf_counter()
+            await asyncio.gather(*[run(parse, content) for parse, content in jobs])
+            elapsed = time.perf_counter() - started
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return elapsed, lag.stats()
+
+
+async def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--pages", required=True, help="Каталог с сохранёнными страницами")
+    arg_parser.add_argument("--copies", type=int, default=4, help="Сколько раз разбирается каждая страница")
+    arg_parser.add_argument("--workers", type=int, default=PARSE_WORKERS, help="Размер пула")
+    args = arg_parser.parse_args()
+
+    jobs = []
+    for source_id, (_, parse, _) in source_pages().items():
+        path = Path(args.pages) / f"{source_id}.html"
+        if path.exists():
+            jobs.extend([(parse, path.read_text(encoding="utf-8"))] * args.copies)
+    if not jobs:
+        print("Нет сохранённых страниц; сохраните их: python -m benchmarks.parse_backend_bench --save")
+        return
+
+    print(f"Страниц: {len(jobs)}, исполнителей: {args.workers}")
+    for mode in MODES:
+        elapsed, lag = await measure(mode, jobs, args.workers)
+        print(f"{mode:<8} разбор {elapsed:.2f} с, задержка loop: {lag}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
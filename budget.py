@@ -0,0 +1,117 @@
+"""
+Сроки сбора новостей.
+
+У каждого источника есть свой срок (SOURCE_BUDGETS, по умолчанию
+SOURCE_BUDGET секунд). Источник, не уложившийся в срок, отменяется. Срок
+виден и внутри источника: gather_by_host перестаёт ждать страницы статей
+за FANOUT_MARGIN секунд до конца срока и возвращает то, что уже успело
+загрузиться. Поэтому медленный сайт отдаёт часть новостей, а не ничего.
+
+Источники, которые были прерваны или вернули неполный результат,
+запоминаются, чтобы сообщить о них пользователю.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+
+import tracing
+from config import SOURCE_BUDGET, SOURCE_BUDGETS
+
+FANOUT_MARGIN = 1.0     # Запас времени на разбор результатов после загрузки статей, секунд
+
+logger = logging.getLogger(__name__)
+
+# Срок текущего источника: (время event loop, когда он истекает, id источника)
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+# id источника -> был ли последний сбор прерван или неполон
+_truncated = {}
+
+
+class BudgetExceeded(asyncio.TimeoutError):
+    """Источник не уложился в отведённое время."""
+
+    def __init__(self, source_id, budget):
+        super().__init__(f"{source_id} не уложился в {budget:g} с")
+        self.source_id = source_id
+        self.budget = budget
+
+
+def source_budget(source_id):
+    """Срок работы источника в секундах."""
+    return SOURCE_BUDGETS.get(source_id, SOURCE_BUDGET)
+
+
+def current_source():
+    """id источника, в сроке которого выполняется код (None вне источника)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline[1]
+
+
+def remaining(margin=0.0):
+    """
+    Сколько секунд осталось до конца срока текущего источника за вычетом
+    margin (None, если код выполняется без срока).
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    expires, _ = deadline
+    return max(0.0, expires - asyncio.get_running_loop().time() - margin)
+
+
+def mark_truncated():
+    """Отмечает, что текущий источник вернул неполный результат."""
+    deadline = _deadline.get()
+    if deadline is not None:
+        _truncated[deadline[1]] = True
+
+
+def was_truncated(source_id):
+    """Был ли последний сбор источника прерван или неполон."""
+    return _truncated.get(source_id, False)
+
+
+def with_budget(source_id, fetch, budget=None):
+    """
+    Оборачивает fetch(*args) источника source_id: выполнение ограничено
+    сроком budget (по умолчанию source_budget(source_id)), по истечении
+    которого fetch отменяется и выбрасывается BudgetExceeded. Собственные
+    таймауты источника (например, aiohttp.ServerTimeoutError) до конца срока
+    пробрасываются как есть.
+    """
+    budget = budget or source_budget(source_id)
+
+    @functools.wraps(fetch)
+    async def run(*args, **kwargs):
+        _truncated[source_id] = False
+        expires = asyncio.get_running_loop().time() + budget
+        token = _deadline.set((expires, source_id))
+        try:
+            with tracing.span(source_id, "source", group=source_id):
+                return await asyncio.wait_for(fetch(*args, **kwargs), budget)
+        except asyncio.TimeoutError:
+            if asyncio.get_running_loop().time() < expires:
+                raise
+            _truncated[source_id] = True
+            raise BudgetExceeded(source_id, budget) from None
+        finally:
+            _deadline.reset(token)
+
+    return run
+
+
+async def run_with_budget(source_id, fetch, *args):
+    """
+    Запускает один источник со сроком, как это делает бот. Для отдельного
+    запуска парсера: возвращает (новости, был ли сбор прерван или неполон).
+    С TRACE_DIR сбор трассируется (tracing.run).
+    """
+    async with tracing.run(source_id):
+        try:
+            news_list = await with_budget(source_id, fetch)(*args)
+        except BudgetExceeded as e:
+            logger.warning(str(e))
+            return [], True
+    return news_list, was_truncated(source_id)
@@ -0,0 +1,109 @@
+"""
+Отбор ссылок-кандидатов со страницы-списка до загрузки статей.
+
+Главная страница сайта содержит сотни ссылок: меню, теги, подвал, виджеты.
+Здесь они отсеиваются ещё до запросов к статьям: остаются только ссылки,
+похожие на статьи, без дубликатов и с заголовком, прошедшим фильтр ключевых
+слов. Если дата публикации есть в URL или в разметке списка, она берётся
+оттуда, и страницу статьи загружать не нужно.
+"""
+from datetime import date, datetime
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# Параметры ссылок, которые не влияют на содержимое страницы
+TRACKING_PARAMS = ("utm_", "from", "ref", "yclid", "gclid", "fbclid")
+
+# На сколько уровней вверх от ссылки искать тег <time> в разметке списка
+LISTING_DATE_DEPTH = 3
+
+
+def canonical_url(url):
+    """
+    Приводит ссылку к каноническому виду: схема и домен в нижнем регистре,
+    без фрагмента и трекинговых параметров.
+    """
+    parts = urlsplit(url.strip())
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+def date_from_match(match):
+    """Возвращает дату публикации из групп year/month/day совпадения шаблона URL."""
+    if not match or "year" not in match.re.groupindex:
+        return None
+    try:
+        return date(int(match["year"]), int(match["month"]), int(match["day"]))
+    except (TypeError, ValueError):
+        return None
+
+
+def listing_datetime(anchor):
+    """
+    Ищет время публикации в разметке списка рядом со ссылкой: тег
+    <time datetime="..."> в самой ссылке или в ближайших родителях, которые
+    не содержат ссылок на другие статьи.
+    """
+    node = anchor
+    for _ in range(LISTING_DATE_DEPTH + 1):
+        if node is None:
+            break
+
+        hrefs = {link.get("href").split("#")[0] for link in node.select("a[href]")}
+        hrefs.add(anchor.get("href").split("#")[0])
+        if len(hrefs) > 1:
+            break  # Контейнер уже относится к нескольким статьям
+
+        time_tags = node.select("time[datetime]")
+        if len(time_tags) == 1:
+            try:
+                return datetime.fromisoformat(time_tags[0].get("datetime")[:19])
+            except ValueError:
+                return None
+
+        node = node.parent
+    return None
+
+
+def collect_candidates(anchors, base_url, article_pattern, is_valid_news):
+    """
+    Отбирает ссылки-кандидаты со страницы-списка.
+
+    anchors — узлы <a href> страницы (html_parse), article_pattern — скомпилированное
+    регулярное выражение для абсолютного URL статьи (может содержать группы
+    year/month/day), is_valid_news — фильтр заголовков источника.
+
+    Возвращает список словарей в порядке появления ссылок на странице:
+    title, link (канонический URL), date (datetime из разметки списка или None) и
+    day (дата из URL или None).
+    """
+    candidates = []
+    seen_links = set()
+
+    for anchor in anchors:
+        title = anchor.text
+        if not title:
+            continue
+
+        link = canonical_url(urljoin(base_url, anchor.get("href")))
+        match = article_pattern.match(link)
+        if not match:
+            continue  # Меню, теги, подвал и сторонние ссылки
+
+        if not is_valid_news(title):
+            continue
+
+        if link in seen_links:
+            continue
+        seen_links.add(link)
+
+        candidates.append({
+            "title": title,
+            "link": link,
+            "date": listing_datetime(anchor),
+            "day": date_from_match(match),
+        })
+
+    return candidates
@@ -0,0 +1,111 @@
+"""
+Фоновый сбор новостей.
+
+Коллектор периодически опрашивает каждый источник со своим интервалом,
+сохраняет результат в кэше источника (news_cache) и отправляет в чат
+только публикации, которых ещё нет в хранилище отправленных (seen_store).
+Когда снимок полон и свеж, /start отвечает из него сразу, не дожидаясь
+обхода сайтов; иначе недостающие и устаревшие источники собираются заново.
+"""
+import asyncio
+import logging
+
+import schedule
+
+from config import COLLECT_INTERVAL, COLLECT_INTERVALS
+from http_client import get_session
+from news_cache import source_cache
+from seen_store import seen_store
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundCollector:
+    """
+    Планировщик опроса источников.
+
+    sources — словарь {id источника: fetch(session)}, push — корутина,
+    которая получает список новых новостей источника и доставляет их.
+    Если хранилище отправленных пусто (первый запуск), первый сбор каждого
+    источника только запоминает уже опубликованное, чтобы в чат не ушли
+    все новости за сутки. После перезапуска отправляется то, что вышло,
+    пока бот не работал.
+    """
+
+    def __init__(self, sources, push, intervals=None, store=None):
+        self.sources = sources
+        self.push = push
+        self.intervals = {**COLLECT_INTERVALS, **(intervals or {})}
+        self.store = store or seen_store
+        self.scheduler = schedule.Scheduler()
+        self.prime = False
+        self.primed = set()
+        self._tasks = {}
+
+        for source_id in sources:
+            interval = self.intervals.get(source_id, COLLECT_INTERVAL)
+            self.scheduler.every(interval).seconds.do(self.start_collection, source_id)
+
+    def start_collection(self, source_id):
+        """Запускает сбор источника, если предыдущий ещё не завершён."""
+        task = self._tasks.get(source_id)
+        if task is not None and not task.done():
+            logger.info(f"Сбор {source_id} ещё идёт, пропускаем запуск")
+            return
+        self._tasks[source_id] = asyncio.ensure_future(self.collect(source_id))
+
+    async def collect(self, source_id):
+        """Обновляет кэш источника и отправляет новые новости."""
+        cache = source_cache(source_id, self.sources[source_id])
+        try:
+            news_list = await cache.wait_refresh(get_session())
+        except Exception as e:
+            logger.error(f"Ошибка фонового сбора {source_id}: {e}")
+            return
+
+        new_items = self.store.filter_new(news_list)
+
+        if source_id not in self.primed:
+            self.primed.add(source_id)
+            if self.prime:
+                self.store.add(new_items)
+                return
+
+        if new_items:
+            logger.info(f"{source_id}: новых публикаций {len(new_items)}")
+            try:
+                await self.push(new_items)
+            except Exception as e:
+                logger.error(f"Ошибка отправки новостей {source_id}: {e}")
+                return
+            # Запоминаем только доставленное: при ошибке отправка повторится
+            self.store.add(new_items)
+
+    async def run(self):
+        """Основной цикл: сразу опрашивает все источники, затем по расписанию."""
+        self.prime = self.store.is_empty()
+        for source_id in self.sources:
+            self.start_collection(source_id)
+
+        try:
+            while True:
+                self.scheduler.run_pending()
+                await asyncio.sleep(1)
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+
+    def has_snapshot(self):
+        """
+        Можно ли ответить из снимка: каждый источник уже собран фоновым
+        сбором, и его результат не старше срока свежести кэша или интервала
+        опроса источника (что больше), то есть фоновый сбор не отстаёт.
+        """
+        for source_id, fetch in self.sources.items():
+            if source_id not in self.primed:
+                return False
+            cache = source_cache(source_id, fetch)
+            age = cache.age
+            if age is None or age > max(cache.ttl, self.intervals.get(source_id, COLLECT_INTERVAL)):
+                return False
+        return True
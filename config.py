@@ -6,6 +6,13 @@ from pathlib import Path
 dotenv_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path)
 
+# Каталог для локальных данных (кэши, состояние между запусками)
+DATA_DIR = Path(os.getenv("DATA_DIR", Path(__file__).parent / "data"))
+
+# Часовой пояс, в котором сайты указывают время публикации без смещения
+# и в котором даты показываются в сообщениях
+TIMEZONE = os.getenv("TIMEZONE", "Europe/Volgograd")
+
 # Telegram Bot
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("CHAT_ID")
@@ -15,6 +22,114 @@ if not TELEGRAM_BOT_TOKEN:
 if not CHAT_ID:
     raise ValueError("CHAT_ID")
 
+# Кэш результатов сбора: сколько секунд результат источника считается свежим
+# и сколько ещё его можно отдавать устаревшим, пока идёт фоновое обновление
+NEWS_CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", 300))
+NEWS_CACHE_STALE_TTL = int(os.getenv("NEWS_CACHE_STALE_TTL", 1800))
+
+# Окно потоковой выдачи /start, секунд: источники, завершившиеся в пределах
+# окна, отправляются одной порцией, отсортированной по времени публикации
+STREAM_WINDOW = float(os.getenv("STREAM_WINDOW", 2))
+
+# Общий срок сбора новостей, секунд: источники, не ответившие к этому
+# времени, отменяются, и пользователь получает то, что уже собрано
+COLLECT_DEADLINE = float(os.getenv("COLLECT_DEADLINE", 60))
+
+# Срок работы одного источника, секунд. Для отдельного источника его можно
+# переопределить переменной окружения SOURCE_BUDGET_<ID>, например SOURCE_BUDGET_V1=50
+SOURCE_BUDGET = float(os.getenv("SOURCE_BUDGET", 40))
+SOURCE_BUDGETS = {
+    # RSS-ленты, VK и Telegram отвечают одним запросом
+    "bloknot": 15,
+    "gorvesti": 15,
+    "riac34": 15,
+    "mtv": 15,
+    "vk": 20,
+    "telegram": 20,
+}
+SOURCE_BUDGETS.update({
+    key[len("SOURCE_BUDGET_"):].lower(): float(value)
+    for key, value in os.environ.items()
+    if key.startswith("SOURCE_BUDGET_")
+})
+
+# Источники новостей (id из sources.REGISTRY) через запятую. ENABLED_SOURCES
+# оставляет только перечисленные (пусто — все), DISABLED_SOURCES отключает
+# перечисленные, например DISABLED_SOURCES=vk,mtv
+ENABLED_SOURCES = [source_id for source_id in os.getenv("ENABLED_SOURCES", "").split(",") if source_id]
+DISABLED_SOURCES = [source_id for source_id in os.getenv("DISABLED_SOURCES", "").split(",") if source_id]
+
+# Фоновый сбор новостей с отправкой новых публикаций в CHAT_ID (включается
+# явно: BACKGROUND_COLLECTION=1)
+BACKGROUND_COLLECTION = os.getenv("BACKGROUND_COLLECTION", "0") == "1"
+
+# Интервал фонового опроса источников, секунд. Для отдельного источника его
+# можно переопределить переменной окружения COLLECT_INTERVAL_<ID>,
+# например COLLECT_INTERVAL_VK=120
+COLLECT_INTERVAL = int(os.getenv("COLLECT_INTERVAL", 600))
+COLLECT_INTERVALS = {
+    # RSS-ленты дешёвые, их можно опрашивать чаще
+    "bloknot": 300,
+    "gorvesti": 300,
+    "riac34": 300,
+    "mtv": 300,
+    "vk": 300,
+    # Каналы читаются по курсору: каждый опрос запрашивает только новые сообщения
+    "telegram": 120,
+}
+COLLECT_INTERVALS.update({
+    key[len("COLLECT_INTERVAL_"):].lower(): int(value)
+    for key, value in os.environ.items()
+    if key.startswith("COLLECT_INTERVAL_")
+})
+
+# Сколько секунд помнить уже отправленные новости (окно сбора — сутки)
+SEEN_WINDOW = int(os.getenv("SEEN_WINDOW", 24 * 60 * 60))
+
+# Где разбирать страницы: "process" — пул процессов, "thread" — пул потоков,
+# "inline" — прямо в event loop. Размер пула по умолчанию — число ядер
+PARSE_POOL = os.getenv("PARSE_POOL", "process")
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", 0)) or os.cpu_count() or 1
+
+# Устойчивость запросов к сайтам (resilience): темп запросов к одному хосту
+# (запросов в секунду; снижается, когда хост отвечает 429/503), число
+# повторов GET-запроса при сетевой ошибке или ответе 5xx/429, начальная и
+# максимальная пауза между повторами (экспоненциальная, со случайным
+# разбросом), а также число ошибок подряд, после которого хост пропускается
+# на BREAKER_COOLDOWN секунд
+HOST_RATE_LIMIT = float(os.getenv("HOST_RATE_LIMIT", 10))
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", 2))
+RETRY_BACKOFF = float(os.getenv("RETRY_BACKOFF", 0.5))
+RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", 8))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 5))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", 60))
+
+# Хеджирование GET-запросов: если хост не ответил за время, которое
+# HEDGE_PERCENTILE его недавних запросов укладывается в него, отправляется
+# один дубль и берётся ответ, пришедший первым. Дублей не больше
+# HEDGE_MAX_RATIO от числа запросов к хосту; порог появляется после
+# HEDGE_MIN_SAMPLES замеров (из последних HEDGE_WINDOW)
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 0.95))
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", 0.1))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", 200))
+
+# Локальный эндпоинт метрик в формате Prometheus (http://METRICS_HOST:METRICS_PORT/metrics);
+# включается явно, например METRICS_PORT=9108
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 0)
+
+# Трассировка сбора: если задан TRACE_DIR, каждый сбор (collect_all_news,
+# /start, отдельный запуск Sites/*) записывает в этот каталог временную шкалу
+# для trace viewer (ui.perfetto.dev, chrome://tracing). TRACE_PROFILE=1
+# добавляет семплирующий профилировщик (стеки раз в TRACE_PROFILE_INTERVAL
+# секунд), TRACE_MEMORY=1 — снимок tracemalloc
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+TRACE_PROFILE = os.getenv("TRACE_PROFILE", "0") == "1"
+TRACE_PROFILE_INTERVAL = float(os.getenv("TRACE_PROFILE_INTERVAL", 0.005))
+TRACE_MEMORY = os.getenv("TRACE_MEMORY", "0") == "1"
+
 # Telegram Client
 API_ID = os.getenv("TELEGRAM_API_ID")
 API_HASH = os.getenv("TELEGRAM_API_HASH")
@@ -0,0 +1,121 @@
+"""
+Курсоры инкрементальных источников.
+
+Каналы Telegram умеют отдавать только записи новее заданного id, а стены
+VK читаются страницами до первой уже увиденной записи, поэтому для каждого
+канала хранится курсор — id последней увиденной записи — и новости, уже
+отобранные из него за последние сутки. Следующий сбор загружает только
+записи новее курсора и добавляет подходящие к сохранённым: результат
+источника по-прежнему охватывает сутки, а запрашивается лишь то, что
+появилось с прошлого сбора.
+
+Отобранные новости зависят от списков ключевых слов, поэтому вместе с ними
+хранится keyword_filter.FINGERPRINT: при изменении config.KEYWORDS курсор
+не используется, и канал читается заново за сутки. Кроме курсора источник
+может сохранить своё состояние канала (словарь, например оценку частоты
+публикаций) — оно от ключевых слов не зависит. Хранится в SQLite и
+переживает перезапуски.
+"""
+import json
+import logging
+import sqlite3
+import time
+
+from config import DATA_DIR
+from keyword_filter import FINGERPRINT
+from news_item import NewsItem
+
+DB_PATH = DATA_DIR / "cursors.sqlite3"
+
+MAX_AGE = 7 * 24 * 60 * 60          # Курсоры каналов, не обновлявшиеся неделю, удаляются
+
+logger = logging.getLogger(__name__)
+
+
+class CursorStore:
+    """Курсор и отобранные новости по ключу канала ("источник:канал")."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._connection = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cursors ("
+                " key TEXT PRIMARY KEY,"
+                " cursor INTEGER NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " items TEXT NOT NULL,"
+                " state TEXT,"
+                " updated_at REAL NOT NULL)"
+            )
+            self.evict()
+        return self._connection
+
+    def get(self, key):
+        """
+        Возвращает (курсор, новости, состояние). Если курсора нет или списки
+        ключевых слов изменились — (None, [], состояние); состояния нет — {}.
+        """
+        row = self.connection.execute(
+            "SELECT cursor, fingerprint, items, state FROM cursors WHERE key = ?",
+            (key,),
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None, [], {}
+
+        cursor, fingerprint, items, state = row
+        state = json.loads(state) if state else {}
+        if fingerprint != FINGERPRINT:
+            self.misses += 1
+            return None, [], state
+
+        self.hits += 1
+        return cursor, [NewsItem(*fields) for fields in json.loads(items)], state
+
+    def set(self, key, cursor, news, state=None):
+        """Сохраняет курсор канала, отобранные из него новости и состояние источника."""
+        items = [[item.timestamp, item.source, item.link, item.title] for item in news]
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cursors (key, cursor, fingerprint, items, state, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, cursor, FINGERPRINT, json.dumps(items, ensure_ascii=False),
+                 json.dumps(state) if state else None, time.time()),
+            )
+        self.writes += 1
+
+    def evict(self):
+        """Удаляет курсоры, которые не обновлялись дольше MAX_AGE."""
+        with self.connection:
+            self.connection.execute("DELETE FROM cursors WHERE updated_at < ?", (time.time() - MAX_AGE,))
+
+    def stats(self):
+        """Счётчики с момента запуска."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+        }
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+cursor_store = CursorStore()
+
+
+def stats():
+    """Счётчики общего хранилища курсоров."""
+    return cursor_store.stats()
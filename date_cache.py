@@ -0,0 +1,143 @@
+"""
+Постоянный кэш «URL статьи -> дата публикации».
+
+Дата публикации статьи не меняется, поэтому страницу, которую уже
+загружали, при следующих сборах запрашивать не нужно. Кэш хранится в
+SQLite и переживает перезапуски. Если на странице не нашлось даты,
+сохраняется отрицательный результат с коротким сроком жизни, чтобы
+повторить попытку позже. Ошибки загрузки (сеть, статус ответа) не
+кэшируются вовсе: страница запрашивается снова при следующем сборе.
+"""
+import logging
+import sqlite3
+import time
+from datetime import datetime
+
+from candidates import canonical_url
+from config import DATA_DIR
+
+DB_PATH = DATA_DIR / "article_dates.sqlite3"
+
+NEGATIVE_TTL = 60 * 60              # Срок жизни отрицательного результата, секунд
+MAX_AGE = 7 * 24 * 60 * 60          # Записи старше недели удаляются
+EVICT_EVERY = 500                   # Как часто (в записях) чистить устаревшие строки
+
+logger = logging.getLogger(__name__)
+
+
+class DateCache:
+    """Кэш дат публикации с отрицательными записями и счётчиками попаданий."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._connection = None
+        self._writes = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS article_dates ("
+                " url TEXT PRIMARY KEY,"
+                " published TEXT,"
+                " stored_at REAL NOT NULL)"
+            )
+            self.evict()
+        return self._connection
+
+    def get(self, url):
+        """
+        Возвращает (найдено, дата). Для отрицательной записи — (True, None),
+        если её срок жизни ещё не истёк.
+        """
+        row = self.connection.execute(
+            "SELECT published, stored_at FROM article_dates WHERE url = ?",
+            (canonical_url(url),),
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return False, None
+
+        published, stored_at = row
+        if published is None:
+            if time.time() - stored_at > NEGATIVE_TTL:
+                self.misses += 1
+                return False, None
+            self.negative_hits += 1
+            return True, None
+
+        self.hits += 1
+        return True, datetime.fromisoformat(published)
+
+    def set(self, url, published):
+        """Сохраняет дату публикации (или None, если её не удалось определить)."""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO article_dates (url, published, stored_at) VALUES (?, ?, ?)",
+                (canonical_url(url), published.isoformat() if published else None, time.time()),
+            )
+
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """Удаляет устаревшие записи: все старше MAX_AGE и отрицательные старше NEGATIVE_TTL."""
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM article_dates WHERE stored_at < ? OR (published IS NULL AND stored_at < ?)",
+                (now - MAX_AGE, now - NEGATIVE_TTL),
+            )
+
+    def stats(self):
+        """Счётчики попаданий и промахов с момента запуска."""
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+date_cache = DateCache()
+
+
+def cached(fetch, cache=None):
+    """
+    Оборачивает функцию fetch(url) -> datetime | None: сначала дата ищется в
+    кэше, и страница загружается только для URL, которых там ещё нет.
+    None от fetch означает «на странице нет даты» и кэшируется; исключение
+    (ошибка загрузки) не кэшируется, а дата для этого сбора — None.
+    """
+    cache = cache or date_cache
+
+    async def resolve(url):
+        found, published = cache.get(url)
+        if found:
+            return published
+
+        try:
+            published = await fetch(url)
+        except Exception as e:
+            logger.error(f"Ошибка при получении даты {url}: {e}")
+            return None
+        cache.set(url, published)
+        return published
+
+    return resolve
+
+
+def stats():
+    """Счётчики общего кэша дат."""
+    return date_cache.stats()
@@ -0,0 +1,203 @@
+"""
+Доставка новостей в Telegram.
+
+Новости упаковываются в как можно меньшее число сообщений не длиннее
+MESSAGE_LIMIT символов и ставятся в очередь. Сообщения размечены HTML,
+поэтому текст новостей экранируется и обрезается до разметки (escape_html):
+неэкранированный «<» или обрезанный посередине тег заставил бы Telegram
+отклонить всё сообщение вместе с остальными новостями в нём. Отправкой занимается
+отдельная задача на каждый чат, поэтому обработчик команды не ждёт, пока
+уйдут все сообщения, а порядок сообщений внутри чата сохраняется.
+
+Частота отправки ограничена так же, как у Telegram: не больше GLOBAL_RATE
+сообщений в секунду на бота, одно сообщение в секунду в личный чат и
+GROUP_RATE в минуту в группу. На ответ 429 сообщение отправляется повторно
+через retry_after секунд; после MAX_ATTEMPTS попыток или при ошибке,
+которую повтор не исправит (бот заблокирован, неверный запрос), сообщение
+отбрасывается.
+"""
+import asyncio
+import html
+import logging
+
+from aiogram.exceptions import TelegramAPIError, TelegramNetworkError, TelegramRetryAfter
+
+from rate_limit import TokenBucket
+
+MESSAGE_LIMIT = 4096        # Максимальная длина сообщения Telegram
+GLOBAL_RATE = 30            # Сообщений в секунду на бота
+CHAT_RATE = 1               # Сообщений в секунду в личный чат
+GROUP_RATE = 20 / 60        # Сообщений в секунду в группу или канал
+MAX_ATTEMPTS = 5            # Попыток отправки одного сообщения
+NETWORK_RETRY_DELAY = 2     # Пауза перед повтором после сетевой ошибки, секунд
+
+logger = logging.getLogger(__name__)
+
+
+def message_length(text):
+    """
+    Длина текста так, как её считает Telegram (в единицах UTF-16). HTML-теги
+    тоже учитываются, поэтому оценка с запасом.
+    """
+    return len(text.encode("utf-16-le")) // 2
+
+
+def escape_html(text, limit=None):
+    """
+    Экранирует text для разметки HTML. Если задан limit, текст обрезается
+    до экранирования так, чтобы результат был не длиннее limit.
+    """
+    escaped = html.escape(text)
+    if limit is None or message_length(escaped) <= limit:
+        return escaped
+    text = text[:max(limit - 1, 0)]
+    while text and message_length(html.escape(text + "…")) > limit:
+        text = text[:-1]
+    return html.escape(text + "…") if text else ""
+
+
+def pack_messages(blocks, limit=MESSAGE_LIMIT, separator="\n"):
+    """
+    Склеивает блоки текста в сообщения не длиннее limit, сохраняя порядок.
+    Блок, который сам длиннее limit, обрезается; блоки с разметкой HTML
+    должны укладываться в limit заранее (escape_html), иначе обрезка может
+    разорвать тег.
+    """
+    messages = []
+    current = ""
+
+    for block in blocks:
+        if message_length(block) > limit:
+            block = block[:limit]
+            while message_length(block) > limit:
+                block = block[:-1]
+
+        candidate = current + separator + block if current else block
+        if message_length(candidate) <= limit:
+            current = candidate
+        else:
+            messages.append(current)
+            current = block
+
+    if current:
+        messages.append(current)
+    return messages
+
+
+class DeliveryQueue:
+    """Очередь отправки сообщений с ограничением частоты и повторами."""
+
+    def __init__(self, bot, global_rate=GLOBAL_RATE, max_attempts=MAX_ATTEMPTS):
+        self.bot = bot
+        self.max_attempts = max_attempts
+        self._global_limiter = TokenBucket(global_rate)
+        self._chat_limiters = {}
+        self._queues = {}
+        self._workers = {}
+        self.delivered = 0
+        self.retried = 0
+        self.dropped = 0
+
+    def _chat_limiter(self, chat_id):
+        if chat_id not in self._chat_limiters:
+            # Отрицательные id и @username — группы и каналы, у них лимит строже
+            rate = GROUP_RATE if str(chat_id).startswith(("-", "@")) else CHAT_RATE
+            self._chat_limiters[chat_id] = TokenBucket(rate, capacity=1)
+        return self._chat_limiters[chat_id]
+
+    def enqueue(self, chat_id, texts):
+        """
+        Ставит сообщения в очередь чата и сразу возвращается. Результат —
+        future, который завершается True, если доставлены все сообщения.
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        queue = self._queues.setdefault(chat_id, asyncio.Queue())
+
+        for text in texts:
+            future = loop.create_future()
+            queue.put_nowait((text, future))
+            futures.append(future)
+
+        worker = self._workers.get(chat_id)
+        if worker is None or worker.done():
+            self._workers[chat_id] = asyncio.create_task(self._work(chat_id))
+
+        result = asyncio.gather(*futures)
+        return asyncio.ensure_future(self._all_delivered(result))
+
+    @staticmethod
+    async def _all_delivered(result):
+        return all(await result)
+
+    def deliver(self, chat_id, blocks):
+        """Упаковывает блоки текста в сообщения и ставит их в очередь чата."""
+        return self.enqueue(chat_id, pack_messages(blocks))
+
+    async def _work(self, chat_id):
+        queue = self._queues[chat_id]
+        while not queue.empty():
+            text, future = queue.get_nowait()
+            delivered = False
+            try:
+                delivered = await self._send(chat_id, text)
+            finally:
+                # И при остановке очереди (close): ожидающий deliver() не должен зависнуть
+                if not future.done():
+                    future.set_result(delivered)
+        logger.info(f"Очередь чата {chat_id} отправлена, всего: {self.stats()}")
+
+    async def _send(self, chat_id, text):
+        for attempt in range(1, self.max_attempts + 1):
+            await self._chat_limiter(chat_id).acquire()
+            await self._global_limiter.acquire()
+            try:
+                await self.bot.send_message(chat_id, text)
+            except TelegramRetryAfter as e:
+                logger.warning(f"Telegram просит подождать {e.retry_after} с перед отправкой в {chat_id}")
+                delay = e.retry_after
+            except TelegramNetworkError as e:
+                logger.warning(f"Сетевая ошибка при отправке в {chat_id}: {e}")
+                delay = NETWORK_RETRY_DELAY * attempt
+            except TelegramAPIError as e:
+                logger.error(f"Сообщение в {chat_id} отброшено: {e}")
+                self.dropped += 1
+                return False
+            else:
+                self.delivered += 1
+                return True
+
+            if attempt < self.max_attempts:
+                self.retried += 1
+                await asyncio.sleep(delay)
+
+        logger.error(f"Сообщение в {chat_id} отброшено после {self.max_attempts} попыток")
+        self.dropped += 1
+        return False
+
+    async def join(self):
+        """Ждёт, пока будут обработаны все поставленные в очередь сообщения."""
+        while any(not worker.done() for worker in self._workers.values()):
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    def close(self):
+        """
+        Останавливает отправку. Неотправленные сообщения отбрасываются: их
+        future завершаются False, поэтому ожидающие deliver() не зависают.
+        """
+        for queue in self._queues.values():
+            while not queue.empty():
+                _, future = queue.get_nowait()
+                if not future.done():
+                    future.set_result(False)
+                    self.dropped += 1
+        for worker in self._workers.values():
+            worker.cancel()
+
+    def stats(self):
+        """Счётчики доставленных, повторённых и отброшенных сообщений."""
+        return {
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "dropped": self.dropped,
+        }
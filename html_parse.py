@@ -0,0 +1,281 @@
+"""
+Общий слой разбора HTML для парсеров сайтов.
+
+Источник выбирает движок разбора, а код извлечения новостей пишется один
+раз через небольшой общий интерфейс узла (select, select_one, text, get,
+parent, find_parent, find_next_sibling). Движки:
+
+    soup        BeautifulSoup + lxml; область разбора ограничивается
+                SoupStrainer, поэтому дерево строится только для нужных
+                элементов;
+    lxml        lxml.etree и XPath без построения объектов BeautifulSoup;
+    selectolax  C-парсер HTML5 (Lexbor), если пакет selectolax установлен.
+
+По умолчанию используется selectolax, если он установлен, иначе lxml;
+движок можно задать переменной окружения HTML_BACKEND.
+
+Селекторы — подмножество CSS, которое понимают все три движка: тег,
+.класс, #id, [атрибут], [атрибут="значение"], [атрибут^="начало"],
+без комбинаторов. Вложенный поиск — через select у найденного узла.
+"""
+import functools
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from lxml import etree
+import soupsieve
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("soup", "lxml", "selectolax")
+DEFAULT_BACKEND = os.getenv("HTML_BACKEND") or ("selectolax" if LexborHTMLParser else "lxml")
+
+_SELECTOR = re.compile(
+    r"(?P<tag>[\w-]+|\*)"
+    r"|\.(?P<cls>[\w-]+)"
+    r"|#(?P<id>[\w-]+)"
+    r"|\[(?P<attr>[\w-]+)(?:(?P<op>\^?=)[\"']?(?P<value>[^\"'\]]*)[\"']?)?\]"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_selector(selector):
+    """Разбирает селектор в (тег, [(атрибут, операция, значение), ...])."""
+    tag, conditions, position = None, [], 0
+    while position < len(selector):
+        match = _SELECTOR.match(selector, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Неподдерживаемый селектор: {selector!r}")
+        if match["tag"]:
+            tag = match["tag"]
+        elif match["cls"]:
+            conditions.append(("class", "~=", match["cls"]))
+        elif match["id"]:
+            conditions.append(("id", "=", match["id"]))
+        elif match["attr"]:
+            conditions.append((match["attr"], match["op"], match["value"]))
+        position = match.end()
+    return tag if tag and tag != "*" else None, tuple(conditions)
+
+
+@functools.lru_cache(maxsize=None)
+def _xpath(selector, axis):
+    tag, conditions = _parse_selector(selector)
+    predicates = []
+    for attr, op, value in conditions:
+        if op == "~=":
+            predicates.append(f"contains(concat(' ', normalize-space(@{attr}), ' '), ' {value} ')")
+        elif op == "=":
+            predicates.append(f"@{attr}='{value}'")
+        elif op == "^=":
+            predicates.append(f"starts-with(@{attr}, '{value}')")
+        else:
+            predicates.append(f"@{attr}")
+    return etree.XPath(f"{axis}::{tag or '*'}" + "".join(f"[{p}]" for p in predicates))
+
+
+def _strainer(selector):
+    tag, conditions = _parse_selector(selector)
+    attrs = {}
+    for attr, op, value in conditions:
+        if op == "^=":
+            attrs[attr] = re.compile("^" + re.escape(value))
+        else:
+            attrs[attr] = value if op else True
+    return SoupStrainer(tag, attrs=attrs)
+
+
+def _normalize_text(text):
+    return " ".join(text.split())
+
+
+class Node(ABC):
+    """Общий интерфейс узла; наследники реализуют его для своего движка."""
+
+    @abstractmethod
+    def select(self, selector):
+        """Все потомки, подходящие под селектор, в порядке документа."""
+
+    def select_one(self, selector):
+        found = self.select(selector)
+        return found[0] if found else None
+
+    @abstractmethod
+    def matches(self, selector):
+        """Подходит ли сам узел под селектор."""
+
+    @property
+    @abstractmethod
+    def text(self):
+        """Текст узла с потомками; пробельные символы схлопнуты."""
+
+    @abstractmethod
+    def get(self, name, default=None):
+        """Значение атрибута name или default."""
+
+    @property
+    @abstractmethod
+    def parent(self):
+        """Родительский элемент (None у корня)."""
+
+    @property
+    @abstractmethod
+    def next_element(self):
+        """Следующий соседний элемент (без текста и комментариев)."""
+
+    def find_parent(self, selector):
+        node = self.parent
+        while node is not None and not node.matches(selector):
+            node = node.parent
+        return node
+
+    def find_next_sibling(self, selector):
+        node = self.next_element
+        while node is not None and not node.matches(selector):
+            node = node.next_element
+        return node
+
+
+class SoupNode(Node):
+    def __init__(self, tag):
+        self.tag = tag
+
+    def select(self, selector):
+        return [SoupNode(tag) for tag in self.tag.select(selector)]
+
+    def matches(self, selector):
+        return soupsieve.match(selector, self.tag)
+
+    @property
+    def text(self):
+        return _normalize_text(self.tag.get_text())
+
+    def get(self, name, default=None):
+        value = self.tag.get(name, default)
+        return " ".join(value) if isinstance(value, list) else value
+
+    @property
+    def parent(self):
+        parent = self.tag.parent
+        return SoupNode(parent) if parent is not None and not isinstance(parent, BeautifulSoup) else None
+
+    @property
+    def next_element(self):
+        sibling = self.tag.find_next_sibling()
+        return SoupNode(sibling) if isinstance(sibling, Tag) else None
+
+
+class LxmlNode(Node):
+    def __init__(self, element):
+        self.element = element
+
+    def select(self, selector):
+        return [LxmlNode(element) for element in _xpath(selector, "descendant")(self.element)]
+
+    def matches(self, selector):
+        return bool(_xpath(selector, "self")(self.element))
+
+    @property
+    def text(self):
+        return _normalize_text("".join(self.element.itertext()))
+
+    def get(self, name, default=None):
+        return self.element.get(name, default)
+
+    @property
+    def parent(self):
+        parent = self.element.getparent()
+        return LxmlNode(parent) if parent is not None else None
+
+    @property
+    def next_element(self):
+        sibling = self.element.getnext()
+        while sibling is not None and not isinstance(sibling.tag, str):
+            sibling = sibling.getnext()
+        return LxmlNode(sibling) if sibling is not None else None
+
+
+class SelectolaxNode(Node):
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, selector):
+        # css() у Lexbor включает сам узел, если он подходит; остальные движки — нет
+        return [SelectolaxNode(node) for node in self.node.css(selector) if node.mem_id != self.node.mem_id]
+
+    def matches(self, selector):
+        return self.node.css_matches(selector)
+
+    @property
+    def text(self):
+        return _normalize_text(self.node.text(deep=True))
+
+    def get(self, name, default=None):
+        value = self.node.attributes.get(name, default)
+        return default if value is None else value
+
+    @property
+    def parent(self):
+        parent = self.node.parent
+        return SelectolaxNode(parent) if parent is not None and not parent.tag.startswith(("-", "#")) else None
+
+    @property
+    def next_element(self):
+        sibling = self.node.next
+        while sibling is not None and sibling.tag.startswith(("-", "_", "#")):
+            sibling = sibling.next
+        return SelectolaxNode(sibling) if sibling is not None else None
+
+
+def parse_html(content, scope=None, backend=None):
+    """
+    Разбирает HTML и возвращает список узлов: элементы, подходящие под
+    селектор scope, или корень документа, если scope не задан. С движком
+    soup дерево строится только для элементов scope (SoupStrainer), поэтому
+    у них нет родителей и соседей за пределами области.
+    """
+    backend = backend or DEFAULT_BACKEND
+
+    if backend == "selectolax" and LexborHTMLParser is None:
+        logger.warning("selectolax не установлен, используется lxml")
+        backend = "lxml"
+
+    if backend == "soup":
+        if scope:
+            soup = BeautifulSoup(content, "lxml", parse_only=_strainer(scope))
+            return [SoupNode(tag) for tag in soup.select(scope)]
+        return [SoupNode(BeautifulSoup(content, "lxml"))]
+
+    if backend == "lxml":
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        try:
+            root = etree.fromstring(content, etree.HTMLParser(encoding="utf-8"))
+        except etree.XMLSyntaxError:
+            root = None
+        if root is None:
+            return []
+        if scope:
+            return [LxmlNode(element) for element in _xpath(scope, "descendant-or-self")(root)]
+        return [LxmlNode(root)]
+
+    if backend == "selectolax":
+        tree = LexborHTMLParser(content)
+        if scope:
+            return [SelectolaxNode(node) for node in tree.css(scope)]
+        return [SelectolaxNode(tree.root)] if tree.root is not None else []
+
+    raise ValueError(f"Неизвестный движок разбора HTML: {backend!r}")
+
+
+def available_backends():
+    """Движки, доступные в текущем окружении."""
+    return [backend for backend in BACKENDS if backend != "selectolax" or LexborHTMLParser]
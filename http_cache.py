@@ -0,0 +1,175 @@
+"""
+HTTP-кэш для RSS-лент и страниц-списков.
+
+Для каждого URL сохраняются валидаторы ответа (ETag, Last-Modified), хэш
+тела и уже разобранный результат. Повторный запрос отправляется с
+If-None-Match / If-Modified-Since: на 304 или при неизменившемся теле
+возвращается прежний результат разбора, и BeautifulSoup/feedparser не
+вызываются вовсе. Кэш хранится в SQLite и переживает перезапуски.
+"""
+import hashlib
+import logging
+import pickle
+import sqlite3
+import time
+
+import metrics
+import resilience
+import tracing
+from config import DATA_DIR
+from keyword_filter import FINGERPRINT
+from parse_pool import run_parse
+
+DB_PATH = DATA_DIR / "http_cache.sqlite3"
+
+MAX_AGE = 7 * 24 * 60 * 60      # Записи, которые не обновлялись неделю, удаляются
+
+# Версия формата разобранных результатов: увеличивается, когда функции
+# разбора начинают возвращать записи другого вида, чтобы старые не читались
+PARSED_VERSION = 3
+
+logger = logging.getLogger(__name__)
+
+
+class HttpCache:
+    """Хранилище валидаторов, хэшей тела и разобранных результатов."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._connection = None
+        self.not_modified = 0   # Сервер ответил 304
+        self.unchanged = 0      # Тело не изменилось
+        self.parsed = 0         # Тело разобрано заново
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " body_hash TEXT,"
+                " parsed BLOB,"
+                " stored_at REAL NOT NULL)"
+            )
+            with self._connection:
+                self._connection.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - MAX_AGE,))
+        return self._connection
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT etag, last_modified, body_hash, parsed FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, body_hash, parsed = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": body_hash,
+            "parsed": pickle.loads(parsed),
+        }
+
+    def set(self, key, etag, last_modified, body_hash, parsed):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, last_modified, body_hash, parsed, stored_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, body_hash, pickle.dumps(parsed), time.time()),
+            )
+
+    def touch(self, key, etag, last_modified):
+        with self.connection:
+            self.connection.execute(
+                "UPDATE responses SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified),"
+                " stored_at = ? WHERE key = ?",
+                (etag, last_modified, time.time(), key),
+            )
+
+    def stats(self):
+        return {
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "parsed": self.parsed,
+        }
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+http_cache = HttpCache()
+
+
+def cache_key(url, parse):
+    """
+    Ключ записи: URL, функция разбора, версия формата и отпечаток списков
+    ключевых слов — результат разбора может зависеть от фильтра, поэтому при
+    изменении config.KEYWORDS старые записи не используются.
+    """
+    return f"{parse.__module__}.{parse.__qualname__}:v{PARSED_VERSION}:{FINGERPRINT}:{url}"
+
+
+async def fetch_parsed(session, url, parse, cache=None, **kwargs):
+    """
+    Загружает url и возвращает parse(text). Если страница не изменилась
+    с прошлого раза (304 или тот же хэш тела), возвращает сохранённый
+    результат без разбора. parse выполняется в пуле разбора (parse_pool),
+    поэтому и функция, и её результат должны поддерживать pickle.
+    Запрос идёт через resilience.request; дополнительные аргументы
+    передаются в session.get.
+
+    Результат — список записей: их число учитывается в метриках источника
+    как кандидаты.
+    """
+    with tracing.span(url, "fetch"):
+        parsed = await _fetch_parsed(session, url, parse, cache or http_cache, **kwargs)
+    metrics.count_candidates(len(parsed))
+    return parsed
+
+
+async def _fetch_parsed(session, url, parse, cache, **kwargs):
+    key = cache_key(url, parse)
+    entry = cache.get(key)
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    if entry:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    async with resilience.request(session, "GET", url, headers=headers, **kwargs) as response:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if response.status == 304 and entry:
+            cache.not_modified += 1
+            cache.touch(key, etag, last_modified)
+            return entry["parsed"]
+
+        response.raise_for_status()
+        body = await response.read()
+        body_hash = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+        if entry and entry["body_hash"] == body_hash:
+            cache.unchanged += 1
+            cache.touch(key, etag, last_modified)
+            return entry["parsed"]
+
+        text = await response.text()
+
+    # Разбор занимает процессор, поэтому выполняется вне event loop
+    parsed = await run_parse(parse, text)
+    cache.parsed += 1
+    cache.set(key, etag, last_modified, body_hash, parsed)
+    return parsed
+
+
+def stats():
+    """Счётчики общего HTTP-кэша."""
+    return http_cache.stats()
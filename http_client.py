@@ -0,0 +1,123 @@
+"""
+Общий HTTP-клиент для всех источников новостей.
+
+Вместо отдельной aiohttp.ClientSession в каждом парсере процесс держит одну
+долгоживущую сессию: DNS-кэш, TCP/TLS-соединения и keep-alive переиспользуются
+между источниками и между вызовами /start.
+"""
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+import aiohttp
+
+import budget
+
+logger = logging.getLogger(__name__)
+
+# Единые заголовки для всех сайтов
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9",
+}
+
+# Единые таймауты: общий лимит на запрос и отдельные лимиты на соединение/чтение
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=60, connect=10, sock_read=30)
+
+# Настройки пула соединений
+CONNECTION_LIMIT = 64           # Всего одновременных соединений
+CONNECTION_LIMIT_PER_HOST = 8   # Соединений на один хост
+DNS_CACHE_TTL = 600             # Время жизни DNS-кэша, секунд
+KEEPALIVE_TIMEOUT = 120         # Сколько держать простаивающее соединение, секунд
+
+# Ограничения параллельной загрузки страниц статей (gather_by_host)
+FANOUT_LIMIT = 16               # Всего одновременных задач
+FANOUT_LIMIT_PER_HOST = 4       # Одновременных задач на один хост
+
+# aiohttp.TraceConfig для новых сессий: так метрики и бенчмарки наблюдают
+# за запросами, не меняя код источников
+trace_configs = []
+
+_session = None
+_session_loop = None
+
+
+def _create_session():
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        use_dns_cache=True,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=DEFAULT_HEADERS,
+        timeout=DEFAULT_TIMEOUT,
+        trace_configs=list(trace_configs) or None,
+    )
+
+
+def get_session():
+    """
+    Возвращает общую сессию процесса, создавая её при первом обращении.
+    Сессия привязана к текущему event loop: если цикл сменился (например,
+    повторный asyncio.run), создаётся новая.
+    """
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = _create_session()
+        _session_loop = loop
+    return _session
+
+
+async def close_session():
+    """Закрывает общую сессию (при остановке бота или в конце отдельного запуска)."""
+    global _session, _session_loop
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
+
+async def gather_by_host(urls, fetch, limit=FANOUT_LIMIT, limit_per_host=FANOUT_LIMIT_PER_HOST):
+    """
+    Параллельно выполняет fetch(url) для списка URL.
+
+    Число одновременных задач ограничено общим семафором и семафором на
+    каждый хост. Повторяющиеся URL обрабатываются один раз. Результаты
+    возвращаются в том же порядке, что и urls.
+
+    Если источник выполняется со сроком (budget.with_budget), задачи, не
+    завершившиеся за FANOUT_MARGIN секунд до его конца, отменяются, а их
+    результат — None.
+    """
+    total_semaphore = asyncio.Semaphore(limit)
+    host_semaphores = {}
+
+    async def run(url):
+        host = urlsplit(url).hostname
+        host_semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(limit_per_host))
+        async with host_semaphore, total_semaphore:
+            return await fetch(url)
+
+    unique_urls = list(dict.fromkeys(urls))
+    timeout = budget.remaining(budget.FANOUT_MARGIN)
+    if timeout is None or not unique_urls:
+        results = await asyncio.gather(*(run(url) for url in unique_urls))
+    else:
+        tasks = [asyncio.ensure_future(run(url)) for url in unique_urls]
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            budget.mark_truncated()
+            logger.warning(f"Срок источника истекает: не дождались {len(pending)} из {len(tasks)} страниц")
+        results = [None if task in pending else task.result() for task in tasks]
+
+    by_url = dict(zip(unique_urls, results))
+    return [by_url[url] for url in urls]
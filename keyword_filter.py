@@ -0,0 +1,101 @@
+"""
+Фильтр новостей по ключевым словам.
+
+Списки KEYWORDS и EXCLUDED_KEYWORDS компилируются один раз при импорте в
+два регулярных выражения (по одному на список), поэтому проверка текста —
+один проход вместо перебора ~170 слов с lower() на каждой итерации.
+Регистр и буква «ё» нормализуются: «Обрушение», «обрушение» и «ОБРУШЕНИЕ»
+совпадают, «замёрзшие трубы» находится и в тексте «замерзшие трубы».
+"""
+import hashlib
+import re
+
+import tracing
+from config import KEYWORDS, EXCLUDED_KEYWORDS
+
+
+def normalize(text):
+    """Приводит текст к нижнему регистру и заменяет «ё» на «е»."""
+    return text.lower().replace("ё", "е")
+
+
+def _trie_regex(node):
+    """Превращает префиксное дерево слов в регулярное выражение без лишних ветвлений."""
+    is_end = "" in node
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # Продолжение слова необязательно, если на этом узле уже заканчивается другое слово;
+    # жадный «?» сначала пробует более длинную фразу («лесной пожар» раньше «лесной»)
+    return f"(?:{body})?" if is_end else body
+
+
+def _compile(keywords):
+    """
+    Собирает список слов в одно регулярное выражение по префиксному дереву
+    (аналог автомата Ахо — Корасик средствами re): общие начала слов
+    проверяются один раз. Возвращает шаблон и словарь
+    «нормализованное слово -> исходное слово».
+    """
+    originals = {}
+    for keyword in keywords:
+        originals.setdefault(normalize(keyword), keyword)
+
+    if not originals:
+        return None, originals
+
+    trie = {}
+    for keyword in originals:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    return re.compile(_trie_regex(trie)), originals
+
+
+INCLUDE_PATTERN, _INCLUDE_ORIGINALS = _compile(KEYWORDS)
+EXCLUDE_PATTERN, _EXCLUDE_ORIGINALS = _compile(EXCLUDED_KEYWORDS)
+
+# Отпечаток списков слов: меняется при любом изменении KEYWORDS или EXCLUDED_KEYWORDS
+FINGERPRINT = hashlib.blake2b(
+    "\n".join([*sorted(_INCLUDE_ORIGINALS), "", *sorted(_EXCLUDE_ORIGINALS)]).encode(),
+    digest_size=8,
+).hexdigest()
+
+
+def _search(pattern, texts):
+    return pattern is not None and any(pattern.search(text) for text in texts)
+
+
+def _find(pattern, originals, texts):
+    found = {}
+    if pattern is None:
+        return []
+    for text in texts:
+        if text:
+            for match in pattern.finditer(normalize(text)):
+                found.setdefault(originals[match.group()], None)
+    return list(found)
+
+
+def find_keywords(*texts):
+    """Возвращает список ключевых слов (в исходном написании), найденных в текстах."""
+    return _find(INCLUDE_PATTERN, _INCLUDE_ORIGINALS, texts)
+
+
+def find_excluded(*texts):
+    """Возвращает список стоп-слов (в исходном написании), найденных в текстах."""
+    return _find(EXCLUDE_PATTERN, _EXCLUDE_ORIGINALS, texts)
+
+
+def is_relevant(*texts):
+    """
+    Проверяет, подходит ли новость: хотя бы в одном из текстов (заголовок,
+    описание) есть ключевое слово и ни в одном нет стоп-слова.
+    """
+    with tracing.span("is_relevant", "filter"):
+        normalized = [normalize(text) for text in texts if text]
+        return _search(INCLUDE_PATTERN, normalized) and not _search(EXCLUDE_PATTERN, normalized)
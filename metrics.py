@@ -0,0 +1,414 @@
+"""
+Метрики источников новостей.
+
+Для каждого источника считаются HTTP-запросы (по кодам ответа), загруженные
+байты, гистограмма времени HTTP-запросов, время разбора страниц, число
+записей-кандидатов (разобранные элементы ленты, списка или стены VK) и
+отобранных новостей, ошибки. Запрос относится к источнику, в сроке которого
+выполняется (budget.current_source); запросы вне источников попадают в
+source="other".
+
+Счётчики копятся с запуска процесса и отдельно для последнего сбора каждого
+источника (last_runs). Они отдаются в текстовом формате Prometheus на
+локальном HTTP-эндпоинте (METRICS_HOST:METRICS_PORT, путь /metrics; если
+порт задан) и кратко — командой бота /stats. Запись метрики — несколько сложений в
+словарях; текст для Prometheus собирается только при запросе эндпоинта.
+"""
+import asyncio
+import bisect
+import functools
+import logging
+import time
+from collections import Counter
+
+import aiohttp
+
+import budget
+
+OTHER = "other"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+CIRCUIT_STATES = ("closed", "open", "half_open")
+
+# Границы гистограмм, секунд
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+RUN_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 40, 60)
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами для каждого значения метки."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = {}
+        self.sums = Counter()
+
+    def observe(self, label, value):
+        counts = self.counts.get(label)
+        if counts is None:
+            counts = self.counts[label] = [0] * (len(self.buckets) + 1)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[label] += value
+
+
+class SourceRun:
+    """Счётчики одного сбора источника."""
+
+    __slots__ = ("started", "duration", "requests", "bytes", "parse_time", "candidates", "matched", "errors", "outcome")
+
+    def __init__(self):
+        self.started = time.time()
+        self.duration = 0.0
+        self.requests = 0
+        self.bytes = 0
+        self.parse_time = 0.0
+        self.candidates = 0
+        self.matched = 0
+        self.errors = 0
+        self.outcome = None
+
+
+class Metrics:
+    """Счётчики всех источников с запуска процесса."""
+
+    def __init__(self):
+        self.requests = Counter()       # (источник, код ответа) -> запросов
+        self.errors = Counter()         # (источник, вид ошибки) -> ошибок
+        self.bytes = Counter()          # источник -> байт
+        self.parse_seconds = Counter()  # источник -> секунд разбора
+        self.parse_calls = Counter()
+        self.candidates = Counter()
+        self.matched = Counter()
+        self.runs = Counter()           # (источник, итог сбора) -> сборов
+        self.retries = Counter()        # источник -> повторов запросов
+        self.circuit_states = {}        # хост -> состояние автомата отключения
+        self.circuit_transitions = Counter()    # (хост, новое состояние) -> переходов
+        self.host_rates = {}            # хост -> текущий темп запросов, в секунду
+        self.hedges = Counter()         # хост -> отправленных дублей запросов
+        self.hedge_wins = Counter()     # хост -> дублей, ответивших раньше исходного запроса
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.run_duration = Histogram(RUN_BUCKETS)
+        self.current = {}               # источник -> SourceRun идущего сбора
+        self.last_runs = {}             # источник -> SourceRun последнего сбора
+
+
+_metrics = Metrics()
+
+# Функции, добавляющие в render семейства метрик других модулей
+_collectors = []
+
+_server = None
+
+
+def _source():
+    source = budget.current_source() or OTHER
+    return source, _metrics.current.get(source)
+
+
+def record_request(status, elapsed):
+    """HTTP-запрос текущего источника: код ответа (или "error") и время в секундах."""
+    source, run = _source()
+    _metrics.requests[source, str(status)] += 1
+    _metrics.latency.observe(source, elapsed)
+    if run is not None:
+        run.requests += 1
+
+
+def record_error(kind):
+    """Ошибка текущего источника вида kind ("timeout", "connection", "status", ...)."""
+    source, run = _source()
+    _metrics.errors[source, kind] += 1
+    if run is not None:
+        run.errors += 1
+
+
+def record_bytes(size):
+    """Прочитанные байты тела ответа текущего источника."""
+    source, run = _source()
+    _metrics.bytes[source] += size
+    if run is not None:
+        run.bytes += size
+
+
+def record_parse(elapsed):
+    """Время разбора страницы текущим источником, секунд."""
+    source, run = _source()
+    _metrics.parse_seconds[source] += elapsed
+    _metrics.parse_calls[source] += 1
+    if run is not None:
+        run.parse_time += elapsed
+
+
+def record_retry():
+    """Повтор HTTP-запроса текущим источником."""
+    source, _ = _source()
+    _metrics.retries[source] += 1
+
+
+def set_circuit_state(host, state):
+    """Новое состояние автомата отключения хоста (closed, open, half_open)."""
+    _metrics.circuit_states[host] = state
+    _metrics.circuit_transitions[host, state] += 1
+
+
+def set_host_rate(host, rate):
+    """Текущий темп запросов к хосту, запросов в секунду."""
+    _metrics.host_rates[host] = rate
+
+
+def record_hedge(host, won=False):
+    """Дубль медленного запроса к хосту; won — дубль ответил раньше исходного."""
+    if won:
+        _metrics.hedge_wins[host] += 1
+    else:
+        _metrics.hedges[host] += 1
+
+
+def add_collector(collect):
+    """
+    Добавляет в render метрики, которые считаются на момент запроса:
+    collect() возвращает кортежи (имя, описание, тип, имена меток,
+    {значения меток: значение}).
+    """
+    _collectors.append(collect)
+
+
+def count_candidates(count):
+    """Число записей, разобранных источником до фильтров по дате и ключевым словам."""
+    source, run = _source()
+    _metrics.candidates[source] += count
+    if run is not None:
+        run.candidates += count
+
+
+async def _on_request_start(session, context, params):
+    context.started = time.perf_counter()
+
+
+async def _on_request_end(session, context, params):
+    record_request(params.response.status, time.perf_counter() - context.started)
+    if params.response.status >= 400:
+        record_error("status")
+
+
+async def _on_request_exception(session, context, params):
+    record_request("error", time.perf_counter() - context.started)
+    record_error("timeout" if isinstance(params.exception, asyncio.TimeoutError) else "connection")
+
+
+async def _on_response_chunk_received(session, context, params):
+    # Событие приходит при чтении тела целиком (read, text, json);
+    # потоковое чтение учитывается через record_bytes
+    record_bytes(len(params.chunk))
+
+
+def trace_config():
+    """aiohttp.TraceConfig, записывающий запросы, ошибки и байты источников."""
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(_on_request_start)
+    config.on_request_end.append(_on_request_end)
+    config.on_request_exception.append(_on_request_exception)
+    config.on_response_chunk_received.append(_on_response_chunk_received)
+    return config
+
+
+_trace_config = trace_config()
+
+
+def install():
+    """Подключает запись HTTP-метрик к сессиям http_client, созданным после вызова."""
+    import http_client
+    if _trace_config not in http_client.trace_configs:
+        http_client.trace_configs.append(_trace_config)
+
+
+def instrument(source_id, fetch):
+    """
+    Оборачивает fetch(*args) источника source_id (обычно уже обёрнутый
+    budget.with_budget): каждый вызов записывается как сбор источника —
+    длительность, итог и число отобранных новостей.
+    """
+    @functools.wraps(fetch)
+    async def run(*args, **kwargs):
+        current = _metrics.current[source_id] = SourceRun()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            news_list = await fetch(*args, **kwargs)
+            current.matched = len(news_list)
+            outcome = "truncated" if budget.was_truncated(source_id) else "ok"
+            return news_list
+        except budget.BudgetExceeded:
+            outcome = "timeout"
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            _finish(source_id, current, outcome, time.perf_counter() - started)
+
+    return run
+
+
+def _finish(source_id, run, outcome, duration):
+    if _metrics.current.get(source_id) is run:
+        del _metrics.current[source_id]
+    if outcome in ("timeout", "error"):
+        _metrics.errors[source_id, outcome] += 1
+        run.errors += 1
+    run.duration = duration
+    run.outcome = outcome
+    _metrics.matched[source_id] += run.matched
+    _metrics.runs[source_id, outcome] += 1
+    _metrics.run_duration.observe(source_id, duration)
+    _metrics.last_runs[source_id] = run
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not isinstance(values, tuple):
+        values = (values,)
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _counter(lines, name, help_text, labels, values, kind="counter"):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for key, value in sorted(values.items()):
+        lines.append(f"{name}{{{_labels(labels, key)}}} {value}")
+
+
+def _histogram(lines, name, help_text, histogram):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for source, counts in sorted(histogram.counts.items()):
+        label = _labels(("source",), source)
+        total = 0
+        for bound, count in zip((*histogram.buckets, "+Inf"), counts):
+            total += count
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {total}')
+        lines.append(f"{name}_sum{{{label}}} {histogram.sums[source]}")
+        lines.append(f"{name}_count{{{label}}} {total}")
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus."""
+    m = _metrics
+    lines = []
+    _counter(lines, "news_http_requests_total", "HTTP-запросы источника по кодам ответа",
+             ("source", "status"), m.requests)
+    _histogram(lines, "news_http_request_duration_seconds", "Время HTTP-запроса", m.latency)
+    _counter(lines, "news_http_response_bytes_total", "Прочитанные байты тел ответов", ("source",), m.bytes)
+    _counter(lines, "news_parse_seconds_total", "Время разбора страниц", ("source",), m.parse_seconds)
+    _counter(lines, "news_parse_calls_total", "Разборы страниц", ("source",), m.parse_calls)
+    _counter(lines, "news_candidates_total", "Разобранные записи до фильтров", ("source",), m.candidates)
+    _counter(lines, "news_matched_total", "Отобранные новости", ("source",), m.matched)
+    _counter(lines, "news_errors_total", "Ошибки источника по видам", ("source", "kind"), m.errors)
+    _counter(lines, "news_http_retries_total", "Повторы HTTP-запросов", ("source",), m.retries)
+    _counter(lines, "news_circuit_state", "Состояние автомата отключения хоста (1 — текущее)",
+             ("host", "state"),
+             {(host, state): int(state == current)
+              for host, current in m.circuit_states.items() for state in CIRCUIT_STATES},
+             kind="gauge")
+    _counter(lines, "news_circuit_transitions_total", "Переходы автомата отключения хоста",
+             ("host", "state"), m.circuit_transitions)
+    _counter(lines, "news_host_rate_limit", "Текущий темп запросов к хосту, в секунду",
+             ("host",), m.host_rates, kind="gauge")
+    _counter(lines, "news_hedges_total", "Дубли медленных запросов", ("host",), m.hedges)
+    _counter(lines, "news_hedge_wins_total", "Дубли, ответившие раньше исходного запроса", ("host",), m.hedge_wins)
+    _counter(lines, "news_source_runs_total", "Сборы источника по итогам", ("source", "outcome"), m.runs)
+    _histogram(lines, "news_source_run_duration_seconds", "Длительность сбора источника", m.run_duration)
+
+    last_runs = sorted(m.last_runs.items())
+    _counter(lines, "news_source_last_run_timestamp_seconds", "Время начала последнего сбора",
+             ("source",), {source: round(run.started, 3) for source, run in last_runs}, kind="gauge")
+    _counter(lines, "news_source_last_run_duration_seconds", "Длительность последнего сбора",
+             ("source",), {source: run.duration for source, run in last_runs}, kind="gauge")
+    _counter(lines, "news_source_last_run_items", "Записи последнего сбора",
+             ("source", "stage"),
+             {(source, stage): getattr(run, stage) for source, run in last_runs for stage in ("candidates", "matched")},
+             kind="gauge")
+
+    for collect in _collectors:
+        for name, help_text, kind, labels, values in collect():
+            _counter(lines, name, help_text, labels, values, kind=kind)
+    return "\n".join(lines) + "\n"
+
+
+def _format_size(size):
+    return f"{size / 1024:.0f} КБ" if size >= 1024 else f"{size} Б"
+
+
+def summary():
+    """Краткая сводка последних сборов источников для команды /stats."""
+    if not _metrics.last_runs:
+        return "Сбор новостей ещё не запускался."
+
+    lines = ["📊 Последний сбор по источникам:"]
+    runs = sorted(_metrics.last_runs.items(), key=lambda item: item[1].duration, reverse=True)
+    for source, run in runs:
+        outcome = "" if run.outcome == "ok" else f", {run.outcome}"
+        lines.append(
+            f"<b>{source}</b>: {run.duration:.1f} с{outcome}, запросов {run.requests}, "
+            f"{_format_size(run.bytes)}, разбор {run.parse_time:.2f} с, "
+            f"записей {run.candidates} → новостей {run.matched}, ошибок {run.errors}"
+        )
+    return "\n".join(lines)
+
+
+def stats():
+    """Счётчики последних сборов источников."""
+    return {
+        source: {
+            "duration": round(run.duration, 3),
+            "outcome": run.outcome,
+            "requests": run.requests,
+            "bytes": run.bytes,
+            "parse_time": round(run.parse_time, 3),
+            "candidates": run.candidates,
+            "matched": run.matched,
+            "errors": run.errors,
+        }
+        for source, run in _metrics.last_runs.items()
+    }
+
+
+async def _handle_metrics(request):
+    from aiohttp import web
+    return web.Response(body=render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def start_server(host, port):
+    """
+    Запускает эндпоинт http://host:port/metrics. Если порт занят, бот
+    работает без эндпоинта: метрики по-прежнему доступны командой /stats.
+    """
+    global _server
+    from aiohttp import web
+
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        await runner.cleanup()
+        logger.warning(f"Эндпоинт метрик не запущен ({host}:{port}): {e}")
+        return
+    _server = runner
+    logger.info(f"Метрики Prometheus: http://{host}:{port}/metrics")
+
+
+async def stop_server():
+    """Останавливает эндпоинт метрик."""
+    global _server
+    if _server is not None:
+        await _server.cleanup()
+        _server = None
@@ -0,0 +1,118 @@
+"""
+Кэш результатов сбора новостей по источникам.
+
+Если несколько пользователей одновременно отправляют /start, источник
+опрашивается один раз, а остальные вызовы ждут того же запроса
+(single-flight). Свежий результат (моложе NEWS_CACHE_TTL) отдаётся сразу.
+Устаревший, но не старше NEWS_CACHE_TTL + NEWS_CACHE_STALE_TTL, тоже
+отдаётся сразу, а обновление запускается в фоне (stale-while-revalidate).
+Кэш ведётся отдельно для каждого источника, поэтому медленный источник не
+задерживает и не сбрасывает остальные.
+
+Отмена одного ожидающего (например, /start, у которого истёк срок) не
+затрагивает остальных: общий запрос отменяется, только если его больше
+никто не ждёт.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from config import NEWS_CACHE_TTL, NEWS_CACHE_STALE_TTL
+
+logger = logging.getLogger(__name__)
+
+
+class SourceCache:
+    """Кэш результата одного источника."""
+
+    def __init__(self, name, fetch, ttl=NEWS_CACHE_TTL, stale_ttl=NEWS_CACHE_STALE_TTL):
+        self.name = name
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.value = None
+        self.updated = None
+        self._refresh_task = None
+        self._waiters = Counter()     # задача обновления -> число ожидающих
+
+    @property
+    def age(self):
+        """Возраст сохранённого результата в секундах (None, если его нет)."""
+        return None if self.updated is None else time.monotonic() - self.updated
+
+    async def _refresh(self, *args):
+        try:
+            value = await self.fetch(*args)
+        except Exception as e:
+            logger.error(f"Ошибка обновления источника {self.name}: {e}")
+            if self.value is None:
+                raise
+            return self.value
+
+        self.value = value
+        self.updated = time.monotonic()
+        return value
+
+    def refresh(self, *args):
+        """
+        Запускает обновление, если оно ещё не идёт, и возвращает задачу.
+        Все вызывающие получают одну и ту же задачу.
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh(*args))
+        return self._refresh_task
+
+    async def wait_refresh(self, *args):
+        """
+        Запускает обновление (или присоединяется к идущему) и ждёт его
+        результата. Если ожидающего отменили, а других ожидающих нет,
+        обновление тоже отменяется; сохранённый результат остаётся.
+        """
+        task = self.refresh(*args)
+        self._waiters[task] += 1
+        try:
+            # shield: отмена одного ожидающего не отменяет общий запрос
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                task.cancel()
+                if self._refresh_task is task:
+                    # Следующий запрос начнёт новое обновление, а не дождётся отменённого
+                    self._refresh_task = None
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    async def get(self, *args):
+        """
+        Возвращает результат источника; аргументы передаются в fetch,
+        если нужен запрос.
+        """
+        age = self.age
+
+        if age is not None and age < self.ttl:
+            return list(self.value)
+
+        if age is not None and age < self.ttl + self.stale_ttl:
+            self.refresh(*args)
+            return list(self.value)
+
+        return list(await self.wait_refresh(*args))
+
+
+_caches = {}
+
+
+def source_cache(name, fetch):
+    """Возвращает кэш источника name, создавая его при первом обращении."""
+    if name not in _caches:
+        _caches[name] = SourceCache(name, fetch)
+    return _caches[name]
+
+
+def ages():
+    """Возраст результата каждого источника в секундах."""
+    return {name: cache.age for name, cache in _caches.items()}
@@ -0,0 +1,97 @@
+"""
+Запись о новости, общая для всех источников.
+
+Источники возвращают списки NewsItem. Время публикации хранится как
+Unix-время (целое число секунд), поэтому сортировка и отбор по возрасту
+идут по целым числам, а строка даты формируется только при выводе
+(format_date). Дата и ссылка разбираются один раз, при создании записи:
+наивный datetime считается временем часового пояса config.TIMEZONE,
+ссылка приводится к каноническому виду.
+
+Текущее время источники берут из now() и cutoff(); часы можно подменить
+(set_clock), чтобы воспроизвести записанные ответы сайтов как в момент
+записи.
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from candidates import canonical_url
+from config import TIMEZONE
+
+DATE_FORMAT = "%d.%m.%y %H:%M"
+DAY = 24 * 60 * 60
+
+LOCAL_TZ = pytz.timezone(TIMEZONE)
+
+_clock = time.time
+
+
+def set_clock(clock=None):
+    """Подменяет часы: clock() возвращает Unix-время; None — системные часы."""
+    global _clock
+    _clock = clock or time.time
+
+
+def now():
+    """Текущее время в LOCAL_TZ."""
+    return datetime.fromtimestamp(_clock(), LOCAL_TZ)
+
+
+def to_timestamp(published):
+    """Unix-время из datetime (наивный — в LOCAL_TZ) или числа секунд."""
+    if isinstance(published, (int, float)):
+        return int(published)
+    if published.tzinfo is None:
+        published = LOCAL_TZ.localize(published)
+    return int(published.timestamp())
+
+
+def cutoff(seconds=DAY):
+    """Unix-время seconds секунд назад: более старые новости отбрасываются."""
+    return int(_clock()) - seconds
+
+
+def day_start(days_ago=0):
+    """Unix-время начала суток days_ago дней назад в LOCAL_TZ."""
+    day = now().date() - timedelta(days=days_ago)
+    return to_timestamp(datetime(day.year, day.month, day.day))
+
+
+class NewsItem:
+    """Новость: Unix-время публикации, id источника, каноническая ссылка и заголовок."""
+
+    __slots__ = ("timestamp", "source", "link", "title")
+
+    def __init__(self, timestamp, source, link, title):
+        self.timestamp = timestamp
+        self.source = source
+        self.link = link
+        self.title = title
+
+    @classmethod
+    def create(cls, source, title, link, published):
+        """Запись из сырых данных источника; published — datetime или Unix-время."""
+        return cls(to_timestamp(published), source, canonical_url(link), title)
+
+    @property
+    def published(self):
+        """Время публикации в LOCAL_TZ."""
+        return datetime.fromtimestamp(self.timestamp, LOCAL_TZ)
+
+    def format_date(self, fmt=DATE_FORMAT):
+        return self.published.strftime(fmt)
+
+    def __eq__(self, other):
+        if not isinstance(other, NewsItem):
+            return NotImplemented
+        return (self.timestamp, self.source, self.link, self.title) == (
+            other.timestamp, other.source, other.link, other.title
+        )
+
+    def __hash__(self):
+        return hash((self.timestamp, self.source, self.link, self.title))
+
+    def __repr__(self):
+        return f"NewsItem({self.format_date()!r}, {self.source!r}, {self.link!r}, {self.title!r})"
@@ -0,0 +1,174 @@
+"""
+Разбор страниц вне event loop.
+
+BeautifulSoup, lxml и feedparser занимают процессор, а event loop один на
+весь бот: пока разбирается страница, не обрабатываются ни обновления
+Telegram, ни чтение других HTTP-ответов. Поэтому функции разбора
+выполняются в пуле (PARSE_POOL: потоки или процессы, PARSE_WORKERS
+исполнителей), а в event loop возвращаются только небольшие извлечённые
+записи. PARSE_POOL=inline возвращает разбор в event loop.
+
+По умолчанию пул процессов: разбор дерева BeautifulSoup и lxml держит GIL,
+и пул потоков разгружает event loop, но не занимает больше одного ядра.
+Процессы запускаются через spawn (не наследуют event loop и открытые
+соединения), но без импорта запущенного модуля: обычно spawn заново
+импортирует его в каждом процессе как __mp_main__, а parser.py при импорте
+создаёт бота. Функция разбора передаётся по имени и импортируется в процессе
+по требованию, поэтому она и её результат должны поддерживать pickle
+(функции уровня модуля, не из запущенного скрипта, возвращающие списки
+словарей) и не зависеть от состояния процесса: contextvars и часы
+news_item.set_clock в дочерние процессы не попадают, поэтому текущее время
+учитывается уже в event loop. В пуле потоков функция выполняется в копии
+contextvars вызывающей задачи (трасса, срок источника).
+
+LoopLagMonitor измеряет задержку event loop: насколько позже положенного
+просыпается корутина, которая спит по interval секунд.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import statistics
+import sys
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import metrics
+import tracing
+from config import PARSE_POOL, PARSE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def make_executor(mode, workers):
+    """Пул для режима mode ("process", "thread"); None для "inline"."""
+    if mode == "inline":
+        return None
+    if mode == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+    if mode == "process":
+        return ParseProcessPool(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    raise ValueError(f"Неизвестный режим пула разбора: {mode!r}")
+
+
+class ParseProcessPool(ProcessPoolExecutor):
+    """
+    Пул процессов, которые не импортируют запущенный модуль: пока процесс
+    запускается, вместо __main__ подставлен пустой модуль, и spawn не передаёт
+    процессу путь к нему. Процессы запускаются в потоке event loop.
+    """
+
+    def _spawn_process(self):
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            super()._spawn_process()
+        finally:
+            sys.modules["__main__"] = main
+
+
+def get_executor():
+    """Общий пул разбора; None, если разбор выполняется в event loop."""
+    global _executor
+    if _executor is None and PARSE_POOL != "inline":
+        _executor = make_executor(PARSE_POOL, PARSE_WORKERS)
+        logger.info(f"Пул разбора: {PARSE_POOL}, исполнителей: {PARSE_WORKERS}")
+    return _executor
+
+
+def _timed(parse, *args, **kwargs):
+    """(время выполнения в секундах, результат parse); время меряется там, где идёт разбор."""
+    started = time.perf_counter()
+    result = parse(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+async def run_parse(parse, *args, **kwargs):
+    """
+    Выполняет parse(*args, **kwargs) в пуле разбора и возвращает результат.
+    Время разбора (без ожидания свободного исполнителя) записывается в метрики источника.
+    """
+    executor = get_executor()
+    with tracing.span(parse.__qualname__, "parse") as span:
+        if executor is None:
+            elapsed, result = _timed(parse, *args, **kwargs)
+        else:
+            call = functools.partial(_timed, parse, *args, **kwargs)
+            if isinstance(executor, ThreadPoolExecutor):
+                # run_in_executor не передаёт contextvars в поток
+                call = functools.partial(contextvars.copy_context().run, call)
+            loop = asyncio.get_running_loop()
+            elapsed, result = await loop.run_in_executor(executor, call)
+        span.set(parse_ms=round(elapsed * 1000, 1))
+    metrics.record_parse(elapsed)
+    return result
+
+
+def shutdown():
+    """Останавливает пул разбора."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class LoopLagMonitor:
+    """
+    Замер задержки event loop во время сбора:
+
+        async with LoopLagMonitor() as lag:
+            ...
+        logger.info(lag.stats())
+
+    В асинхронных генераторах удобнее start() и stop() в try/finally.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+        self._started = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - self._started - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        # Если loop был занят до самого конца, замер не успел проснуться:
+        # незавершённый интервал тоже учитывается
+        overdue = asyncio.get_running_loop().time() - (self._started or 0) - self.interval
+        if self._started is not None and overdue > 0:
+            self.lags.append(overdue)
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.stop()
+
+    def stats(self):
+        """Средняя, 99-й перцентиль и максимальная задержка в миллисекундах."""
+        if not self.lags:
+            return {"samples": 0}
+        lags = sorted(self.lags)
+        return {
+            "samples": len(lags),
+            "mean_ms": round(statistics.mean(lags) * 1000, 1),
+            "p99_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000, 1),
+            "max_ms": round(lags[-1] * 1000, 1),
+        }
@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta
+import sys
 
 from aiogram import Bot, Dispatcher, types
 from aiogram.enums import ParseMode
@@ -8,23 +8,24 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.types import Message
 from aiogram.filters import Command
 
-from config import TELEGRAM_BOT_TOKEN, CHAT_ID, VK_ACCESS_TOKEN, VK_GROUPS, KEYWORDS, EXCLUDED_KEYWORDS
-
-# Сайты
-from Sites.bloknot_volgograd import fetch_bloknot_news
-from Sites.gorvesti import fetch_gorvesti_news
-from Sites.mtv_online import fetch_mtv_news
-from Sites.novostivolgograda import fetch_novostivolgograda_news
-from Sites.riac34 import fetch_riac34_news
-from Sites.v1 import fetch_v1_news
-from Sites.v102 import fetch_v102_news
-from Sites.volgograd_kp import fetch_kp_news
-from Sites.vpravda import fetch_vpravda_news
-
-import requests
+from config import (
+    TELEGRAM_BOT_TOKEN, CHAT_ID,
+    BACKGROUND_COLLECTION, STREAM_WINDOW, COLLECT_DEADLINE,
+    METRICS_HOST, METRICS_PORT,
+)
 
-API_VERSION = "5.131"
-VK_API_URL = "https://api.vk.com/method/wall.get"
+from budget import was_truncated, with_budget
+from collector import BackgroundCollector
+from delivery import MESSAGE_LIMIT, DeliveryQueue, escape_html, message_length
+from http_client import get_session, close_session
+import metrics
+import resilience
+from news_cache import source_cache
+import parse_pool
+from parse_pool import LoopLagMonitor
+import tracing
+from seen_store import dedupe
+from sources import enabled_sources
 
 # Настройка логгера
 logging.basicConfig(level=logging.INFO)
@@ -36,87 +37,25 @@ bot = Bot(
     default=DefaultBotProperties(parse_mode=ParseMode.HTML)
 )
 dp = Dispatcher()
+delivery = DeliveryQueue(bot)
 
 
-def parse_date(timestamp):
-    try:
-        post_date = datetime.fromtimestamp(timestamp)
-        return post_date.strftime("%d.%m.%y %H:%M")
-    except Exception as e:
-        logger.error(f"Ошибка при преобразовании даты: {e}")
-        return None
+# HTTP-запросы источников записываются в метрики (metrics.render, /stats)
+# и, если задан TRACE_DIR, в трассу сбора
+metrics.install()
+tracing.install()
 
+# Включённые источники новостей (sources.REGISTRY): каждый парсер принимает
+# общую HTTP-сессию, загружается при первом вызове и выполняется не дольше
+# своего срока (config.SOURCE_BUDGETS); каждый сбор записывается в метрики
+SOURCES = {
+    source_id: metrics.instrument(source_id, with_budget(source_id, source))
+    for source_id, source in enabled_sources().items()
+}
 
-async def fetch_vk_posts():
-    news_list = []
-    one_day_ago = datetime.now() - timedelta(days=1)
 
-    for group in VK_GROUPS:
-        try:
-            response = requests.get(
-                VK_API_URL,
-                params={
-                    "owner_id": f"-{group.replace('club', '')}" if group.isdigit() else group,
-                    "count": 10,
-                    "access_token": VK_ACCESS_TOKEN,
-                    "v": API_VERSION,
-                },
-                timeout=10,
-            )
-            data = response.json()
-
-            if "response" in data:
-                for post in data["response"]["items"]:
-                    text = post.get("text", "").strip()
-                    post_id = post.get("id")
-                    group_id = post.get("owner_id")
-                    date = post.get("date")
-                    link = f"https://vk.com/wall{group_id}_{post_id}"
-
-                    formatted_date = parse_date(date)
-                    if not formatted_date:
-                        continue
-
-                    post_date = datetime.fromtimestamp(date)
-                    if post_date < one_day_ago:
-                        continue
-
-                    text_lower = text.lower()
-                    if (
-                        any(keyword.lower() in text_lower for keyword in KEYWORDS)
-                        and not any(excluded.lower() in text_lower for excluded in EXCLUDED_KEYWORDS)
-                    ):
-                        first_line = text.split("\n")[0] if "\n" in text else text
-                        news_list.append({
-                            "title": first_line,
-                            "link": link,
-                            "date": formatted_date,
-                        })
-
-            elif "error" in data:
-                logger.error(f"Ошибка от {group}: [{data['error']['error_code']}] {data['error']['error_msg']}")
-            await asyncio.sleep(0.5)
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка запроса для {group}: {e}")
-
-    return news_list
-
-
-async def collect_all_news():
-    tasks = [
-        fetch_bloknot_news(),
-        fetch_gorvesti_news(),
-        fetch_mtv_news(),
-        fetch_novostivolgograda_news(),
-        fetch_riac34_news(),
-        fetch_v1_news(),
-        fetch_v102_news(),
-        fetch_kp_news(),
-        fetch_vpravda_news(),
-        fetch_vk_posts(),
-    ]
-
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+def merge_news(results, seen_keys=None):
+    """Объединяет результаты источников (списки NewsItem) и сортирует их по времени публикации."""
     all_news = []
 
     for result in results:
@@ -125,42 +64,243 @@ async def collect_all_news():
             continue
         all_news.extend(result)
 
-    # Фильтрация по формату даты
-    valid_news = []
-    for news in all_news:
+    # Сортировка от старых к новым
+    all_news.sort(key=lambda news: news.timestamp)
+
+    # Одна и та же статья может прийти из нескольких источников
+    return dedupe(all_news, seen_keys)
+
+
+# Модули со счётчиками; кэши источников загружаются вместе с парсерами
+# сайтов, поэтому выводится статистика только уже загруженных модулей
+CACHE_STATS = (
+    ("date_cache", "Кэш дат публикации"),
+    ("article_date", "Загрузка дат со страниц статей"),
+    ("http_cache", "HTTP-кэш лент и списков"),
+    ("seen_store", "Хранилище отправленных новостей"),
+    ("cursor_store", "Курсоры каналов Telegram и групп VK"),
+    ("metrics", "Последний сбор по источникам"),
+    ("resilience", "Хосты: состояние, время ответа, дубли запросов"),
+)
+
+
+def log_cache_stats():
+    for module_name, label in CACHE_STATS:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            logger.info(f"{label}: {module.stats()}")
+
+
+def start_sources():
+    """
+    Запускает получение новостей всех источников; возвращает словарь
+    {задача: id источника}. Каждый источник кэшируется отдельно: одновременные
+    /start делят один запрос, а устаревший результат отдаётся сразу и
+    обновляется в фоне.
+    """
+    session = get_session()
+    return {
+        asyncio.ensure_future(source_cache(source_id, fetch).get(session)): source_id
+        for source_id, fetch in SOURCES.items()
+    }
+
+
+def cut_sources(tasks, done, pending):
+    """
+    Отменяет ожидание источников, не уложившихся в общий срок, и возвращает
+    их id вместе с id источников, вернувших неполный результат или
+    отменённых. Общий запрос источника (news_cache) отменяется, только если
+    его не ждут другие сборы.
+    """
+    for task in pending:
+        task.cancel()
+
+    cut = {tasks[task] for task in pending}
+    cut.update(tasks[task] for task in done if task.cancelled() or was_truncated(tasks[task]))
+    return [source_id for source_id in SOURCES if source_id in cut]
+
+
+def task_results(done):
+    """Результаты (или исключения) завершённых задач источников; отменённые пропускаются."""
+    return [task.exception() or task.result() for task in done if not task.cancelled()]
+
+
+async def collect_all_news(deadline=COLLECT_DEADLINE):
+    """
+    Собирает новости всех источников не дольше deadline секунд. Возвращает
+    (новости, id источников, прерванных по сроку или вернувших неполный результат).
+    С TRACE_DIR сбор трассируется (tracing.run).
+    """
+    async with tracing.run("collect_all_news"):
+        async with LoopLagMonitor() as lag:
+            tasks = start_sources()
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+            cut = cut_sources(tasks, done, pending)
+
+        valid_news = merge_news(task_results(done))
+
+    if cut:
+        logger.warning(f"Не уложились в срок: {', '.join(cut)}")
+    logger.info(f"Задержка event loop во время сбора: {lag.stats()}")
+    log_cache_stats()
+    return valid_news, cut
+
+
+async def stream_news(window=STREAM_WINDOW, deadline=COLLECT_DEADLINE, cut=None):
+    """
+    Отдаёт новости порциями по мере готовности источников. Первая порция
+    открывает окно в window секунд: всё, что успело завершиться в нём,
+    объединяется и сортируется по времени публикации. Поэтому быстрые
+    RSS-ленты уходят пользователю через секунды, а не после самого
+    медленного сайта, и внутри порции порядок хронологический.
+    Повторы между порциями отбрасываются.
+
+    Через deadline секунд оставшиеся источники отменяются; их id (и id
+    источников с неполным результатом) добавляются в список cut.
+    С TRACE_DIR сбор трассируется (tracing.run).
+    """
+    async with tracing.run("stream_news"):
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + deadline
+        tasks = start_sources()
+        pending = set(tasks)
+        finished = set()
+        seen_keys = set()
+        lag = LoopLagMonitor()
+        lag.start()
+
         try:
-            datetime.strptime(news["date"], "%d.%m.%y %H:%M")
-            valid_news.append(news)
-        except ValueError:
-            logger.error(f"Неверный формат даты: {news['date']} для: {news['title']}")
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=expires - loop.time(), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+
+                window_end = min(loop.time() + window, expires)
+                while pending and loop.time() < window_end:
+                    more, pending = await asyncio.wait(
+                        pending, timeout=window_end - loop.time(), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    done |= more
+
+                finished |= done
+                batch = merge_news(task_results(done), seen_keys)
+                if batch:
+                    yield batch
+        finally:
+            # Пользователь мог уйти раньше: незавершённые запросы не нужны
+            for task in pending:
+                task.cancel()
+            lag.stop()
+
+        stragglers = cut_sources(tasks, finished, pending)
+        if stragglers:
+            logger.warning(f"Не уложились в срок: {', '.join(stragglers)}")
+        if cut is not None:
+            cut.extend(stragglers)
+        logger.info(f"Задержка event loop во время сбора: {lag.stats()}")
+        log_cache_stats()
+
+
+async def snapshot_news(cut=None):
+    """
+    Последний сохранённый результат всех источников без новых запросов, одной
+    порцией. Как и в stream_news, повторы отбрасываются, а id источников,
+    последний сбор которых был неполным, добавляются в список cut.
+    """
+    batch = merge_news([source_cache(source_id, fetch).value or [] for source_id, fetch in SOURCES.items()])
+    if cut is not None:
+        cut.extend(source_id for source_id in SOURCES if was_truncated(source_id))
+    if batch:
+        yield batch
+
+
+def format_news(news):
+    """
+    Блок новости в разметке HTML. Заголовок и ссылка экранируются, а
+    заголовок обрезается так, чтобы блок уложился в одно сообщение.
+    """
+    def block(title):
+        return (
+            f"<b>📢 Заголовок:</b> {title}\n"
+            f"<b>🔗 Ссылка:</b> {escape_html(news.link)}\n"
+            f"<b>📅 Дата:</b> {news.format_date()}\n"
+            f"{'-' * 72}"
+        )
+
+    return block(escape_html(news.title, MESSAGE_LIMIT - message_length(block(""))))
 
-    # Сортировка от старых к новым
-    valid_news.sort(key=lambda x: datetime.strptime(x["date"], "%d.%m.%y %H:%M"))
-    return valid_news
+
+async def push_news(news_list):
+    """Отправляет новые новости из фонового сбора в CHAT_ID и ждёт доставки."""
+    delivered = await delivery.deliver(CHAT_ID, [format_news(news) for news in merge_news([news_list])])
+    if not delivered:
+        raise RuntimeError(f"не все сообщения доставлены в {CHAT_ID}")
+
+
+# Фоновый сбор включается через BACKGROUND_COLLECTION=1
+collector = BackgroundCollector(SOURCES, push_news) if BACKGROUND_COLLECTION else None
+collector_task = None
 
 
 @dp.message(Command("start"))
 async def handle_start(message: Message):
-    await message.answer(
-        "🔍 Собираю свежие новости, подождите немного...\n\n"
-        "📌 По возникшим вопросам обращаться: @Blackfox3007"
-    )
-
-    news_list = await collect_all_news()
-    if not news_list:
-        await message.answer("❗️ Новостей за последние сутки не найдено.")
-        return
-
-    seen_links = set()
-    for news in news_list:
-        if news["link"] not in seen_links:
-            seen_links.add(news["link"])
-            await message.answer(
-                f"<b>📢 Заголовок:</b> {news['title']}\n"
-                f"<b>🔗 Ссылка:</b> {news['link']}\n"
-                f"<b>📅 Дата:</b> {news['date']}\n"
-                f"{'-' * 72}"
-            )
+    cut = []
+    if collector is not None and collector.has_snapshot():
+        # Фоновый сбор собрал все источники и не отстаёт: отвечаем из снимка
+        batches = snapshot_news(cut=cut)
+    else:
+        await message.answer(
+            "🔍 Собираю свежие новости, подождите немного...\n\n"
+            "📌 По возникшим вопросам обращаться: @Blackfox3007"
+        )
+        # Каждая порция отправляется, как только готова, не дожидаясь медленных сайтов
+        batches = stream_news(cut=cut)
+
+    found = False
+    async for batch in batches:
+        # Сообщения уходят из очереди доставки, обработчик их не ждёт
+        delivery.deliver(message.chat.id, [format_news(news) for news in batch])
+        found = True
+
+    # Итоги сбора идут через ту же очередь, чтобы прийти после новостей
+    notices = []
+    if not found:
+        notices.append("❗️ Новостей за последние сутки не найдено.")
+    if cut:
+        notices.append(f"⏱ Не успели ответить полностью: {', '.join(cut)}")
+    if notices:
+        delivery.enqueue(message.chat.id, notices)
+
+
+@dp.message(Command("stats"))
+async def handle_stats(message: Message):
+    await message.answer("\n\n".join(filter(None, [metrics.summary(), resilience.summary()])))
+
+
+@dp.startup()
+async def on_startup():
+    global collector_task
+    if METRICS_PORT:
+        await metrics.start_server(METRICS_HOST, METRICS_PORT)
+    if collector is not None:
+        collector_task = asyncio.create_task(collector.run())
+
+
+@dp.shutdown()
+async def on_shutdown():
+    if collector_task is not None:
+        collector_task.cancel()
+    delivery.close()
+    logger.info(f"Доставка сообщений: {delivery.stats()}")
+    parse_pool.shutdown()
+    await metrics.stop_server()
+    # Клиент Telegram есть, только если источник уже загружался
+    telegram = sys.modules.get("Sites.telegram_channels")
+    if telegram is not None:
+        await telegram.close_client()
+    await close_session()
 
 
 if __name__ == "__main__":
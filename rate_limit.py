@@ -0,0 +1,52 @@
+"""
+Ограничение частоты запросов.
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Ограничитель «ведро с токенами»: в среднем не больше rate запросов в
+    секунду, с кратковременными всплесками до capacity запросов.
+
+    Каждый вызов acquire() резервирует токен; если ведро пусто, корутина
+    ждёт ровно столько, сколько нужно для его накопления. Блокировка не
+    нужна: резервирование происходит синхронно внутри одного event loop.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    Ведро токенов, темп которого подстраивается под сервер: когда сервер
+    просит сбавить темп (429, 503), rate уменьшается вдвое, но не ниже
+    min_rate, а после каждого успешного ответа растёт на step (по умолчанию
+    двадцатая часть исходного), пока не вернётся к исходному.
+    """
+
+    def __init__(self, rate, capacity=None, min_rate=0.5, step=None):
+        super().__init__(rate, capacity)
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.step = step or rate / 20
+
+    def slow_down(self):
+        self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self):
+        self.rate = min(self.max_rate, self.rate + self.step)
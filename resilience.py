@@ -0,0 +1,383 @@
+"""
+Устойчивость запросов к сайтам.
+
+Все запросы источников идут через request(): для каждого хоста действуют
+
+- ведро токенов (HOST_RATE_LIMIT запросов в секунду), темп которого
+  снижается, когда хост отвечает 429 или 503, и постепенно восстанавливается;
+- повторы идемпотентных запросов (GET, HEAD) при сетевой ошибке, таймауте
+  или ответе 5xx/429: не больше RETRY_ATTEMPTS, с экспоненциальной паузой
+  и случайным разбросом (full jitter), без выхода за срок источника;
+- автомат отключения (circuit breaker): после BREAKER_FAILURES ошибок
+  подряд хост пропускается на BREAKER_COOLDOWN секунд — запросы к нему
+  сразу завершаются CircuitOpenError, не дожидаясь таймаута. По истечении
+  паузы пропускается один пробный запрос: успех возвращает хост в работу,
+  ошибка снова отключает его;
+- хеджирование GET-запросов (HEDGE_REQUESTS=1): если хост не ответил за
+  время, в которое укладываются HEDGE_PERCENTILE его недавних запросов,
+  отправляется один дубль и берётся ответ, пришедший первым; второй
+  запрос отменяется. Дублей не больше HEDGE_MAX_RATIO от числа запросов
+  к хосту. Время запроса — до получения заголовков ответа: медленное
+  чтение тела хеджирование не ускоряет.
+
+Смена состояния автомата пишется в лог и в метрики (metrics), там же
+счётчики дублей и перцентили времени ответа хостов (p50/p95/p99); они
+собираются всегда, даже без хеджирования, чтобы по ним можно было
+выбрать порог.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import aiohttp
+from yarl import URL
+
+import budget
+import metrics
+from config import (
+    HOST_RATE_LIMIT, RETRY_ATTEMPTS, RETRY_BACKOFF, RETRY_BACKOFF_MAX,
+    BREAKER_FAILURES, BREAKER_COOLDOWN,
+    HEDGE_REQUESTS, HEDGE_PERCENTILE, HEDGE_MAX_RATIO, HEDGE_MIN_SAMPLES, HEDGE_WINDOW,
+)
+from rate_limit import AdaptiveTokenBucket
+
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+SLOW_DOWN_STATUSES = (429, 503)     # Ответы, после которых темп запросов к хосту снижается
+REPORTED_QUANTILES = (0.5, 0.95, 0.99)
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """Хост временно отключён после серии ошибок: запрос не отправлялся."""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"{host} отключён после ошибок, повтор через {retry_in:.0f} с")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Автомат отключения хоста: closed -> open -> half_open -> closed."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, host, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.host = host
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0.0
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        if state == self.OPEN:
+            logger.warning(f"Хост {self.host} отключён на {self.cooldown:g} с после {self.failures} ошибок подряд")
+        elif state == self.HALF_OPEN:
+            logger.info(f"Хост {self.host}: пробный запрос после паузы")
+        else:
+            logger.info(f"Хост {self.host} снова отвечает")
+        metrics.set_circuit_state(self.host, state)
+
+    def retry_in(self):
+        return max(0.0, self.opened + self.cooldown - time.monotonic())
+
+    def allow(self):
+        """Можно ли отправить запрос. В half_open за паузу пропускается один пробный запрос."""
+        if self.state == self.CLOSED:
+            return True
+        if self.retry_in() > 0:
+            return False
+        # Пауза истекла: пропускаем пробный запрос, следующий — не раньше чем через паузу
+        self.opened = time.monotonic()
+        self._set_state(self.HALF_OPEN)
+        return True
+
+    def success(self):
+        self.failures = 0
+        self._set_state(self.CLOSED)
+
+    def failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            self.opened = time.monotonic()
+            self._set_state(self.OPEN)
+
+
+class LatencyWindow:
+    """Время последних size ответов хоста, секунд."""
+
+    def __init__(self, size=HEDGE_WINDOW):
+        self.samples = deque(maxlen=size)
+        self._sorted = None
+
+    def add(self, value):
+        self.samples.append(value)
+        self._sorted = None
+
+    def quantile(self, q):
+        if not self.samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self.samples)
+        return self._sorted[min(len(self._sorted) - 1, int(len(self._sorted) * q))]
+
+
+class HostPolicy:
+    """Ограничение темпа, автомат отключения и хеджирование запросов одного хоста."""
+
+    def __init__(self, host):
+        self.host = host
+        self.bucket = AdaptiveTokenBucket(HOST_RATE_LIMIT)
+        self.breaker = CircuitBreaker(host)
+        self.latency = LatencyWindow()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self):
+        """Через сколько секунд без ответа отправлять дубль (None — не отправлять)."""
+        if len(self.latency.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return self.latency.quantile(HEDGE_PERCENTILE)
+
+    def may_hedge(self):
+        return self.breaker.state == CircuitBreaker.CLOSED and self.hedges < HEDGE_MAX_RATIO * self.requests
+
+    def slow_down(self):
+        rate = self.bucket.rate
+        self.bucket.slow_down()
+        if self.bucket.rate != rate:
+            logger.info(f"Хост {self.host} просит сбавить темп: {self.bucket.rate:g} запросов в секунду")
+            metrics.set_host_rate(self.host, self.bucket.rate)
+
+    def speed_up(self):
+        rate = self.bucket.rate
+        self.bucket.speed_up()
+        if self.bucket.rate != rate:
+            metrics.set_host_rate(self.host, self.bucket.rate)
+
+
+_policies = {}
+
+
+def host_policy(host):
+    """Политика хоста (создаётся при первом запросе к нему)."""
+    policy = _policies.get(host)
+    if policy is None:
+        policy = _policies[host] = HostPolicy(host)
+    return policy
+
+
+def retry_delay(attempt, retry_after=None):
+    """
+    Пауза перед повтором номер attempt (с нуля): случайная в пределах
+    RETRY_BACKOFF * 2**attempt (не больше RETRY_BACKOFF_MAX) и не меньше
+    Retry-After сервера. None, если пауза не укладывается в срок источника.
+    """
+    delay = random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, RETRY_BACKOFF_MAX))
+    remaining = budget.remaining(budget.FANOUT_MARGIN)
+    if remaining is not None and delay >= remaining:
+        return None
+    return delay
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def _check_breaker(policy):
+    if not policy.breaker.allow():
+        metrics.record_error("circuit_open")
+        raise CircuitOpenError(policy.host, policy.breaker.retry_in())
+
+
+async def _release(response):
+    response.release()
+    await response.wait_for_close()
+
+
+async def _timed_request(policy, session, method, url, kwargs):
+    """
+    Запрос с замером времени до заголовков ответа. Замеряются только
+    полученные ответы: отменённый запрос (проигравший дублю или прерванный
+    сроком источника) оборван искусственно и исказил бы и порог дубля, и
+    перцентили в /stats.
+    """
+    started = time.perf_counter()
+    response = await session.request(method, url, **kwargs)
+    policy.latency.add(time.perf_counter() - started)
+    return response
+
+
+async def _first_response(primary, hedge):
+    """Ответ запроса, успешно завершившегося первым; второй отменяется или освобождается."""
+    pending = {primary, hedge}
+    winner = None
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in done if task.exception() is None), None)
+            if winner is None and not pending:
+                # Оба запроса завершились ошибкой: отдаём ошибку исходного
+                return primary.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        for task in (primary, hedge):
+            if task is not winner and task.done() and not task.cancelled() and task.exception() is None:
+                task.result().release()
+    return winner
+
+
+async def _send(policy, session, method, url, kwargs):
+    """Отправляет запрос; медленный GET дублируется (HEDGE_REQUESTS)."""
+    policy.requests += 1
+    delay = policy.hedge_delay() if HEDGE_REQUESTS and method in IDEMPOTENT_METHODS else None
+    if delay is None:
+        return await _timed_request(policy, session, method, url, kwargs)
+
+    primary = asyncio.ensure_future(_timed_request(policy, session, method, url, kwargs))
+    try:
+        done, _ = await asyncio.wait((primary,), timeout=delay)
+    except asyncio.CancelledError:
+        primary.cancel()
+        raise
+    if done or not policy.may_hedge():
+        return await primary
+
+    policy.hedges += 1
+    metrics.record_hedge(policy.host)
+    logger.debug(f"Дубль запроса к {url}: нет ответа за {delay:.2f} с")
+    hedge = asyncio.ensure_future(_timed_request(policy, session, method, url, kwargs))
+    winner = await _first_response(primary, hedge)
+    if winner is hedge:
+        policy.hedge_wins += 1
+        metrics.record_hedge(policy.host, won=True)
+    return winner.result()
+
+
+@asynccontextmanager
+async def request(session, method, url, retries=RETRY_ATTEMPTS, **kwargs):
+    """
+    Выполняет session.request(method, url, **kwargs) с ограничением темпа,
+    повторами и автоматом отключения хоста; используется как
+    async with request(...) as response. Ответ с кодом ошибки, для которого
+    повторы исчерпаны, возвращается как есть (raise_for_status — дело
+    вызывающего). Ошибки чтения тела ответа тоже считаются ошибками хоста.
+    """
+    policy = host_policy(URL(str(url)).host)
+    attempts = retries + 1 if method in IDEMPOTENT_METHODS else 1
+
+    for attempt in range(attempts):
+        _check_breaker(policy)
+        await policy.bucket.acquire()
+        # Пока запрос ждал своей очереди, хост мог быть отключён. Пробный
+        # запрос half_open уже пропущен первой проверкой: повторная его бы отклонила
+        if policy.breaker.state == CircuitBreaker.OPEN:
+            _check_breaker(policy)
+
+        try:
+            response = await _send(policy, session, method, url, kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            policy.breaker.failure()
+            delay = retry_delay(attempt) if attempt + 1 < attempts else None
+            if delay is None:
+                raise
+            logger.info(f"Повтор запроса к {url} через {delay:.1f} с: {e!r}")
+            metrics.record_retry()
+            await asyncio.sleep(delay)
+            continue
+
+        if response.status not in RETRY_STATUSES:
+            policy.breaker.success()
+            policy.speed_up()
+            break
+
+        if response.status in SLOW_DOWN_STATUSES:
+            policy.slow_down()
+        if response.status != 429:
+            # 429 — хост жив, он только просит реже обращаться к нему
+            policy.breaker.failure()
+        delay = retry_delay(attempt, _retry_after(response)) if attempt + 1 < attempts else None
+        if delay is None:
+            break
+        await _release(response)
+        logger.info(f"Повтор запроса к {url} через {delay:.1f} с: ответ {response.status}")
+        metrics.record_retry()
+        await asyncio.sleep(delay)
+
+    try:
+        yield response
+    except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError):
+        policy.breaker.failure()
+        raise
+    finally:
+        await _release(response)
+
+
+def _quantiles(policy):
+    return {f"p{int(q * 100)}": policy.latency.quantile(q) for q in REPORTED_QUANTILES}
+
+
+def stats():
+    """Состояние хостов: автомат отключения, темп, перцентили времени ответа и дубли запросов."""
+    return {
+        host: {
+            "state": policy.breaker.state,
+            "failures": policy.breaker.failures,
+            "rate": policy.bucket.rate,
+            **{name: round(value, 3) for name, value in _quantiles(policy).items() if value is not None},
+            "requests": policy.requests,
+            "hedges": policy.hedges,
+            "hedge_wins": policy.hedge_wins,
+        }
+        for host, policy in _policies.items()
+    }
+
+
+def summary():
+    """Время ответа и дубли запросов по хостам для команды /stats."""
+    lines = []
+    for host, policy in sorted(_policies.items(), key=lambda item: -(item[1].latency.quantile(0.95) or 0)):
+        quantiles = _quantiles(policy)
+        if quantiles["p50"] is None:
+            continue
+        state = "" if policy.breaker.state == CircuitBreaker.CLOSED else f", {policy.breaker.state}"
+        lines.append(
+            f"<b>{host}</b>: p50 {quantiles['p50']:.2f} с, p95 {quantiles['p95']:.2f} с, "
+            f"p99 {quantiles['p99']:.2f} с, запросов {policy.requests}, "
+            f"дублей {policy.hedges} (успешных {policy.hedge_wins}){state}"
+        )
+    if not lines:
+        return ""
+    return "\n".join(["⏱ Время ответа хостов:", *lines])
+
+
+def _collect():
+    yield (
+        "news_host_latency_seconds", "Время ответа хоста по последним запросам (до заголовков)", "gauge",
+        ("host", "quantile"),
+        {
+            (host, str(q)): policy.latency.quantile(q)
+            for host, policy in _policies.items() if policy.latency.samples
+            for q in REPORTED_QUANTILES
+        },
+    )
+
+
+metrics.add_collector(_collect)
@@ -0,0 +1,192 @@
+"""
+Хранилище уже отправленных новостей.
+
+Каждая новость описывается двумя 64-битными ключами: хэшем канонической
+ссылки и хэшем нормализованного заголовка. Новость считается уже виденной,
+если совпадает любой из них — так отсекаются и повторы одной статьи с
+разными трекинговыми параметрами, и перепечатки с тем же заголовком.
+
+Ключи хранятся в SQLite и переживают перезапуски. Перед базой стоит
+вращающийся фильтр Блума: большинство новых ключей отсеиваются в памяти без
+запроса к базе, а база подтверждает только возможные совпадения, поэтому
+ложноположительных ответов нет. Память ограничена: фильтр состоит из
+нескольких поколений фиксированного размера, и старейшее поколение
+сбрасывается каждые SEEN_WINDOW / (GENERATIONS - 1) секунд. Записи старше
+SEEN_WINDOW удаляются и из базы.
+"""
+import hashlib
+import logging
+import math
+import sqlite3
+import time
+
+from config import DATA_DIR, SEEN_WINDOW
+from keyword_filter import normalize
+
+DB_PATH = DATA_DIR / "seen_items.sqlite3"
+
+BLOOM_CAPACITY = 50_000         # Ожидаемое число ключей в одном поколении
+BLOOM_ERROR_RATE = 0.001        # Доля ложноположительных ответов фильтра
+GENERATIONS = 3                 # Поколений фильтра; ключ живёт в нём от SEEN_WINDOW до 1.5 SEEN_WINDOW
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def item_keys(news):
+    """Ключи новости (NewsItem): хэш канонической ссылки и хэш нормализованного заголовка."""
+    title = " ".join(normalize(news.title).split())
+    return _hash("link:" + news.link), _hash("title:" + title)
+
+
+class BloomFilter:
+    """Фильтр Блума фиксированного размера над 64-битными ключами."""
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Двойное хэширование: обе половины ключа уже равномерно распределены
+        key &= 0xFFFFFFFFFFFFFFFF
+        h1, h2 = key & 0xFFFFFFFF, (key >> 32) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SeenStore:
+    """Постоянное множество ключей отправленных новостей с окном SEEN_WINDOW."""
+
+    def __init__(self, path=DB_PATH, window=SEEN_WINDOW):
+        self.path = path
+        self.window = window
+        self._connection = None
+        self._generations = []
+        self._rotated_at = None
+        self.bloom_rejects = 0      # Ключ отсеян фильтром без запроса к базе
+        self.db_lookups = 0         # Фильтр ответил «возможно», проверили в базе
+        self.false_positives = 0    # База не подтвердила ответ фильтра
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS seen_items ("
+                " key INTEGER PRIMARY KEY,"
+                " seen_at REAL NOT NULL)"
+            )
+            self._load()
+        return self._connection
+
+    def _load(self):
+        """Удаляет устаревшие ключи и заполняет фильтр оставшимися."""
+        self.evict()
+        self._generations = [BloomFilter()]
+        self._rotated_at = time.time()
+        for (key,) in self._connection.execute("SELECT key FROM seen_items"):
+            self._generations[0].add(key)
+
+    def _rotate(self):
+        """Добавляет новое поколение фильтра и сбрасывает старейшее, если пора."""
+        self.connection
+        now = time.time()
+        if now - self._rotated_at < self.window / (GENERATIONS - 1):
+            return
+        self._generations.insert(0, BloomFilter())
+        del self._generations[GENERATIONS:]
+        self._rotated_at = now
+        self.evict()
+
+    def __contains__(self, key):
+        self._rotate()
+        if not any(key in generation for generation in self._generations):
+            self.bloom_rejects += 1
+            return False
+
+        self.db_lookups += 1
+        row = self.connection.execute(
+            "SELECT 1 FROM seen_items WHERE key = ? AND seen_at >= ?",
+            (key, time.time() - self.window),
+        ).fetchone()
+        if row is None:
+            self.false_positives += 1
+            return False
+        return True
+
+    def seen(self, news):
+        """Отправлялась ли новость (по ссылке или заголовку) в пределах окна."""
+        return any(key in self for key in item_keys(news))
+
+    def add(self, news_list):
+        """Запоминает новости как отправленные."""
+        keys = [key for news in news_list for key in item_keys(news)]
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO seen_items (key, seen_at) VALUES (?, ?)",
+                [(key, now) for key in keys],
+            )
+        self._rotate()
+        for key in keys:
+            self._generations[0].add(key)
+
+    def filter_new(self, news_list):
+        """Возвращает новости, которые ещё не отправлялись, без повторов внутри списка."""
+        return [news for news in dedupe(news_list) if not self.seen(news)]
+
+    def is_empty(self):
+        return self.connection.execute("SELECT 1 FROM seen_items LIMIT 1").fetchone() is None
+
+    def evict(self):
+        """Удаляет ключи старше окна."""
+        with self._connection:
+            self._connection.execute("DELETE FROM seen_items WHERE seen_at < ?", (time.time() - self.window,))
+
+    def stats(self):
+        return {
+            "bloom_rejects": self.bloom_rejects,
+            "db_lookups": self.db_lookups,
+            "false_positives": self.false_positives,
+        }
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+seen_store = SeenStore()
+
+
+def dedupe(news_list, seen_keys=None):
+    """
+    Убирает повторы внутри одного списка: новость с уже встречавшейся
+    ссылкой или заголовком отбрасывается, порядок сохраняется. Чтобы
+    убирать повторы между несколькими списками, передайте общее множество
+    seen_keys.
+    """
+    seen_keys = set() if seen_keys is None else seen_keys
+    unique = []
+    for news in news_list:
+        keys = item_keys(news)
+        if seen_keys.isdisjoint(keys):
+            seen_keys.update(keys)
+            unique.append(news)
+    return unique
+
+
+def stats():
+    """Счётчики общего хранилища."""
+    return seen_store.stats()
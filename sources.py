@@ -0,0 +1,123 @@
+"""
+Реестр источников новостей.
+
+Каждый источник описан своим id, видом (RSS-лента, HTML-список статей, VK
+или Telegram) и точкой входа — строкой "модуль:функция". Модуль источника
+импортируется только при первом вызове, поэтому запуск бота не загружает
+парсеры сайтов с их зависимостями (BeautifulSoup, feedparser, dateutil),
+а запуск одного источника загружает только его модуль.
+
+Набор источников настраивается через config.ENABLED_SOURCES и
+config.DISABLED_SOURCES. Запуск отдельных источников из корня репозитория:
+
+    python sources.py v1 kp
+"""
+import asyncio
+import importlib
+import logging
+import sys
+import time
+
+from budget import run_with_budget
+from config import DISABLED_SOURCES, ENABLED_SOURCES
+from http_client import close_session
+
+RSS = "rss"         # Лента: один запрос, без загрузки статей
+HTML = "html"       # Страница-список и, при необходимости, страницы статей
+VK = "vk"           # Стены групп ВКонтакте
+TELEGRAM = "telegram"   # Каналы Telegram
+
+logger = logging.getLogger(__name__)
+
+
+class Source:
+    """
+    Источник новостей. Вызывается как fetch(session=None) и возвращает
+    список NewsItem; модуль точки входа загружается при первом вызове.
+    """
+
+    def __init__(self, source_id, kind, entry_point):
+        self.id = source_id
+        self.kind = kind
+        self.entry_point = entry_point
+        self._fetch = None
+
+    @property
+    def loaded(self):
+        return self._fetch is not None
+
+    def load(self):
+        """Импортирует модуль источника и возвращает его функцию сбора."""
+        if self._fetch is None:
+            module_name, function_name = self.entry_point.split(":")
+            started = time.perf_counter()
+            module = importlib.import_module(module_name)
+            self._fetch = getattr(module, function_name)
+            logger.debug(f"Источник {self.id} загружен за {(time.perf_counter() - started) * 1000:.1f} мс")
+        return self._fetch
+
+    async def __call__(self, session=None):
+        return await self.load()(session)
+
+    def __repr__(self):
+        return f"Source({self.id!r}, {self.kind!r}, {self.entry_point!r})"
+
+
+REGISTRY = {
+    source.id: source
+    for source in (
+        Source("bloknot", RSS, "Sites.bloknot_volgograd:fetch_bloknot_news"),
+        Source("gorvesti", HTML, "Sites.gorvesti:fetch_gorvesti_news"),
+        Source("mtv", HTML, "Sites.mtv_online:fetch_mtv_news"),
+        Source("novostivolgograda", HTML, "Sites.novostivolgograda:fetch_novostivolgograda_news"),
+        Source("riac34", RSS, "Sites.riac34:fetch_riac34_news"),
+        Source("v1", HTML, "Sites.v1:fetch_v1_news"),
+        Source("v102", HTML, "Sites.v102:fetch_v102_news"),
+        Source("kp", HTML, "Sites.volgograd_kp:fetch_kp_news"),
+        Source("vpravda", HTML, "Sites.vpravda:fetch_vpravda_news"),
+        Source("vk", VK, "vk_api:fetch_vk_news"),
+        Source("telegram", TELEGRAM, "Sites.telegram_channels:fetch_telegram_news"),
+    )
+}
+
+
+def enabled_sources(enabled=None, disabled=None):
+    """
+    Включённые источники {id: Source} в порядке реестра. По умолчанию
+    набор задают config.ENABLED_SOURCES и config.DISABLED_SOURCES.
+    """
+    enabled = ENABLED_SOURCES if enabled is None else enabled
+    disabled = DISABLED_SOURCES if disabled is None else disabled
+
+    unknown = (set(enabled) | set(disabled)) - set(REGISTRY)
+    if unknown:
+        logger.warning(f"Неизвестные источники в настройках: {', '.join(sorted(unknown))}")
+
+    return {
+        source_id: source
+        for source_id, source in REGISTRY.items()
+        if (not enabled or source_id in enabled) and source_id not in disabled
+    }
+
+
+async def main(source_ids):
+    for source_id in source_ids:
+        news, cut = await run_with_budget(source_id, REGISTRY[source_id])
+        if cut:
+            print(f"⏱ {source_id}: сбор прерван по сроку, результат неполный")
+        for item in news:
+            print(
+                f"📢 Заголовок: {item.title}\n"
+                f"🔗 Ссылка: {item.link}\n"
+                f"📅 Дата публикации: {item.format_date()}\n"
+                f"{'-' * 50}"
+            )
+    await close_session()
+
+
+if __name__ == "__main__":
+    requested = sys.argv[1:] or list(enabled_sources())
+    missing = [source_id for source_id in requested if source_id not in REGISTRY]
+    if missing:
+        sys.exit(f"Неизвестные источники: {', '.join(missing)}. Доступны: {', '.join(REGISTRY)}")
+    asyncio.run(main(requested))
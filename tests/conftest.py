@@ -0,0 +1,20 @@
+"""
+Общая настройка тестов. Запуск из корня репозитория:
+
+    python -m pytest -q
+
+Модули бота импортируются из корня репозитория. Постоянные хранилища
+(DATA_DIR) создаются во временном каталоге, а токен бота подставляется
+фиктивный, поэтому тесты не трогают данные бота и не ходят в сеть.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(ROOT))
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="news-bot-tests-")
+os.environ["TELEGRAM_BOT_TOKEN"] = "123456:TEST-token-for-tests-only-0000000000"
+os.environ.setdefault("TRACE_DIR", "")
@@ -0,0 +1,50 @@
+"""
+Фейковый сайт для тестов resilience: локальный aiohttp-сервер, который
+отвечает по сценарию.
+
+Ответы берутся из script по порядку — (код, задержка в секундах,
+заголовки); когда сценарий кончился, повторяется default. Время и метод
+каждого запроса записываются в calls.
+"""
+import asyncio
+import time
+from collections import deque
+
+from aiohttp import web
+
+
+class FakeHttpServer:
+    """Сайт, отвечающий по сценарию script; url — адрес его страницы."""
+
+    def __init__(self, script=(), default=(200, 0, {})):
+        self.script = deque(script)
+        self.default = default
+        self.calls = []
+        self.cancelled = 0
+        self.url = None
+        self._runner = None
+
+    async def handle(self, request):
+        self.calls.append((request.method, time.monotonic()))
+        status, delay, headers = self.script.popleft() if self.script else self.default
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # Клиент закрыл соединение, не дождавшись ответа
+            self.cancelled += 1
+            raise
+        return web.Response(status=status, text=f"ответ {status}", headers=headers)
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_route("*", "/page", self.handle)
+        self._runner = web.AppRunner(app, access_log=None, handler_cancellation=True)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/page"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._runner.cleanup()
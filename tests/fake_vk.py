@@ -0,0 +1,116 @@
+"""
+Фейковый VK API для тестов vk_api: локальный aiohttp-сервер с методами
+execute (только вызовы API.wall.get) и wall.get.
+
+Стены групп хранятся в памяти и отдаются как в VK: от новых постов к
+старым, закреплённый пост — первым, с учётом offset и count. Все вызовы
+записываются в calls как (метод, [параметры wall.get]).
+"""
+import json
+import re
+
+from aiohttp import web
+
+WALL_GET_CALL = re.compile(r"API\.wall\.get\((\{.*?\})\)")
+
+
+class FakeVkServer:
+    """
+    VK API с стенами walls {группа: [пост]}. execute=False имитирует ключ, для
+    которого execute недоступен; failing {группа: (код, текст)} — ошибки wall.get.
+    """
+
+    def __init__(self, execute=True):
+        self.execute = execute
+        self.walls = {}
+        self.pinned = {}
+        self.failing = {}
+        self.calls = []
+        self.url = None
+        self._runner = None
+
+    def owner_id(self, group):
+        if group.isdigit():
+            return -int(group)
+        return -(1000 + list(self.walls).index(group))
+
+    def post(self, group, text, date, pinned=False):
+        """Добавляет пост на стену группы со следующим id."""
+        wall = self.walls.setdefault(group, [])
+        post = {"id": len(wall) + 1, "owner_id": None, "date": int(date), "text": text}
+        wall.append(post)
+        if pinned:
+            self.pinned[group] = post
+        return post
+
+    def _group(self, params):
+        if "domain" in params:
+            return params["domain"]
+        return str(-int(params["owner_id"]))
+
+    def wall_get(self, params):
+        group = self._group(params)
+        if group in self.failing:
+            code, message = self.failing[group]
+            return None, {"error_code": code, "error_msg": message}
+        if group not in self.walls:
+            return None, {"error_code": 100, "error_msg": "group not found"}
+
+        posts = [dict(post, owner_id=self.owner_id(group)) for post in reversed(self.walls[group])]
+        pinned = self.pinned.get(group)
+        if pinned is not None:
+            posts.insert(0, dict(pinned, owner_id=self.owner_id(group), is_pinned=1))
+        offset, count = int(params.get("offset", 0)), int(params.get("count", 20))
+        return {"count": len(posts), "items": posts[offset:offset + count]}, None
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        form = dict(await request.post())
+        assert form.get("access_token"), "нет ключа доступа"
+
+        if method == "execute":
+            calls = [json.loads(params) for params in WALL_GET_CALL.findall(form["code"])]
+            self.calls.append((method, calls))
+            if not self.execute:
+                return web.json_response({"error": {"error_code": 15, "error_msg": "Access denied"}})
+            response, errors = [], []
+            for params in calls:
+                result, error = self.wall_get(params)
+                response.append(result or False)
+                if error:
+                    errors.append(error)
+            payload = {"response": response}
+            if errors:
+                payload["execute_errors"] = errors
+            return web.json_response(payload)
+
+        if method == "wall.get":
+            params = {key: value for key, value in form.items() if key not in ("access_token", "v")}
+            self.calls.append((method, [params]))
+            result, error = self.wall_get(params)
+            return web.json_response({"error": error} if error else {"response": result})
+
+        return web.json_response({"error": {"error_code": 3, "error_msg": "Unknown method"}})
+
+    def pages(self, group):
+        """Параметры всех запросов стены группы: [(offset, count)]."""
+        return [
+            (int(params.get("offset", 0)), int(params["count"]))
+            for _, calls in self.calls
+            for params in calls
+            if self._group(params) == group
+        ]
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/method/{method}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/method"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._runner.cleanup()
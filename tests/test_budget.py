@@ -0,0 +1,34 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from budget import BudgetExceeded, remaining, was_truncated, with_budget
+
+
+def test_slow_source_exceeds_budget():
+    async def fetch():
+        await asyncio.sleep(1)
+
+    with pytest.raises(BudgetExceeded):
+        asyncio.run(with_budget("budget_slow", fetch, budget=0.05)())
+    assert was_truncated("budget_slow")
+
+
+def test_source_timeout_is_not_reported_as_budget():
+    async def fetch():
+        raise aiohttp.ServerTimeoutError("read timeout")
+
+    with pytest.raises(aiohttp.ServerTimeoutError) as raised:
+        asyncio.run(with_budget("budget_v1", fetch, budget=5)())
+    assert not isinstance(raised.value, BudgetExceeded)
+    assert not was_truncated("budget_v1")
+
+
+def test_remaining_is_visible_inside_source():
+    async def fetch():
+        return remaining()
+
+    left = asyncio.run(with_budget("budget_v1", fetch, budget=5)())
+    assert 4 < left <= 5
+    assert remaining() is None
@@ -0,0 +1,77 @@
+import asyncio
+
+import http_client
+import news_cache
+from collector import BackgroundCollector
+from news_item import NewsItem, cutoff
+from seen_store import SeenStore
+
+
+def make_item(source, number):
+    return NewsItem(cutoff(0) - number, source, f"https://{source}.ru/news/{number}", f"Пожар {number}")
+
+
+def make_collector(tmp_path, sources, pushed):
+    async def push(news_list):
+        pushed.extend(news_list)
+
+    news_cache._caches.clear()
+    return BackgroundCollector(sources, push, store=SeenStore(tmp_path / "seen.sqlite3"))
+
+
+def test_snapshot_requires_every_source(tmp_path):
+    async def fast(session):
+        return [make_item("fast", 1)]
+
+    async def slow(session):
+        return [make_item("slow", 1)]
+
+    collector = make_collector(tmp_path, {"fast": fast, "slow": slow}, [])
+
+    async def main():
+        assert not collector.has_snapshot()
+        await collector.collect("fast")
+        partial = collector.has_snapshot()
+        await collector.collect("slow")
+        await http_client.close_session()
+        return partial, collector.has_snapshot()
+
+    assert asyncio.run(main()) == (False, True)
+
+
+def test_stale_snapshot_is_not_used(tmp_path):
+    async def fetch(session):
+        return [make_item("v1", 1)]
+
+    collector = make_collector(tmp_path, {"v1": fetch}, [])
+    collector.intervals["v1"] = 60
+
+    async def main():
+        await collector.collect("v1")
+        await http_client.close_session()
+        fresh = collector.has_snapshot()
+        cache = news_cache.source_cache("v1", fetch)
+        cache.updated -= max(cache.ttl, 60) + 1
+        return fresh, collector.has_snapshot()
+
+    assert asyncio.run(main()) == (True, False)
+
+
+def test_first_collection_on_empty_store_only_remembers(tmp_path):
+    items = [make_item("v1", 1)]
+
+    async def fetch(session):
+        return list(items)
+
+    pushed = []
+    collector = make_collector(tmp_path, {"v1": fetch}, pushed)
+
+    async def main():
+        collector.prime = collector.store.is_empty()
+        await collector.collect("v1")
+        items.append(make_item("v1", 2))
+        await collector.collect("v1")
+        await http_client.close_session()
+
+    asyncio.run(main())
+    assert [item.link for item in pushed] == ["https://v1.ru/news/2"]
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime
+
+import aiohttp
+
+from date_cache import DateCache, cached
+
+URL = "https://v1.ru/text/incidents/2026/10/18/1.html"
+
+
+def test_found_date_is_cached(tmp_path):
+    cache = DateCache(tmp_path / "dates.sqlite3")
+    calls = []
+
+    async def fetch(url):
+        calls.append(url)
+        return datetime(2026, 10, 18, 9, 30)
+
+    resolve = cached(fetch, cache)
+    assert asyncio.run(resolve(URL)) == datetime(2026, 10, 18, 9, 30)
+    assert asyncio.run(resolve(URL)) == datetime(2026, 10, 18, 9, 30)
+    assert calls == [URL]
+
+
+def test_page_without_date_is_cached_negatively(tmp_path):
+    cache = DateCache(tmp_path / "dates.sqlite3")
+    calls = []
+
+    async def fetch(url):
+        calls.append(url)
+        return None
+
+    resolve = cached(fetch, cache)
+    assert asyncio.run(resolve(URL)) is None
+    assert asyncio.run(resolve(URL)) is None
+    assert calls == [URL]
+    assert cache.stats()["negative_hits"] == 1
+
+
+def test_fetch_error_is_not_cached(tmp_path):
+    cache = DateCache(tmp_path / "dates.sqlite3")
+    results = [aiohttp.ClientConnectionError("connection reset"), datetime(2026, 10, 18, 9, 30)]
+
+    async def fetch(url):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    resolve = cached(fetch, cache)
+    assert asyncio.run(resolve(URL)) is None
+    assert cache.get(URL) == (False, None)
+    # Следующий сбор загружает страницу снова и получает дату
+    assert asyncio.run(resolve(URL)) == datetime(2026, 10, 18, 9, 30)
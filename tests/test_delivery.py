@@ -0,0 +1,78 @@
+import asyncio
+
+from delivery import MESSAGE_LIMIT, DeliveryQueue, escape_html, message_length, pack_messages
+
+
+def test_blocks_are_packed_in_order_within_limit():
+    blocks = [f"новость {number}" * 10 for number in range(50)]
+    messages = pack_messages(blocks, limit=500)
+    assert all(message_length(message) <= 500 for message in messages)
+    assert "\n".join(messages) == "\n".join(blocks)
+    assert len(messages) < len(blocks)
+
+
+def test_block_exactly_at_limit_is_kept_whole():
+    block = "а" * 100
+    assert pack_messages([block, block], limit=100) == [block, block]
+
+
+def test_oversized_block_is_truncated():
+    messages = pack_messages(["x" * 150, "short"], limit=100)
+    assert messages == ["x" * 100, "short"]
+
+
+def test_length_is_counted_in_utf16_units():
+    emoji = "📢"
+    assert message_length(emoji) == 2
+    messages = pack_messages([emoji * 60], limit=100)
+    assert messages == [emoji * 50]
+
+
+def test_empty_input():
+    assert pack_messages([]) == []
+
+
+def test_default_limit_is_telegram_limit():
+    messages = pack_messages(["б" * 3000, "в" * 3000])
+    assert len(messages) == 2
+    assert all(message_length(message) <= MESSAGE_LIMIT for message in messages)
+
+
+def test_escape_html():
+    assert escape_html("Цены <выше> & ниже") == "Цены &lt;выше&gt; &amp; ниже"
+
+
+def test_escape_html_truncates_before_escaping():
+    escaped = escape_html("&" * 50, limit=20)
+    assert message_length(escaped) <= 20
+    assert escaped == "&amp;" * 3 + "…"
+
+
+def test_escape_html_keeps_short_text():
+    assert escape_html("ДТП на мосту", limit=12) == "ДТП на мосту"
+
+
+class HangingBot:
+    """Бот, у которого отправка не завершается."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        self.sent.append(text)
+        await asyncio.Event().wait()
+
+
+def test_close_resolves_pending_deliveries():
+    async def main():
+        bot = HangingBot()
+        queue = DeliveryQueue(bot)
+        result = queue.enqueue(1, ["первое", "второе", "третье"])
+        await asyncio.sleep(0.01)
+        queue.close()
+        return bot, queue, await asyncio.wait_for(result, 1)
+
+    bot, queue, delivered = asyncio.run(main())
+    assert delivered is False
+    assert bot.sent == ["первое"]
+    assert queue.stats()["dropped"] == 2
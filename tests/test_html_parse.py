@@ -0,0 +1,39 @@
+import pytest
+
+from html_parse import LexborHTMLParser, Node, parse_html
+
+HTML = """
+<html><body>
+  <div class="news">
+    <a class="title" href="/news/1">Пожар   на складе</a>
+    <span class="date">18.10.2026</span>
+  </div>
+  <div class="news">
+    <a class="title" href="/news/2">ДТП на мосту</a>
+    <span class="date">17.10.2026</span>
+  </div>
+</body></html>
+"""
+
+BACKENDS = ["soup", "lxml"] + (["selectolax"] if LexborHTMLParser is not None else [])
+
+
+def test_node_is_abstract():
+    with pytest.raises(TypeError):
+        Node()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_agree(backend):
+    [root] = parse_html(HTML, backend=backend)
+    links = root.select("a.title")
+    assert [link.text for link in links] == ["Пожар на складе", "ДТП на мосту"]
+    assert [link.get("href") for link in links] == ["/news/1", "/news/2"]
+    assert links[0].find_parent("div.news").select_one("span.date").text == "18.10.2026"
+    assert links[1].find_next_sibling("span").text == "17.10.2026"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_scoped_parse(backend):
+    nodes = parse_html(HTML, scope="div.news", backend=backend)
+    assert [node.select_one("a").get("href") for node in nodes] == ["/news/1", "/news/2"]
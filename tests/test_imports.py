@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ["Sites", "bs4", "feedparser", "dateutil", "html_parse", "lxml", "telethon"]
+
+
+def loaded_modules(statement):
+    """Какие из HEAVY загружены после statement в чистом интерпретаторе."""
+    code = f"import sys, json\n{statement}\nprint(json.dumps([name for name in {HEAVY!r} if name in sys.modules]))"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, env=dict(os.environ), capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_bot_import_does_not_load_parsers():
+    assert loaded_modules("import parser") == []
+
+
+def test_source_loads_only_its_module():
+    loaded = loaded_modules("import sources\nsources.REGISTRY['v1'].load()")
+    assert "Sites" in loaded
+    assert "feedparser" not in loaded
+    assert "telethon" not in loaded
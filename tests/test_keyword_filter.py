@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from config import EXCLUDED_KEYWORDS, KEYWORDS
+from keyword_filter import FINGERPRINT, _compile, find_excluded, find_keywords, is_relevant, normalize
+
+
+def legacy_is_relevant(*texts):
+    """
+    Прежняя проверка из Sites/*: подстроки без учёта регистра. Новый фильтр
+    ещё и не различает «ё» и «е», поэтому здесь они тоже приводятся к «е».
+    """
+    texts = [normalize(text) for text in texts if text]
+    return (
+        any(normalize(keyword) in text for keyword in KEYWORDS for text in texts)
+        and not any(normalize(excluded) in text for excluded in EXCLUDED_KEYWORDS for text in texts)
+    )
+
+
+FILLER = ["в Волгограде", "на улице", "жители сообщили", "утром", "на трассе", "в центре города", "концерт"]
+
+
+def generated_texts(count=2000, seed=1):
+    words = list(KEYWORDS) + list(EXCLUDED_KEYWORDS) + FILLER
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        parts = rng.sample(words, rng.randint(1, 4))
+        text = " ".join(parts)
+        texts.append(rng.choice([text, text.upper(), text.capitalize()]))
+    return texts
+
+
+def test_matches_legacy_any_check():
+    for text in generated_texts():
+        assert is_relevant(text) == legacy_is_relevant(text), text
+
+
+def test_matches_legacy_any_check_across_title_and_description():
+    texts = generated_texts(seed=2)
+    for title, description in zip(texts, reversed(texts)):
+        assert is_relevant(title, description) == legacy_is_relevant(title, description), (title, description)
+
+
+@pytest.mark.parametrize("text", ["Пожар на Университетском", "ПОЖАР на Университетском", "пожарные приехали"])
+def test_keyword_case_and_prefix(text):
+    assert is_relevant(text)
+
+
+def test_excluded_word_wins():
+    assert not is_relevant("Пожар после атаки", "подробности о СВО")
+
+
+def test_empty_and_missing_texts():
+    assert not is_relevant()
+    assert not is_relevant("", None)
+
+
+def test_yo_is_normalized():
+    pattern, originals = _compile(["замёрзшие трубы"])
+    assert pattern.search(normalize("Замерзшие трубы в подвале"))
+    assert originals == {"замерзшие трубы": "замёрзшие трубы"}
+
+
+def test_longest_phrase_is_reported():
+    pattern, originals = _compile(["лесной", "лесной пожар"])
+    assert [originals[match.group()] for match in pattern.finditer("лесной пожар у хутора")] == ["лесной пожар"]
+
+
+def test_find_keywords_in_original_spelling():
+    assert "ДТП" in find_keywords("дтп на мосту")
+    assert find_excluded("Новости СВО") == ["СВО"]
+
+
+def test_fingerprint_is_stable():
+    assert len(FINGERPRINT) == 16
+    assert int(FINGERPRINT, 16) >= 0
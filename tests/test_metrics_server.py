@@ -0,0 +1,35 @@
+import asyncio
+import socket
+
+import aiohttp
+
+import metrics
+
+
+def test_busy_port_does_not_stop_the_bot():
+    async def main():
+        with socket.socket() as busy:
+            busy.bind(("127.0.0.1", 0))
+            busy.listen()
+            port = busy.getsockname()[1]
+            await metrics.start_server("127.0.0.1", port)
+            assert metrics._server is None
+        await metrics.stop_server()
+
+    asyncio.run(main())
+
+
+def test_endpoint_serves_metrics():
+    async def main():
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        await metrics.start_server("127.0.0.1", port)
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    assert response.status == 200
+        finally:
+            await metrics.stop_server()
+
+    asyncio.run(main())
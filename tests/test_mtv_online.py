@@ -0,0 +1,33 @@
+import asyncio
+from datetime import datetime
+
+import news_item
+from Sites import mtv_online
+
+FEED = """
+<div class="item-title"><a href="/news/1"><h2>Пожар на Университетском проспекте</h2></a></div>
+<p class="short">Горел склад</p>
+<div class="summary"><span class="dt">6 апреля, 14:55 | Происшествия</span></div>
+"""
+
+
+def test_feed_keeps_date_text_without_year():
+    entries = mtv_online.parse_mtv_feed(FEED)
+    assert [entry["date"] for entry in entries] == ["6 апреля, 14:55"]
+    assert entries[0]["title"] == "Пожар на Университетском проспекте"
+
+
+def test_year_comes_from_clock_of_event_loop(monkeypatch):
+    async def fetch_parsed(session, url, parse, **kwargs):
+        return parse(FEED)
+
+    monkeypatch.setattr(mtv_online, "fetch_parsed", fetch_parsed)
+    news_item.set_clock(lambda: datetime(2025, 4, 7, 12, tzinfo=news_item.LOCAL_TZ).timestamp())
+    try:
+        news = asyncio.run(mtv_online.fetch_mtv_news(session=object()))
+    finally:
+        news_item.set_clock()
+
+    assert [datetime.fromtimestamp(item.timestamp, news_item.LOCAL_TZ).replace(tzinfo=None) for item in news] == [
+        datetime(2025, 4, 6, 14, 55)
+    ]
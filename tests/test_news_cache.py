@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from news_cache import SourceCache
+
+
+class CountingFetch:
+    """fetch источника: считает вызовы, отвечает через delay секунд результатами results по очереди."""
+
+    def __init__(self, results=None, delay=0.05):
+        self.calls = 0
+        self.results = results
+        self.delay = delay
+
+    async def __call__(self, *args):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.results:
+            result = self.results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return [f"news {self.calls}"]
+
+
+def test_concurrent_gets_share_one_fetch():
+    fetch = CountingFetch()
+    cache = SourceCache("v1", fetch, ttl=60, stale_ttl=60)
+
+    async def main():
+        return await asyncio.gather(*(cache.get() for _ in range(5)))
+
+    assert asyncio.run(main()) == [["news 1"]] * 5
+    assert fetch.calls == 1
+
+
+def test_fresh_result_is_served_from_cache():
+    fetch = CountingFetch()
+    cache = SourceCache("v1", fetch, ttl=60, stale_ttl=60)
+
+    async def main():
+        first = await cache.get()
+        second = await cache.get()
+        return first, second
+
+    assert asyncio.run(main()) == (["news 1"], ["news 1"])
+    assert fetch.calls == 1
+
+
+def test_stale_result_is_served_while_refreshing():
+    fetch = CountingFetch()
+    cache = SourceCache("v1", fetch, ttl=0, stale_ttl=60)
+
+    async def main():
+        first = await cache.get()
+        stale = await cache.get()
+        await cache.refresh()
+        return first, stale, cache.value
+
+    first, stale, refreshed = asyncio.run(main())
+    assert first == stale == ["news 1"]
+    assert refreshed == ["news 2"]
+    assert fetch.calls == 2
+
+
+def test_error_keeps_previous_result():
+    fetch = CountingFetch(results=[["news 1"], RuntimeError("503")])
+    cache = SourceCache("v1", fetch, ttl=0, stale_ttl=0)
+
+    async def main():
+        return await cache.get(), await cache.get()
+
+    assert asyncio.run(main()) == (["news 1"], ["news 1"])
+
+
+def test_error_without_result_is_raised():
+    cache = SourceCache("v1", CountingFetch(results=[RuntimeError("503")]), ttl=60, stale_ttl=60)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get())
+
+
+def test_returned_list_is_a_copy():
+    cache = SourceCache("v1", CountingFetch(), ttl=60, stale_ttl=60)
+
+    async def main():
+        (await cache.get()).append("mutated")
+        return await cache.get()
+
+    assert asyncio.run(main()) == ["news 1"]
+
+
+def test_cancelling_one_waiter_keeps_shared_refresh():
+    fetch = CountingFetch(delay=0.2)
+    cache = SourceCache("v1", fetch, ttl=60, stale_ttl=60)
+
+    async def main():
+        first = asyncio.ensure_future(cache.get())
+        second = asyncio.ensure_future(cache.get())
+        await asyncio.sleep(0.05)
+        first.cancel()
+        result = await second
+        return first.cancelled(), result
+
+    assert asyncio.run(main()) == (True, ["news 1"])
+    assert fetch.calls == 1
+
+
+def test_cancelling_last_waiter_cancels_refresh():
+    fetch = CountingFetch(delay=0.2)
+    cache = SourceCache("v1", fetch, ttl=60, stale_ttl=60)
+
+    async def main():
+        waiter = asyncio.ensure_future(cache.get())
+        await asyncio.sleep(0.05)
+        refresh = cache._refresh_task
+        waiter.cancel()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        # Следующий вызов начинает новое обновление, а не ждёт отменённого
+        return refresh.cancelled(), await cache.get()
+
+    assert asyncio.run(main()) == (True, ["news 2"])
+
+
+def test_background_refresh_without_waiters_is_not_cancelled():
+    fetch = CountingFetch(delay=0.1)
+    cache = SourceCache("v1", fetch, ttl=0, stale_ttl=60)
+
+    async def main():
+        await cache.get()
+        assert await cache.get() == ["news 1"]   # устаревший результат, обновление в фоне
+        refresh = cache._refresh_task
+        await refresh
+        return cache.value
+
+    assert asyncio.run(main()) == ["news 2"]
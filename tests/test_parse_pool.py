@@ -0,0 +1,65 @@
+import asyncio
+import contextvars
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import parse_pool
+from Sites.mtv_online import parse_mtv_feed
+from tests.test_mtv_online import FEED
+
+ROOT = Path(__file__).resolve().parent.parent
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def current_request_id():
+    return request_id.get()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    def use(mode):
+        executor = parse_pool.make_executor(mode, 2)
+        monkeypatch.setattr(parse_pool, "PARSE_POOL", mode)
+        monkeypatch.setattr(parse_pool, "_executor", executor)
+        return executor
+
+    yield use
+    parse_pool.shutdown()
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+def test_same_result_in_every_mode(pool, mode):
+    pool(mode)
+    assert asyncio.run(parse_pool.run_parse(parse_mtv_feed, FEED)) == parse_mtv_feed(FEED)
+
+
+def test_thread_pool_keeps_context(pool):
+    pool("thread")
+
+    async def main():
+        request_id.set("start-42")
+        return await parse_pool.run_parse(current_request_id)
+
+    assert asyncio.run(main()) == "start-42"
+
+
+def test_process_workers_do_not_import_main(tmp_path):
+    script = tmp_path / "bot.py"
+    script.write_text(
+        "import sys\n"
+        f"sys.path.insert(0, {str(ROOT)!r})\n"
+        "print('импорт запущенного модуля', flush=True)\n"
+        "import parse_pool\n"
+        "\n"
+        "if __name__ == '__main__':\n"
+        "    executor = parse_pool.make_executor('process', 2)\n"
+        "    print(list(executor.map(len, ['а', 'бб', 'ввв'])), flush=True)\n"
+        "    executor.shutdown()\n",
+        encoding="utf-8",
+    )
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, check=True, cwd=tmp_path)
+    assert result.stdout.splitlines() == ["импорт запущенного модуля", "[1, 2, 3]"]
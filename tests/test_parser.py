@@ -0,0 +1,198 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import budget
+import delivery
+import http_client
+import news_cache
+import parser
+from collector import BackgroundCollector
+from delivery import MESSAGE_LIMIT, DeliveryQueue, message_length
+from news_item import NewsItem, cutoff
+from seen_store import SeenStore
+
+
+def make_item(source):
+    return NewsItem(cutoff(0), source, f"https://{source}.ru/news/1", f"Пожар ({source})")
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    def install(delays):
+        def make_fetch(source_id, delay):
+            async def fetch(session):
+                await asyncio.sleep(delay)
+                return [make_item(source_id)]
+            return fetch
+
+        monkeypatch.setattr(parser, "SOURCES", {
+            source_id: make_fetch(source_id, delay) for source_id, delay in delays.items()
+        })
+        news_cache._caches.clear()
+
+    yield install
+    news_cache._caches.clear()
+
+
+async def consume(stream):
+    return [item.source async for batch in stream for item in batch]
+
+
+def test_overlapping_streams_do_not_cancel_each_other(sources):
+    sources({"fast": 0.01, "slow": 0.4})
+
+    async def main():
+        cut_a, cut_b = [], []
+        first = asyncio.ensure_future(consume(parser.stream_news(window=0.01, deadline=0.3, cut=cut_a)))
+        await asyncio.sleep(0.1)
+        second = asyncio.ensure_future(consume(parser.stream_news(window=0.01, deadline=0.5, cut=cut_b)))
+        results = await asyncio.gather(first, second)
+        await http_client.close_session()
+        return results, cut_a, cut_b
+
+    (first, second), cut_a, cut_b = asyncio.run(main())
+    assert first == ["fast"] and cut_a == ["slow"]
+    assert sorted(second) == ["fast", "slow"] and cut_b == []
+
+
+def test_collect_all_news_cuts_slow_sources(sources):
+    sources({"fast": 0.01, "slow": 1})
+
+    async def main():
+        result = await parser.collect_all_news(deadline=0.2)
+        await http_client.close_session()
+        return result
+
+    news, cut = asyncio.run(main())
+    assert [item.source for item in news] == ["fast"]
+    assert cut == ["slow"]
+
+
+def test_cancelled_source_task_counts_as_cut():
+    async def main():
+        task = asyncio.ensure_future(asyncio.sleep(1))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.sleep(0)
+        return parser.task_results({task}), parser.cut_sources({task: "v1"}, {task}, set())
+
+    assert asyncio.run(main()) == ([], ["v1"])
+
+
+def test_format_news_escapes_html():
+    item = NewsItem(cutoff(0), "vk", "https://vk.com/wall-1_2?a=1&b=2", "Цены <выше> & ДТП")
+    block = parser.format_news(item)
+    assert "Цены &lt;выше&gt; &amp; ДТП" in block
+    assert "https://vk.com/wall-1_2?a=1&amp;b=2" in block
+
+
+def test_format_news_truncates_title_before_markup():
+    item = NewsItem(cutoff(0), "vk", "https://vk.com/wall-1_2", "Пожар & " * 1000)
+    block = parser.format_news(item)
+    assert message_length(block) <= MESSAGE_LIMIT
+    assert block.startswith("<b>📢 Заголовок:</b> Пожар &amp; ")
+    assert block.endswith("-" * 72)
+    assert "…\n<b>🔗 Ссылка:</b>" in block
+
+
+class RecordingBot:
+    """Бот, который запоминает отправленные сообщения."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        self.sent.append(text)
+
+
+class FakeMessage:
+    """Команда пользователя: ответы через message.answer записываются в answers."""
+
+    def __init__(self, chat_id=1):
+        self.chat = SimpleNamespace(id=chat_id)
+        self.answers = []
+
+    async def answer(self, text):
+        self.answers.append(text)
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.setattr(delivery, "CHAT_RATE", 1000)
+    bot = RecordingBot()
+    monkeypatch.setattr(parser, "delivery", DeliveryQueue(bot))
+    return bot
+
+
+def start(message):
+    async def main():
+        await parser.handle_start(message)
+        await parser.delivery.join()
+        await http_client.close_session()
+
+    asyncio.run(main())
+
+
+def test_start_sends_cut_notice_after_news(sources, bot, monkeypatch):
+    sources({"fast": 0.01, "slow": 1})
+    stream_news = parser.stream_news
+    monkeypatch.setattr(parser, "stream_news", lambda cut=None: stream_news(window=0.01, deadline=0.2, cut=cut))
+
+    message = FakeMessage()
+    start(message)
+    assert len(message.answers) == 1  # Только «Собираю свежие новости»
+    assert len(bot.sent) == 2
+    assert "Пожар (fast)" in bot.sent[0]
+    assert bot.sent[1] == "⏱ Не успели ответить полностью: slow"
+
+
+def test_start_without_news_reports_through_queue(sources, bot, monkeypatch):
+    monkeypatch.setattr(parser, "SOURCES", {})
+
+    message = FakeMessage()
+    start(message)
+    assert bot.sent == ["❗️ Новостей за последние сутки не найдено."]
+
+
+def test_start_answers_from_snapshot_without_fetching(bot, monkeypatch, tmp_path):
+    calls = []
+
+    def make_fetch(source_id):
+        async def fetch(session):
+            calls.append(source_id)
+            return [make_item(source_id)]
+        return fetch
+
+    monkeypatch.setattr(parser, "SOURCES", {source_id: make_fetch(source_id) for source_id in ("snap_a", "snap_b")})
+    monkeypatch.setitem(budget._truncated, "snap_b", True)
+    news_cache._caches.clear()
+
+    async def push(news_list):
+        pass
+
+    message = FakeMessage()
+
+    async def main():
+        collector = BackgroundCollector(parser.SOURCES, push, store=SeenStore(tmp_path / "seen.sqlite3"))
+        for source_id in parser.SOURCES:
+            await collector.collect(source_id)
+        assert collector.has_snapshot()
+        monkeypatch.setattr(parser, "collector", collector)
+        calls.clear()
+
+        await parser.handle_start(message)
+        await parser.delivery.join()
+        await http_client.close_session()
+
+    try:
+        asyncio.run(main())
+    finally:
+        news_cache._caches.clear()
+
+    assert calls == []
+    assert message.answers == []  # Без «Собираю свежие новости»
+    assert len(bot.sent) == 2
+    assert "Пожар (snap_a)" in bot.sent[0] and "Пожар (snap_b)" in bot.sent[0]
+    assert bot.sent[1] == "⏱ Не успели ответить полностью: snap_b"
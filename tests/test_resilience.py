@@ -0,0 +1,213 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError
+from tests.fake_http import FakeHttpServer
+
+
+@pytest.fixture(autouse=True)
+def fresh_policies(monkeypatch):
+    monkeypatch.setattr(resilience, "_policies", {})
+    monkeypatch.setattr(resilience, "RETRY_BACKOFF", 0.01)
+
+
+@pytest.fixture
+def jitter(monkeypatch):
+    """Границы случайных пауз retry_delay; сама пауза — нулевая."""
+    bounds = []
+
+    def uniform(low, high):
+        bounds.append((low, high))
+        return 0.0
+
+    monkeypatch.setattr(resilience.random, "uniform", uniform)
+    return bounds
+
+
+def run_with_server(test, script=(), default=(200, 0, {})):
+    async def main():
+        async with FakeHttpServer(script, default) as server, aiohttp.ClientSession() as session:
+            return await test(server, session)
+
+    return asyncio.run(main())
+
+
+async def get(session, url, method="GET", **kwargs):
+    async with resilience.request(session, method, url, **kwargs) as response:
+        return response.status
+
+
+def test_server_error_is_retried_with_full_jitter(jitter):
+    async def test(server, session):
+        return server, await get(session, server.url)
+
+    server, status = run_with_server(test, script=[(500, 0, {}), (502, 0, {})])
+    assert status == 200
+    assert len(server.calls) == 3
+    # Пауза перед повтором n — случайная от 0 до RETRY_BACKOFF * 2**n
+    assert jitter == [(0, 0.01), (0, 0.02)]
+
+
+def test_retries_are_limited(jitter):
+    async def test(server, session):
+        return server, await get(session, server.url, retries=1)
+
+    server, status = run_with_server(test, default=(503, 0, {}))
+    assert status == 503
+    assert len(server.calls) == 2
+
+
+def test_too_many_requests_honours_retry_after(jitter):
+    async def test(server, session):
+        status = await get(session, server.url, retries=1)
+        return server, status, resilience.host_policy("127.0.0.1")
+
+    server, status, policy = run_with_server(test, default=(429, 0, {"Retry-After": "0.2"}))
+    assert status == 429
+    (_, first), (_, second) = server.calls
+    assert second - first >= 0.2
+    # Хост просит сбавить темп, но он жив: автомат отключения не срабатывает
+    assert policy.bucket.rate == resilience.HOST_RATE_LIMIT / 4
+    assert policy.breaker.failures == 0
+    assert policy.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_post_is_sent_once(jitter):
+    async def test(server, session):
+        return server, await get(session, server.url, method="POST", data={"field": "value"})
+
+    server, status = run_with_server(test, default=(503, 0, {}))
+    assert status == 503
+    assert [method for method, _ in server.calls] == ["POST"]
+
+
+def test_breaker_opens_and_recovers_after_cooldown(jitter, monkeypatch):
+    states = []
+    monkeypatch.setattr(resilience.metrics, "set_circuit_state", lambda host, state: states.append(state))
+
+    async def test(server, session):
+        policy = resilience.host_policy("127.0.0.1")
+        policy.breaker.cooldown = 0.1
+        for _ in range(resilience.BREAKER_FAILURES):
+            assert await get(session, server.url, retries=0) == 500
+        assert states == [CircuitBreaker.OPEN]
+
+        # Пока хост отключён, запросы до него не доходят
+        with pytest.raises(CircuitOpenError):
+            await get(session, server.url)
+        assert len(server.calls) == resilience.BREAKER_FAILURES
+
+        await asyncio.sleep(0.1)
+        server.default = (200, 0, {})
+        assert await get(session, server.url) == 200
+        return policy
+
+    policy = run_with_server(test, default=(500, 0, {}))
+    assert states == [CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN, CircuitBreaker.CLOSED]
+    assert policy.breaker.failures == 0
+
+
+def test_failed_probe_opens_breaker_again(jitter):
+    async def test(server, session):
+        policy = resilience.host_policy("127.0.0.1")
+        policy.breaker.cooldown = 0.05
+        for _ in range(resilience.BREAKER_FAILURES):
+            await get(session, server.url, retries=0)
+        await asyncio.sleep(0.05)
+        assert await get(session, server.url, retries=0) == 500
+        return policy
+
+    policy = run_with_server(test, default=(500, 0, {}))
+    assert policy.breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_REQUESTS", True)
+    monkeypatch.setattr(resilience, "HEDGE_MAX_RATIO", 1.0)
+
+
+def prefill(policy, latency, count):
+    for _ in range(count):
+        policy.latency.add(latency)
+
+
+def test_no_hedge_before_enough_samples(hedging):
+    async def test(server, session):
+        policy = resilience.host_policy("127.0.0.1")
+        prefill(policy, 0.01, resilience.HEDGE_MIN_SAMPLES - 1)
+        assert policy.hedge_delay() is None
+        assert await get(session, server.url) == 200
+        return server, policy
+
+    server, policy = run_with_server(test, default=(200, 0.1, {}))
+    assert len(server.calls) == 1
+    assert policy.hedges == 0
+
+
+def test_hedge_fires_only_past_the_percentile(hedging):
+    async def test(server, session):
+        policy = resilience.host_policy("127.0.0.1")
+        prefill(policy, 0.15, resilience.HEDGE_WINDOW)
+        # Ответ быстрее порога: дубля нет
+        assert await get(session, server.url) == 200
+        assert (len(server.calls), policy.hedges) == (1, 0)
+
+        # Ответа нет дольше порога: дубль отвечает первым
+        server.script.extend([(200, 1.0, {}), (200, 0, {})])
+        assert await get(session, server.url) == 200
+        return server, policy
+
+    server, policy = run_with_server(test, default=(200, 0.01, {}))
+    assert len(server.calls) == 3
+    assert (policy.hedges, policy.hedge_wins) == (1, 1)
+
+
+def test_hedges_are_capped_by_ratio(hedging, monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_MAX_RATIO", 0.5)
+
+    async def test(server, session):
+        policy = resilience.host_policy("127.0.0.1")
+        prefill(policy, 0.01, resilience.HEDGE_WINDOW)
+        for _ in range(4):
+            assert await get(session, server.url) == 200
+        return policy
+
+    policy = run_with_server(test, default=(200, 0.1, {}))
+    assert policy.requests == 4
+    assert policy.hedges == 2
+
+
+def test_losing_request_is_cancelled_and_not_timed(hedging):
+    async def test(server, session):
+        policy = resilience.host_policy("127.0.0.1")
+        prefill(policy, 0.05, resilience.HEDGE_WINDOW)
+        samples = list(policy.latency.samples)
+        server.script.extend([(200, 1.0, {}), (200, 0, {})])
+        assert await get(session, server.url) == 200
+        await asyncio.sleep(0.1)  # Сервер замечает закрытое соединение
+        return server, policy, samples
+
+    server, policy, samples = run_with_server(test)
+    assert policy.hedge_wins == 1
+    assert server.cancelled == 1
+    # Замер добавил только ответивший дубль: окно сдвинулось на одно значение
+    assert list(policy.latency.samples)[:-1] == samples[1:]
+    assert policy.latency.samples[-1] < 0.5
+
+
+def test_cancelled_request_is_not_timed():
+    async def test(server, session):
+        policy = resilience.host_policy("127.0.0.1")
+        task = asyncio.create_task(get(session, server.url))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return policy
+
+    policy = run_with_server(test, default=(200, 1.0, {}))
+    assert not policy.latency.samples
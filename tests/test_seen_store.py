@@ -0,0 +1,61 @@
+import time
+
+from news_item import NewsItem
+from seen_store import BloomFilter, SeenStore, dedupe, item_keys
+
+
+def make_item(link, title, timestamp=1_790_000_000):
+    return NewsItem(timestamp, "v1", link, title)
+
+
+def test_dedupe_by_link_or_title_keeps_order():
+    items = [
+        make_item("https://v1.ru/1", "Пожар на складе"),
+        make_item("https://v1.ru/1", "Другой заголовок"),
+        make_item("https://v102.ru/7", "пожар  на   СКЛАДЕ"),
+        make_item("https://v102.ru/8", "ДТП на мосту"),
+    ]
+    assert dedupe(items) == [items[0], items[3]]
+
+
+def test_dedupe_across_lists_with_shared_keys():
+    seen_keys = set()
+    first = dedupe([make_item("https://v1.ru/1", "Пожар")], seen_keys)
+    second = dedupe([make_item("https://v1.ru/1", "Пожар"), make_item("https://v1.ru/2", "ДТП")], seen_keys)
+    assert [item.link for item in first + second] == ["https://v1.ru/1", "https://v1.ru/2"]
+
+
+def test_filter_new_and_persistence(tmp_path):
+    path = tmp_path / "seen.sqlite3"
+    store = SeenStore(path)
+    sent = make_item("https://v1.ru/1", "Пожар на складе")
+    assert store.is_empty()
+    assert store.filter_new([sent]) == [sent]
+
+    store.add([sent])
+    store.close()
+
+    reopened = SeenStore(path)
+    reprint = make_item("https://kp.ru/5", "Пожар на складе")
+    fresh = make_item("https://v1.ru/2", "ДТП на мосту")
+    assert reopened.filter_new([sent, reprint, fresh]) == [fresh]
+    assert not reopened.is_empty()
+
+
+def test_keys_expire_after_window(tmp_path):
+    store = SeenStore(tmp_path / "seen.sqlite3", window=60)
+    item = make_item("https://v1.ru/1", "Пожар")
+    store.add([item])
+    link_key = item_keys(item)[0]
+    with store.connection:
+        store.connection.execute("UPDATE seen_items SET seen_at = ?", (time.time() - 120,))
+    assert link_key not in store
+    assert store.filter_new([item]) == [item]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [item_keys(make_item(f"https://v1.ru/{number}", f"Новость {number}"))[0] for number in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
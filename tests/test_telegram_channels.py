@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+import news_item
+from benchmarks.fake_telegram import FakeTelegramClient
+from cursor_store import CursorStore
+from Sites import telegram_channels
+from Sites.telegram_channels import FETCH_LIMIT, fetch_channel, fetch_telegram_news
+
+RELEVANT = "Пожар на Университетском проспекте\nПодробности позже"
+OTHER = "Концерт в филармонии"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CursorStore(tmp_path / "cursors.sqlite3")
+    yield store
+    store.close()
+
+
+def collect(client, store, channel="vlg"):
+    return asyncio.run(fetch_channel(client, channel, news_item.cutoff(), store))
+
+
+def test_only_relevant_messages_become_news(store):
+    client = FakeTelegramClient()
+    client.post("vlg", RELEVANT)
+    client.post("vlg", OTHER)
+
+    news = collect(client, store)
+    assert [item.title for item in news] == ["Пожар на Университетском проспекте"]
+    assert news[0].link == "https://t.me/vlg/1"
+
+
+def test_next_collection_reads_only_newer_messages(store):
+    client = FakeTelegramClient()
+    client.post("vlg", RELEVANT)
+    client.post("vlg", OTHER)
+    collect(client, store)
+
+    client.post("vlg", "ДТП на мосту через Волгу")
+    client.requests.clear()
+    news = collect(client, store)
+
+    assert client.requests == [("vlg", 2)]
+    assert [item.link for item in news] == ["https://t.me/vlg/3", "https://t.me/vlg/1"]
+    assert store.get("telegram:vlg")[0] == 3
+
+
+def test_messages_older_than_a_day_are_skipped(store):
+    client = FakeTelegramClient()
+    client.post("vlg", RELEVANT, published=news_item.cutoff() - 60)
+    client.post("vlg", "ДТП на мосту через Волгу")
+
+    news = collect(client, store)
+    assert [item.link for item in news] == ["https://t.me/vlg/2"]
+
+
+def test_more_than_one_page_is_read_to_the_cursor(store):
+    client = FakeTelegramClient()
+    client.post("vlg", RELEVANT)
+    collect(client, store)
+
+    for _ in range(FETCH_LIMIT * 2 + 10):
+        client.post("vlg", "ДТП на мосту через Волгу")
+    client.requests.clear()
+    news = collect(client, store)
+
+    assert len(news) == FETCH_LIMIT * 2 + 11
+    assert len(client.requests) == 3
+    assert store.get("telegram:vlg")[0] == FETCH_LIMIT * 2 + 11
+
+
+def test_truncated_read_is_resumed_by_next_collections(store, monkeypatch):
+    monkeypatch.setattr(telegram_channels, "FETCH_LIMIT", 10)
+    monkeypatch.setattr(telegram_channels, "MAX_PAGES", 1)
+    client = FakeTelegramClient()
+    client.post("vlg", RELEVANT)
+    collect(client, store)
+
+    for _ in range(35):
+        client.post("vlg", "ДТП на мосту через Волгу")
+    collect(client, store)
+    assert store.get("telegram:vlg")[0] == 1
+    assert store.get("telegram:vlg")[2] == {"resume": 27, "top": 36}
+
+    # Пропуск дочитывается по странице за сбор, новые сообщения читаются сразу
+    for _ in range(3):
+        client.post("vlg", "ДТП на мосту через Волгу")
+    collect(client, store)
+    assert store.get("telegram:vlg")[2] == {"resume": 17, "top": 39}
+
+    collect(client, store)
+    news = collect(client, store)
+    cursor, _, state = store.get("telegram:vlg")
+    assert (cursor, state) == (39, {})
+    links = [item.link for item in news]
+    assert sorted(links) == sorted(f"https://t.me/vlg/{message_id}" for message_id in range(1, 40))
+
+
+def test_unknown_channel_is_empty():
+    client = FakeTelegramClient()
+    client.post("telegram_test_vlg", RELEVANT)
+    news = asyncio.run(fetch_telegram_news(client=client, channels=["telegram_test_missing", "telegram_test_vlg"]))
+    assert [item.link for item in news] == ["https://t.me/telegram_test_vlg/1"]
+    assert sorted(channel for channel, _ in client.requests) == ["telegram_test_missing", "telegram_test_vlg"]
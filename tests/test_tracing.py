@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def trace_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_DIR", str(tmp_path))
+    monkeypatch.setattr(tracing, "_trace_config", object())  # HTTP-сессии не трогаем
+    return tmp_path
+
+
+def span_names(directory, run_name):
+    (path,) = directory.glob(f"{run_name}-*.trace.json")
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    return sorted(event["name"] for event in events if event["ph"] == "X" and event["cat"] != "loop")
+
+
+def test_concurrent_runs_write_to_own_traces(trace_dir):
+    async def collect(name):
+        async with tracing.run(name):
+            await asyncio.sleep(0.01)
+            with tracing.span(f"{name} work", "source"):
+                await asyncio.sleep(0.01)
+            # Задача, созданная внутри сбора, пишет в его трассу
+            await asyncio.create_task(child(name))
+
+    async def child(name):
+        with tracing.span(f"{name} child", "http"):
+            await asyncio.sleep(0.01)
+
+    async def outside():
+        for _ in range(5):
+            with tracing.span("outside", "http"):
+                await asyncio.sleep(0.005)
+
+    async def main():
+        await asyncio.gather(collect("first"), collect("second"), outside())
+
+    asyncio.run(main())
+    assert span_names(trace_dir, "first") == ["first", "first child", "first work"]
+    assert span_names(trace_dir, "second") == ["second", "second child", "second work"]
+
+
+def test_nested_run_is_a_span_of_outer(trace_dir):
+    async def main():
+        async with tracing.run("outer"):
+            async with tracing.run("inner"):
+                pass
+        assert tracing.span("after", "http") is tracing._NO_SPAN
+
+    asyncio.run(main())
+    assert span_names(trace_dir, "outer") == ["inner", "outer"]
+    assert not list(trace_dir.glob("inner-*"))
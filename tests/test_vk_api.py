@@ -0,0 +1,206 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+import vk_api
+from cursor_store import CursorStore
+from news_item import cutoff
+from rate_limit import TokenBucket
+from tests.fake_vk import FakeVkServer
+
+NOW = cutoff(0)
+HOUR = 60 * 60
+
+
+@pytest.fixture(autouse=True)
+def fast_rate_limit(monkeypatch):
+    monkeypatch.setattr(vk_api, "_rate_limiter", TokenBucket(1000))
+
+
+def run_with_server(test, execute=True):
+    async def main():
+        async with FakeVkServer(execute=execute) as server, aiohttp.ClientSession() as session:
+            return await test(server, session)
+
+    return asyncio.run(main())
+
+
+def test_wall_params():
+    assert vk_api.wall_params("108998119") == {"owner_id": -108998119, "count": vk_api.POSTS_PER_GROUP}
+    assert vk_api.wall_params("ghest_volgograd", 30, 60) == {"domain": "ghest_volgograd", "count": 30, "offset": 60}
+
+
+def test_execute_batches_of_25():
+    groups = [f"group{number}" for number in range(30)]
+
+    async def test(server, session):
+        for group in groups:
+            server.post(group, f"Пожар {group}", NOW - HOUR)
+        walls, errors = await vk_api.fetch_walls(session, groups, "token", server.url)
+        return server, walls, errors
+
+    server, walls, errors = run_with_server(test)
+    assert errors == {}
+    assert sorted(walls) == sorted(groups)
+    assert [(method, len(calls)) for method, calls in server.calls] == [("execute", 25), ("execute", 5)]
+
+
+def test_execute_reports_errors_per_group():
+    async def test(server, session):
+        server.post("open", "Пожар", NOW - HOUR)
+        server.post("closed", "Пожар", NOW - HOUR)
+        server.failing["closed"] = (30, "This profile is private")
+        return await vk_api.fetch_walls(session, ["open", "closed"], "token", server.url)
+
+    walls, errors = run_with_server(test)
+    assert list(walls) == ["open"]
+    assert errors == {"closed": "[30] This profile is private"}
+
+
+def test_falls_back_to_single_wall_get_without_execute():
+    groups = ["first", "second", "108998119"]
+
+    async def test(server, session):
+        for group in groups:
+            server.post(group, f"ДТП {group}", NOW - HOUR)
+        walls, errors = await vk_api.fetch_walls(session, groups, "token", server.url)
+        return server, walls, errors
+
+    server, walls, errors = run_with_server(test, execute=False)
+    assert errors == {}
+    assert sorted(walls) == sorted(groups)
+    methods = [method for method, _ in server.calls]
+    assert methods == ["execute"] + ["wall.get"] * len(groups)
+
+
+def test_collect_filters_by_keywords_and_day(tmp_path):
+    async def test(server, session):
+        server.post("news", "Пожар на складе\nподробности", NOW - 2 * 24 * HOUR)
+        server.post("news", "Концерт в парке", NOW - 2 * HOUR)
+        server.post("news", "ДТП на мосту\nподробности", NOW - HOUR)
+        return await vk_api.collect_vk_posts(
+            "token", ["news"], session=session, api_url=server.url, store=CursorStore(tmp_path / "cursors.sqlite3")
+        )
+
+    news, errors = run_with_server(test)
+    assert errors == {}
+    assert [(item.title, item.link, item.source) for item in news] == [
+        ("ДТП на мосту", "https://vk.com/wall-1000_3", "vk"),
+    ]
+
+
+def test_collect_reports_group_errors(tmp_path):
+    async def test(server, session):
+        server.post("news", "ДТП на мосту", NOW - HOUR)
+        return await vk_api.collect_vk_posts(
+            "token", ["news", "missing"], session=session, api_url=server.url,
+            store=CursorStore(tmp_path / "cursors.sqlite3"),
+        )
+
+    news, errors = run_with_server(test)
+    assert [item.title for item in news] == ["ДТП на мосту"]
+    assert list(errors) == ["missing"]
+
+
+def collect(server, session, store, groups=("news",)):
+    return vk_api.collect_vk_posts("token", list(groups), session=session, api_url=server.url, store=store)
+
+
+def cursor_key(group="news"):
+    return f"vk:first_line_title:{group}"
+
+
+def test_first_collection_reads_the_whole_day(tmp_path):
+    store = CursorStore(tmp_path / "cursors.sqlite3")
+
+    async def test(server, session):
+        server.post("news", "Пожар на складе", NOW - 2 * 24 * HOUR)
+        for number in range(150):
+            server.post("news", f"ДТП на мосту {number}", NOW - 23 * HOUR + number * 60)
+        news, errors = await collect(server, session, store)
+        return server, news, errors
+
+    server, news, errors = run_with_server(test)
+    assert errors == {}
+    assert len(news) == 150
+    assert server.pages("news") == [(0, vk_api.MAX_PAGE), (vk_api.MAX_PAGE, vk_api.MAX_PAGE)]
+    cursor, kept, state = store.get(cursor_key())
+    assert cursor == 151
+    assert len(kept) == 150
+    assert state["rate"] == pytest.approx(150 / vk_api.DAY)
+
+
+def test_next_collection_stops_at_cursor_with_small_page(tmp_path):
+    store = CursorStore(tmp_path / "cursors.sqlite3")
+
+    async def test(server, session):
+        for number in range(10):
+            server.post("news", f"ДТП на мосту {number}", NOW - 10 * HOUR + number * 60)
+        await collect(server, session, store)
+        server.calls.clear()
+
+        server.post("news", "Пожар на складе\nподробности", NOW)
+        news, errors = await collect(server, session, store)
+        return server, news, errors
+
+    server, news, errors = run_with_server(test)
+    assert errors == {}
+    assert server.pages("news") == [(0, vk_api.MIN_PAGE)]
+    assert [item.title for item in news][:2] == ["Пожар на складе", "ДТП на мосту 9"]
+    assert len(news) == 11
+    assert store.get(cursor_key())[0] == 11
+
+
+def test_full_page_doubles_the_next_one(tmp_path):
+    store = CursorStore(tmp_path / "cursors.sqlite3")
+
+    async def test(server, session):
+        server.post("news", "ДТП на мосту", NOW - 10 * HOUR)
+        await collect(server, session, store)
+        server.calls.clear()
+
+        # Постов больше, чем ожидалось по частоте: страницы растут вдвое
+        for number in range(20):
+            server.post("news", f"Пожар {number}", NOW - HOUR + number * 60)
+        news, _ = await collect(server, session, store)
+        return server, news
+
+    server, news = run_with_server(test)
+    assert server.pages("news") == [(0, 3), (3, 6), (9, 12)]
+    assert len(news) == 21
+
+
+def test_pinned_post_does_not_stop_paging(tmp_path):
+    store = CursorStore(tmp_path / "cursors.sqlite3")
+
+    async def test(server, session):
+        server.post("news", "Пожар на складе год назад", NOW - 365 * 24 * HOUR, pinned=True)
+        for number in range(3):
+            server.post("news", f"ДТП на мосту {number}", NOW - 3 * HOUR + number * 60)
+        first, _ = await collect(server, session, store)
+
+        server.post("news", "ДТП на трассе", NOW)
+        second, _ = await collect(server, session, store)
+        return first, second
+
+    first, second = run_with_server(test)
+    assert [item.title for item in first] == ["ДТП на мосту 2", "ДТП на мосту 1", "ДТП на мосту 0"]
+    assert [item.title for item in second] == ["ДТП на трассе", "ДТП на мосту 2", "ДТП на мосту 1", "ДТП на мосту 0"]
+
+
+def test_group_error_keeps_stored_news_and_cursor(tmp_path):
+    store = CursorStore(tmp_path / "cursors.sqlite3")
+
+    async def test(server, session):
+        server.post("news", "ДТП на мосту", NOW - HOUR)
+        await collect(server, session, store)
+
+        server.post("news", "Пожар на складе", NOW)
+        server.failing["news"] = (6, "Too many requests per second")
+        return await collect(server, session, store)
+
+    news, errors = run_with_server(test)
+    assert [item.title for item in news] == ["ДТП на мосту"]
+    assert errors == {"news": "[6] Too many requests per second"}
+    assert store.get(cursor_key())[0] == 1
@@ -0,0 +1,341 @@
+"""
+Трассировка сбора новостей.
+
+Если задан TRACE_DIR, каждый сбор (run) записывает временную шкалу в
+формате Trace Event: её открывают ui.perfetto.dev и chrome://tracing.
+На шкале — сбор каждого источника, HTTP-запросы (до получения заголовков
+ответа), загрузка лент и страниц статей вместе с чтением тела, разбор
+страниц, проверки фильтра ключевых слов и периоды, когда event loop был
+заблокирован. Одновременные отрезки источника раскладываются по дорожкам
+«источник», «источник #1», ... — получается водопад запросов, в котором
+видны последовательные await и долгий разбор.
+
+TRACE_PROFILE=1 включает семплирующий профилировщик: фоновый поток снимает
+стек потока event loop и сохраняет свёрнутые стеки (.folded) для
+flamegraph.pl или speedscope. TRACE_MEMORY=1 сохраняет снимок tracemalloc
+(.memory.txt): самые большие места выделения памяти за сбор.
+
+Трасса сбора хранится в contextvars, как и группа дорожек: в неё пишут
+только код внутри run() и задачи, созданные в нём. Одновременные сборы
+(фоновый сбор и команда /start) пишут каждый в свою трассу, а код вне
+сборов — никуда.
+
+Без TRACE_DIR span() возвращает общий пустой объект, а run() ничего не
+делает.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+
+from config import TRACE_DIR, TRACE_MEMORY, TRACE_PROFILE, TRACE_PROFILE_INTERVAL
+
+MAIN = "main"
+LOOP_LANE = ("event loop", 0)
+
+LOOP_CHECK_INTERVAL = 0.01      # Период проверки event loop, секунд
+LOOP_BLOCK_THRESHOLD = 0.005    # С какой задержки event loop считается заблокированным, секунд
+MEMORY_TOP = 30                 # Сколько мест выделения памяти сохранять
+
+logger = logging.getLogger(__name__)
+
+# Группа дорожек текущего кода: id источника или MAIN
+_group = contextvars.ContextVar("trace_group", default=MAIN)
+
+# Трасса сбора, внутри которого выполняется текущий код
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    """События одного сбора."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.events = []
+        self._busy = {}         # группа -> занятость дорожек
+        self._tids = {}         # (группа, номер дорожки) -> tid
+        self._groups = {}       # группа -> порядковый номер
+
+    def acquire_lane(self, group):
+        busy = self._busy.setdefault(group, [])
+        for index, taken in enumerate(busy):
+            if not taken:
+                busy[index] = True
+                return group, index
+        busy.append(True)
+        return group, len(busy) - 1
+
+    def release_lane(self, lane):
+        group, index = lane
+        self._busy[group][index] = False
+
+    def _tid(self, lane):
+        tid = self._tids.get(lane)
+        if tid is None:
+            self._groups.setdefault(lane[0], len(self._groups))
+            tid = self._tids[lane] = len(self._tids) + 1
+        return tid
+
+    def complete(self, name, category, lane, start, end, args=None):
+        """Отрезок [start, end] (значения time.perf_counter) на дорожке lane."""
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "pid": 1,
+            "tid": self._tid(lane),
+            "ts": round((start - self.started) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "args": args or {},
+        })
+
+    def as_dict(self):
+        metadata = [{"name": "process_name", "ph": "M", "pid": 1, "args": {"name": self.name}}]
+        for (group, index), tid in self._tids.items():
+            metadata.append({
+                "name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                "args": {"name": f"{group} #{index}" if index else group},
+            })
+            metadata.append({
+                "name": "thread_sort_index", "ph": "M", "pid": 1, "tid": tid,
+                "args": {"sort_index": self._groups[group] * 1000 + index},
+            })
+        return {"traceEvents": metadata + self.events, "displayTimeUnit": "ms"}
+
+
+class Span:
+    """
+    Отрезок на шкале текущего сбора: with span(...) или begin() ... end().
+    group делает отрезок корнем группы дорожек: вложенный код (и созданные
+    в нём задачи) рисуется на дорожках этой группы.
+    """
+
+    __slots__ = ("trace", "name", "category", "group", "args", "lane", "start", "token")
+
+    def __init__(self, trace, name, category, group=None, args=None):
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.group = group
+        self.args = args or {}
+        self.lane = None
+        self.start = None
+        self.token = None
+
+    def begin(self):
+        if self.group is not None:
+            self.token = _group.set(self.group)
+        self.lane = self.trace.acquire_lane(self.group or _group.get())
+        self.start = time.perf_counter()
+        return self
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def end(self, **args):
+        self.args.update(args)
+        self.trace.release_lane(self.lane)
+        self.trace.complete(self.name, self.category, self.lane, self.start, time.perf_counter(), self.args)
+        if self.token is not None:
+            _group.reset(self.token)
+            self.token = None
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.end()
+
+
+class _NoSpan:
+    """Отрезок, когда трассировка выключена: все методы ничего не делают."""
+
+    __slots__ = ()
+
+    def begin(self):
+        return self
+
+    def set(self, **args):
+        pass
+
+    def end(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, category, group=None, **args):
+    """Отрезок на шкале текущего сбора (пустой объект, если сбор не трассируется)."""
+    trace = _trace.get()
+    if trace is None:
+        return _NO_SPAN
+    return Span(trace, name, category, group, args)
+
+
+class SamplingProfiler:
+    """
+    Каждые interval секунд снимает стек потока thread_id и считает
+    одинаковые стеки. Кадры — «модуль.функция», поэтому строки одной
+    функции складываются вместе.
+    """
+
+    def __init__(self, interval, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).stem}.{getattr(code, 'co_qualname', code.co_name)}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self):
+        """Стеки в свёрнутом формате: «корень;...;лист число_снимков» на строку."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+async def _on_request_start(session, context, params):
+    context.span = span(f"{params.method} {params.url.host}{params.url.path}", "http", url=str(params.url)).begin()
+
+
+async def _on_request_end(session, context, params):
+    context.span.end(status=params.response.status)
+
+
+async def _on_request_exception(session, context, params):
+    context.span.end(error=repr(params.exception))
+
+
+def trace_config():
+    """aiohttp.TraceConfig, записывающий HTTP-запросы в текущий сбор."""
+    import aiohttp
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(_on_request_start)
+    config.on_request_end.append(_on_request_end)
+    config.on_request_exception.append(_on_request_exception)
+    return config
+
+
+_trace_config = None
+
+
+def install():
+    """Подключает запись HTTP-запросов к сессиям http_client, созданным после вызова (только с TRACE_DIR)."""
+    global _trace_config
+    if not TRACE_DIR or _trace_config is not None:
+        return
+    import http_client
+    _trace_config = trace_config()
+    http_client.trace_configs.append(_trace_config)
+
+
+async def _watch_loop(trace):
+    """Отмечает на шкале периоды, когда event loop не успевал разбудить корутину вовремя."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LOOP_CHECK_INTERVAL)
+        lag = loop.time() - started - LOOP_CHECK_INTERVAL
+        if lag >= LOOP_BLOCK_THRESHOLD:
+            end = time.perf_counter()
+            trace.complete("event loop blocked", "loop", LOOP_LANE, end - lag, end, {"lag_ms": round(lag * 1000, 1)})
+
+
+def _memory_report(snapshot):
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+    lines = [f"Выделено сейчас: {current / 1024:.0f} КБ, пик за сбор: {peak / 1024:.0f} КБ", ""]
+    lines.extend(str(stat) for stat in snapshot.statistics("lineno")[:MEMORY_TOP])
+    return "\n".join(lines) + "\n"
+
+
+@asynccontextmanager
+async def run(name):
+    """
+    Трассирует сбор name: с TRACE_DIR записывает шкалу (и профиль, и снимок
+    памяти, если они включены) в TRACE_DIR/<name>-<время>.*. Вложенные
+    сборы становятся отрезками внешнего.
+    """
+    if not TRACE_DIR or _trace.get() is not None:
+        with span(name, "run"):
+            yield
+        return
+
+    install()
+    trace = Trace(name)
+    token = _trace.set(trace)
+    profiler = SamplingProfiler(TRACE_PROFILE_INTERVAL) if TRACE_PROFILE else None
+    own_tracemalloc = TRACE_MEMORY and not tracemalloc.is_tracing()
+    if own_tracemalloc:
+        tracemalloc.start()
+    if TRACE_MEMORY:
+        tracemalloc.reset_peak()
+    if profiler is not None:
+        profiler.start()
+    watcher = asyncio.create_task(_watch_loop(trace))
+
+    try:
+        with span(name, "run"):
+            yield
+    finally:
+        watcher.cancel()
+        _trace.reset(token)
+        if profiler is not None:
+            profiler.stop()
+        snapshot = tracemalloc.take_snapshot() if TRACE_MEMORY else None
+
+        directory = Path(TRACE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        base = directory / f"{name}-{datetime.now():%Y%m%d-%H%M%S-%f}"
+        path = base.with_name(base.name + ".trace.json")
+        path.write_text(json.dumps(trace.as_dict(), ensure_ascii=False), encoding="utf-8")
+        logger.info(f"Трасса сбора: {path} (откройте в ui.perfetto.dev или chrome://tracing)")
+
+        if profiler is not None:
+            profile_path = base.with_name(base.name + ".folded")
+            profile_path.write_text(profiler.folded(), encoding="utf-8")
+            logger.info(f"Профиль сбора ({sum(profiler.stacks.values())} снимков стека): {profile_path}")
+        if snapshot is not None:
+            memory_path = base.with_name(base.name + ".memory.txt")
+            memory_path.write_text(_memory_report(snapshot), encoding="utf-8")
+            logger.info(f"Снимок памяти: {memory_path}")
+        if own_tracemalloc:
+            tracemalloc.stop()
@@ -0,0 +1,316 @@
+"""
+Асинхронный сбор постов со стен групп ВКонтакте.
+
+Вместо отдельного блокирующего requests.get на каждую группу стены
+запрашиваются пачками через метод execute (до 25 вызовов wall.get в одном
+запросе). Частота запросов ограничена ведром токенов по лимиту VK API, а
+ошибки возвращаются отдельно для каждой группы.
+
+Стены читаются инкрементально. Для каждой группы cursor_store хранит id и
+время последнего увиденного поста, отобранные за сутки новости и оценку
+частоты постов. Сбор запрашивает страницы (offset) от новых постов к
+старым, пока не встретит уже увиденный пост или пост старше суток, поэтому
+в оживлённых группах не теряются посты, а в тихих не загружаются заново
+одни и те же. Размер первой страницы подбирается по частоте постов группы
+и времени с прошлого сбора, так что обычно на группу хватает одной
+страницы, а все группы читаются одним вызовом execute.
+"""
+import asyncio
+import json
+import logging
+import math
+
+import metrics
+import resilience
+from config import VK_ACCESS_TOKEN, VK_GROUPS
+from cursor_store import cursor_store
+from http_client import get_session
+from keyword_filter import is_relevant
+from news_item import DAY, NewsItem, cutoff, now
+from rate_limit import TokenBucket
+
+API_VERSION = "5.131"
+VK_API_URL = "https://api.vk.com/method"
+
+POSTS_PER_GROUP = 10
+EXECUTE_BATCH_SIZE = 25     # Максимум вызовов API внутри одного execute
+
+MAX_PAGE = 100              # Максимум постов в одном вызове wall.get
+MIN_PAGE = 3                # Наименьшая страница: закреплённый пост и пара новых
+PAGE_MARGIN = 1.5           # Запас первой страницы к ожидаемому числу новых постов
+MAX_PAGES = 10              # Больше страниц одной группы за сбор не запрашивается
+RATE_SMOOTHING = 0.3        # Вес нового наблюдения в оценке частоты постов группы
+VK_RATE_LIMIT = 3           # Запросов в секунду для одного ключа доступа
+
+logger = logging.getLogger(__name__)
+
+_rate_limiter = TokenBucket(VK_RATE_LIMIT)
+
+
+class VkApiError(Exception):
+    """Ошибка, которую вернул VK API."""
+
+    def __init__(self, code, message):
+        super().__init__(f"[{code}] {message}")
+        self.code = code
+        self.message = message
+
+
+def first_line_title(text):
+    """Заголовок поста — его первая строка."""
+    return text.split("\n")[0] if "\n" in text else text
+
+
+def wall_params(group, count=POSTS_PER_GROUP, offset=0):
+    """Параметры wall.get для группы: числовой id или короткое имя."""
+    if group.isdigit():
+        params = {"owner_id": -int(group), "count": count}
+    else:
+        params = {"domain": group, "count": count}
+    if offset:
+        params["offset"] = offset
+    return params
+
+
+async def call_method(session, method, params, access_token, api_url=VK_API_URL):
+    """Вызывает метод VK API с учётом ограничения частоты и возвращает разобранный JSON-ответ."""
+    await _rate_limiter.acquire()
+    data = {**params, "access_token": access_token, "v": API_VERSION}
+    async with resilience.request(session, "POST", f"{api_url}/{method}", data=data) as response:
+        response.raise_for_status()
+        payload = await response.json(content_type=None)
+
+    if "error" in payload:
+        error = payload["error"]
+        raise VkApiError(error.get("error_code"), error.get("error_msg"))
+    return payload
+
+
+async def fetch_walls_batch(session, groups, access_token, api_url=VK_API_URL, pages=None):
+    """
+    Запрашивает стены нескольких групп одним вызовом execute; pages задаёт
+    параметры wall.get для групп ({группа: параметры}, по умолчанию wall_params).
+    Возвращает словари {группа: посты} и {группа: текст ошибки}.
+    """
+    pages = pages or {}
+    calls = ", ".join(
+        f"API.wall.get({json.dumps(pages.get(group) or wall_params(group))})" for group in groups
+    )
+    payload = await call_method(session, "execute", {"code": f"return [{calls}];"}, access_token, api_url)
+
+    walls, errors = {}, {}
+    # Для каждого неудачного вызова execute возвращает false, а описание
+    # ошибки кладёт по порядку в execute_errors
+    execute_errors = iter(payload.get("execute_errors", []))
+    for group, result in zip(groups, payload.get("response") or []):
+        if result:
+            walls[group] = result.get("items", [])
+        else:
+            error = next(execute_errors, {})
+            errors[group] = f"[{error.get('error_code')}] {error.get('error_msg')}"
+    return walls, errors
+
+
+async def fetch_wall(session, group, access_token, api_url=VK_API_URL, params=None):
+    """Запрашивает стену одной группы через wall.get."""
+    payload = await call_method(session, "wall.get", params or wall_params(group), access_token, api_url)
+    return payload["response"].get("items", [])
+
+
+async def fetch_walls(session, groups, access_token, api_url=VK_API_URL, pages=None):
+    """
+    Запрашивает стены всех групп: пачками через execute, а если execute
+    недоступен для ключа (например, сервисного), — отдельными wall.get.
+    pages задаёт параметры wall.get для групп ({группа: параметры}).
+    Возвращает словари {группа: посты} и {группа: текст ошибки}.
+    """
+    pages = pages or {}
+    walls, errors = {}, {}
+    fallback = []
+
+    for start in range(0, len(groups), EXECUTE_BATCH_SIZE):
+        batch = groups[start:start + EXECUTE_BATCH_SIZE]
+        try:
+            batch_walls, batch_errors = await fetch_walls_batch(session, batch, access_token, api_url, pages)
+            walls.update(batch_walls)
+            errors.update(batch_errors)
+        except VkApiError as e:
+            logger.warning(f"execute недоступен ({e}), запрашиваем группы по одной")
+            fallback.extend(batch)
+        except Exception as e:
+            for group in batch:
+                errors[group] = str(e)
+
+    async def fetch_single(group):
+        try:
+            walls[group] = await fetch_wall(session, group, access_token, api_url, pages.get(group))
+        except Exception as e:
+            errors[group] = str(e)
+
+    # Запросы идут параллельно, темп задаёт общее ведро токенов
+    await asyncio.gather(*(fetch_single(group) for group in fallback))
+
+    return walls, errors
+
+
+class WallPoll:
+    """
+    Чтение стены одной группы за сбор: страницы от новых постов к старым до
+    курсора (последнего увиденного поста) или границы суток.
+    """
+
+    def __init__(self, group, key, threshold, polled, store):
+        self.group = group
+        self.key = key
+        self.threshold = threshold
+        self.polled = polled
+        self.store = store
+        self.cursor, kept, self.state = store.get(key)
+        self.kept = [item for item in kept if item.timestamp >= threshold]
+        self.offset = 0
+        self.count = self.first_page()
+        self.pages = 0
+        self.posts = []
+        self.done = False
+        self.truncated = False
+
+    def first_page(self):
+        """
+        Размер первой страницы: ожидаемое по частоте постов число новых
+        постов с запасом и место для закреплённого поста. Для группы без
+        истории — максимальная страница.
+        """
+        rate = self.state.get("rate")
+        if rate is None:
+            return MAX_PAGE
+        since = DAY if self.cursor is None else self.polled - self.state.get("polled", self.polled - DAY)
+        expected = rate * min(max(since, 0), DAY)
+        return min(max(math.ceil(expected * PAGE_MARGIN) + 1, MIN_PAGE), MAX_PAGE)
+
+    def params(self):
+        return wall_params(self.group, self.count, self.offset)
+
+    def add_page(self, posts):
+        """Добавляет страницу постов; решает, нужна ли следующая."""
+        self.pages += 1
+        for post in posts:
+            date = post.get("date")
+            # Закреплённый пост стоит первым независимо от даты
+            if not post.get("is_pinned") and (
+                    (self.cursor is not None and post.get("id", 0) <= self.cursor)
+                    or (isinstance(date, int) and date < self.threshold)):
+                self.done = True
+                return
+            self.posts.append(post)
+
+        if len(posts) < self.count:
+            self.done = True  # Стена закончилась
+        elif self.pages >= MAX_PAGES:
+            self.done = self.truncated = True
+            logger.warning(f"Группа {self.group}: прочитано {MAX_PAGES} страниц, посты глубже пропущены")
+        else:
+            # Частоту недооценили: следующая страница вдвое больше
+            self.offset += self.count
+            self.count = min(self.count * 2, MAX_PAGE)
+
+    def finish(self, source, make_title):
+        """
+        Новости группы за сутки: сохранённые и подходящие новые посты.
+        Сохраняет курсор, отобранные новости и оценку частоты постов.
+        """
+        fresh = []
+        links = {item.link for item in self.kept}
+        newest, newest_date, oldest_date, new_posts = self.cursor, self.state.get("date"), None, 0
+        for post in self.posts:
+            post_id = post.get("id")
+            date = post.get("date")
+            link = f"https://vk.com/wall{post.get('owner_id')}_{post_id}"
+
+            # VK отдаёт дату как Unix-время
+            if not isinstance(date, int):
+                logger.error(f"Неверная дата поста {link}: {date!r}")
+                continue
+            if self.cursor is not None and post_id <= self.cursor:
+                continue  # Закреплённый пост, который уже видели
+
+            if not post.get("is_pinned"):
+                new_posts += 1
+                oldest_date = date if oldest_date is None else min(oldest_date, date)
+            if newest is None or post_id > newest:
+                newest, newest_date = post_id, date
+
+            if date < self.threshold or link in links:
+                continue
+            links.add(link)
+            text = post.get("text", "").strip()
+            if is_relevant(text):
+                fresh.append(NewsItem.create(source, make_title(text), link, date))
+
+        # Наблюдаемая частота: новые посты за время с прошлого сбора (за сутки
+        # при первом сборе), а если чтение прервано — за период прочитанных постов
+        if self.truncated and oldest_date is not None:
+            elapsed = self.polled - oldest_date
+        elif self.cursor is None:
+            elapsed = DAY
+        else:
+            elapsed = self.polled - self.state.get("polled", self.polled - DAY)
+        rate = self.state.get("rate")
+        if elapsed > 0:
+            observed = new_posts / elapsed
+            rate = observed if rate is None else rate + RATE_SMOOTHING * (observed - rate)
+
+        news = fresh + self.kept
+        state = {"rate": rate, "polled": self.polled, "date": newest_date}
+        self.store.set(self.key, newest if newest is not None else 0, news, state)
+        return news
+
+
+async def collect_vk_posts(access_token, groups, session=None, api_url=VK_API_URL, make_title=first_line_title,
+                           source="vk", store=None):
+    """
+    Собирает посты групп за последние сутки, прошедшие фильтр ключевых слов.
+    Возвращает список NewsItem с id источника source и словарь {группа: текст ошибки}.
+    Курсоры групп хранятся в store (по умолчанию cursor_store).
+    """
+    session = session or get_session()
+    store = store or cursor_store
+    threshold = cutoff()
+    polled = now().timestamp()
+    # Заголовки отобранных новостей зависят от make_title, поэтому и курсоры свои
+    polls = {
+        group: WallPoll(group, f"{source}:{make_title.__name__}:{group}", threshold, polled, store)
+        for group in groups
+    }
+    news = {}
+    errors = {}
+
+    pending = list(groups)
+    while pending:
+        walls, page_errors = await fetch_walls(
+            session, pending, access_token, api_url, {group: polls[group].params() for group in pending}
+        )
+        errors.update(page_errors)
+        metrics.count_candidates(sum(len(posts) for posts in walls.values()))
+
+        for group, posts in walls.items():
+            poll = polls[group]
+            poll.add_page(posts)
+            if poll.done:
+                news[group] = poll.finish(source, make_title)
+        pending = [group for group in pending if group in walls and not polls[group].done]
+
+    for group, error in errors.items():
+        logger.error(f"Ошибка от {group}: {error}")
+        metrics.record_error("api")
+        # Курсор группы не сдвигается, отдаются сохранённые новости
+        news[group] = polls[group].kept
+
+    pages = sum(poll.pages for poll in polls.values())
+    logger.debug(f"VK: {len(groups)} групп, {pages} страниц")
+    return [item for group in groups for item in news.get(group, [])], errors
+
+
+async def fetch_vk_news(session=None):
+    """Посты групп config.VK_GROUPS за сутки — источник "vk" для бота."""
+    news_list, _ = await collect_vk_posts(VK_ACCESS_TOKEN, VK_GROUPS, session=session)
+    return news_list